@@ -1,4 +1,4 @@
-from robotidy.cli import cli
+from robotidy.daemon import main
 
 if __name__ == "__main__":
-    cli()
+    main()
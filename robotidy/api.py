@@ -4,10 +4,11 @@ Methods for transforming Robot Framework ast model programmatically.
 
 from __future__ import annotations
 
+import threading
 from pathlib import Path
 
 from robotidy import app, disablers, files
-from robotidy.config import MainConfig, RawConfig
+from robotidy.config import ConfigCache, MainConfig, RawConfig
 
 
 def get_robotidy(src: str, output: str | None, ignore_git_dir: bool = False, **kwargs):
@@ -17,6 +18,10 @@ def get_robotidy(src: str, output: str | None, ignore_git_dir: bool = False, **k
         config_dict = files.read_pyproject_config(config_file)
         config = config.from_config_file(config_dict, config_file)
     main_config = MainConfig(config)
+    return get_api_robotidy(main_config, output)
+
+
+def get_api_robotidy(main_config: MainConfig, output: str | None) -> app.Robotidy:
     main_config.default_loaded.overwrite = False
     main_config.default_loaded.show_diff = False
     main_config.default_loaded.verbose = False
@@ -48,3 +53,69 @@ def transform_model(model, root_dir: str, output: str | None = None, **kwargs) -
     if not diff:
         return None
     return new_model.text
+
+
+class Formatter:
+    """
+    Format Robot Framework code in memory, for example on save in the editor.
+
+    Configuration is read from the configuration file found for the formatted path (or the current working directory)
+    and the loaded configurations with the transformer instances are reused between the calls. Configuration file is
+    loaded again when it is modified. Calls from multiple threads are formatted one by one, since the transformer
+    instances (with the languages of the formatted model) are shared between the calls.
+
+    :param ignore_git_dir: Do not stop searching for the configuration file at the directory containing ``.git``.
+    :param kwargs: Default values for global formatting parameters such as ``spacecount`` or ``transform``.
+    """
+
+    def __init__(self, ignore_git_dir: bool = False, **kwargs):
+        self.ignore_git_dir = ignore_git_dir
+        self.options = kwargs
+        self.config_cache = ConfigCache()
+        self.lock = threading.Lock()
+
+    def get_robotidy(self, path: str | Path | None) -> app.Robotidy:
+        src = Path(path).resolve() if path else Path.cwd()
+        config = RawConfig(src=(str(src),), **self.options)
+        config_file = files.find_source_config_file(src, self.ignore_git_dir)
+        if config_file:
+            config = config.from_config_file(self.config_cache.read_config_file(config_file), config_file)
+        return get_api_robotidy(MainConfig(config, config_cache=self.config_cache), output=None)
+
+    def format_string(self, text: str, path: str | Path | None = None) -> str | None:
+        """
+        :param text: Robot Framework code to be formatted.
+        :param path: Path of the formatted file, used to find the configuration file. The file does not need to exist.
+        :return: Formatted code or None if the code is already formatted.
+        """
+        with self.lock:
+            robotidy = self.get_robotidy(path)
+            return self.transform(robotidy, robotidy.get_model(text), text)
+
+    def format_model(self, model) -> str | None:
+        """
+        :param model: The model to be formatted. Configuration file is searched based on the model source path.
+        :return: The formatted model converted to string or None if no transformation took place.
+        """
+        with self.lock:
+            return self.transform(self.get_robotidy(model.source), model)
+
+    @staticmethod
+    def transform(robotidy: app.Robotidy, model, text: str | None = None) -> str | None:
+        """
+        Transform the model with the lock held. The languages of the model (the configured languages and the languages
+        from its ``Language:`` header) are set in the transformers by ``Robotidy.transform``.
+        """
+        disabler_finder = disablers.RegisterDisablers(
+            robotidy.config.formatting.start_line,
+            robotidy.config.formatting.end_line,
+        )
+        if text is not None:
+            disabler_finder.prescan(text)
+        disabler_finder.visit(model)
+        if disabler_finder.is_disabled_in_file(disablers.ALL_TRANSFORMERS):
+            return None
+        diff, _, new_model, _ = robotidy.transform_until_stable(model, disabler_finder)
+        if not diff:
+            return None
+        return new_model.text
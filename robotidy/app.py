@@ -1,74 +1,270 @@
+from __future__ import annotations
+
+import io
 import os
 import sys
-from difflib import unified_diff
-
-try:
-    import rich_click as click
-except ImportError:  # Fails on vendored-in LSP plugin
-    import click
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from itertools import chain, islice
 
+import click
 from robot.api import get_model
 from robot.errors import DataError
 
-from robotidy import disablers
-from robotidy.config import MainConfig
-from robotidy.rich_console import console
-from robotidy.utils import misc
+from robotidy import cache, disablers, pipeline
+from robotidy.config import Config, MainConfig, RawConfig
+from robotidy.rich_console import get_console
+from robotidy.utils import archive, misc
+from robotidy.utils.diff import unified_diff
+
+PENDING_PER_WORKER = 4  # number of sources submitted to the process pool ahead of the printed one
+PARALLEL_MIN_SOURCES = 16  # without --workers, fewer sources are formatted faster than the process pool starts
+
+
+class FileResult:
+    """
+    Outcome of formatting single source. Output is stored and printed by the main process to keep the order of the
+    messages the same regardless of the number of workers.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.stdin = False
+        self.changed = False
+        self.skipped = False
+        self.messages: list[tuple[str, bool]] = []
+        self.stdout: str | None = None
+        self.diff: list[str] | None = None
+        self.written: str | None = None
+        self.digest: bytes | None = None
+        self.stable = False
+        self.transformer: str | None = None  # transformer that changed the source (with --check --fail-fast)
+        self.archive_member: tuple[str, int] | None = None  # archive path and member index of the archived source
+        self.content: bytes | None = None  # formatted content of the archived source, written to the archive
+
+    def echo(self, message: str, err: bool = False):
+        self.messages.append((message, err))
 
 
 class Robotidy:
     def __init__(self, main_config: "MainConfig"):
         self.main_config = main_config
         self.config = main_config.default_loaded
+        self.caches: dict[str, cache.Cache] = {}
 
-    def get_model(self, source):
+    def get_cache(self, config) -> cache.Cache | None:
+        if not self.main_config.default.cache:
+            return None
+        if config.fingerprint not in self.caches:
+            cache_dir = cache.get_cache_dir(self.main_config.default.cache_dir)
+            self.caches[config.fingerprint] = cache.Cache.for_fingerprint(cache_dir, config.fingerprint)
+        return self.caches[config.fingerprint]
+
+    def get_model(self, text: str, source=None):
+        """
+        Parse the model from the text. Source files are read by Robotidy (see ``misc.SourceFile``), so the text is
+        always parsed from memory and ``source`` path is only set as the model source.
+        """
         if misc.rf_supports_lang():
-            return get_model(source, lang=self.config.language)
-        return get_model(source)
+            # Robot Framework adds the languages from the ``Language:`` header to the given ones, so every file is parsed
+            # with its own languages
+            model = get_model(io.StringIO(text), lang=self.config.get_file_languages())
+        else:
+            model = get_model(io.StringIO(text))
+        if source is not None:
+            model.source = source
+        return model
 
     def transform_files(self):
         changed_files = 0
         skipped_files = 0
         all_files = 0
         stdin = False
-        for source, config in self.main_config.get_sources_with_configs():
-            self.config = config
-            all_files += 1
-            disabler_finder = disablers.RegisterDisablers(
-                self.config.formatting.start_line, self.config.formatting.end_line
-            )
-            previous_changed_files = changed_files
-            try:
-                stdin = False
-                if str(source) == "-":
-                    stdin = True
-                    if self.config.verbose:
-                        click.echo("Loading file from stdin")
-                    source = self.load_from_stdin()
-                elif self.config.verbose:
-                    click.echo(f"Found {source} file")
-                model = self.get_model(source)
-                model_path = model.source or source
-                disabler_finder.visit(model)
-                if disabler_finder.is_disabled_in_file(disablers.ALL_TRANSFORMERS):
-                    continue
-                diff, old_model, new_model, model = self.transform_until_stable(model, disabler_finder)
-                if stdin:
-                    self.print_to_stdout(new_model)
-                elif diff:
-                    self.save_model(model_path, model)
-                    self.log_formatted_source(source, stdin)
-                    self.output_diff(model_path, old_model, new_model)
+        written = []
+        configs = {}
+        stopped = False
+        try:
+            for config, result in self.transform_sources(self.main_config.get_sources_with_configs()):
+                self.config = config
+                configs[id(config)] = config
+                all_files += 1
+                stdin = result.stdin
+                self.report(result)
+                if result.changed:
                     changed_files += 1
-            except DataError as err:
-                click.echo(
-                    f"Failed to decode {source} with an error: {err}\nSkipping file",
-                    err=True,
-                )
-                changed_files = previous_changed_files
-                skipped_files += 1
+                if result.skipped:
+                    skipped_files += 1
+                if result.written:
+                    written.append(result.written)
+                if result.archive_member:
+                    self.write_archive_member(result)
+                if result.stable and result.digest:
+                    self.get_cache(config).add(result.digest)
+                if result.changed and self.fails_fast(config):
+                    # leaving the loop stops transforming the remaining sources
+                    stopped = True
+                    break
+        finally:
+            # archives that were not read or written completely are left unchanged
+            for archive_source in self.main_config.archives.values():
+                archive_source.close()
+        if self.main_config.default.fsync == "batch":
+            misc.fsync_files(written)
+        for formatted_cache in self.caches.values():
+            formatted_cache.write()
+        if self.main_config.default.verbose and not stdin:
+            self.log_configurations(list(configs.values()))
+        if stopped:
+            click.echo("\nStopped on the first file that would be reformatted (--fail-fast).")
         return self.formatting_result(all_files, changed_files, skipped_files, stdin)
 
+    def transform_sources(self, sources_with_configs):
+        """
+        Transform sources and yield their configs and results in the order of sources.
+
+        If more than one worker is allowed, sources are transformed in the process pool - if there is more than one
+        source with ``--workers`` option, or at least ``PARALLEL_MIN_SOURCES`` sources without it.
+        """
+        min_sources = 2 if self.main_config.default.workers is not None else PARALLEL_MIN_SOURCES
+        sources_with_configs = iter(sources_with_configs)
+        first_sources = list(islice(sources_with_configs, min_sources))
+        sources_with_configs = chain(first_sources, sources_with_configs)
+        workers = self.get_workers_count()
+        if len(first_sources) < min_sources or workers < 2 or self.main_config.default.output:
+            for source, config in sources_with_configs:
+                yield config, self.transform_file(source, config)
+        else:
+            yield from self.transform_in_pool(sources_with_configs, workers)
+
+    def get_workers_count(self) -> int:
+        if self.main_config.default.workers is None:
+            return os.cpu_count() or 1
+        return self.main_config.default.workers
+
+    def transform_in_pool(self, sources_with_configs, workers: int):
+        max_pending = workers * PENDING_PER_WORKER
+        pending = deque()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(
+                self.main_config.default,
+                self.main_config.changed_lines,
+                self.main_config.get_worker_git_source(),
+            ),
+        ) as executor:
+            try:
+                for source, config in sources_with_configs:
+                    if str(source) == "-":
+                        future = Future()
+                        future.set_result(self.transform_file(source, config))
+                    else:
+                        future = executor.submit(_transform_in_worker, source)
+                    pending.append((config, future))
+                    if len(pending) >= max_pending:
+                        config, future = pending.popleft()
+                        yield config, future.result()
+                while pending:
+                    config, future = pending.popleft()
+                    yield config, future.result()
+            finally:
+                # results are not needed if the caller stopped early (for example with --fail-fast)
+                if sys.version_info >= (3, 9):
+                    executor.shutdown(cancel_futures=True)
+                else:
+                    for _, future in pending:
+                        future.cancel()
+
+    def transform_file(self, source, config) -> FileResult:
+        """
+        Transform the source. The source is the path, ``-`` (stdin) or the source file already read to the memory (such
+        as the file read from git or from the archive).
+        """
+        self.config = config
+        source_file = source if isinstance(source, misc.SourceFile) else None
+        if source_file is not None:
+            source = source_file.path
+        result = FileResult(source)
+        if isinstance(source_file, archive.ArchiveSourceFile):
+            result.archive_member = source_file.archive, source_file.index
+        lines_ranges = self.main_config.get_lines_ranges(source)
+        disabler_finder = disablers.RegisterDisablers(
+            self.config.formatting.start_line, self.config.formatting.end_line, lines_ranges
+        )
+        try:
+            if str(source) == "-":
+                result.stdin = True
+                if self.config.verbose:
+                    result.echo("Loading file from stdin")
+                text = self.load_from_stdin()
+                disabler_finder.prescan(text)
+                model = self.get_model(text)
+            else:
+                if self.config.verbose:
+                    result.echo(f"Found {source} file")
+                if source_file is None:
+                    source_file = misc.SourceFile.read(source)
+                # the file formatted only in the changed lines is not stable
+                formatted_cache = self.get_cache(config) if lines_ranges is None else None
+                if formatted_cache is not None:
+                    result.digest = cache.get_digest(source_file.content)
+                    if result.digest in formatted_cache:
+                        result.stable = True
+                        return result
+                disabler_finder.prescan(source_file.content)
+                model = self.get_model(source_file.text, source)
+            disabler_finder.visit(model)
+            if disabler_finder.is_disabled_in_file(disablers.ALL_TRANSFORMERS):
+                result.stable = True
+                return result
+            if self.fails_fast(config) and not result.stdin:
+                first_pass = self.transform(model, disabler_finder.disablers)
+                if first_pass[0]:
+                    # the run stops on the changed file, so the transformer is only looked for in this file
+                    result.transformer = self.find_changing_transformer(
+                        source_file.text, source, disabler_finder.disablers
+                    )
+                if self.config.overwrite or self.config.show_diff:
+                    diff, old_model, new_model, model = self.transform_until_stable(model, disabler_finder, first_pass)
+                else:
+                    # only the status is needed, so the transformers are not run again to get the final formatting
+                    diff, old_model, new_model = first_pass
+            else:
+                diff, old_model, new_model, model = self.transform_until_stable(model, disabler_finder)
+            result.stable = not diff
+            if result.stdin:
+                if not self.config.show_diff:
+                    result.stdout = new_model.text
+            elif diff:
+                if result.archive_member:
+                    result.content = self.render_archive_member(source_file, model)
+                else:
+                    result.written = self.save_model(source_file, model)
+                result.echo(self.get_formatted_source_message(source, result.transformer))
+                result.diff = self.get_diff(source, old_model, new_model)
+                result.changed = True
+        except DataError as err:
+            result.echo(f"Failed to decode {source} with an error: {err}\nSkipping file", err=True)
+            result.changed = False
+            result.skipped = True
+        return result
+
+    def write_archive_member(self, result: FileResult):
+        path, index = result.archive_member
+        try:
+            self.main_config.archives[path].set_content(index, result.content)
+        except DataError as err:
+            click.echo(f"{err}\nSkipping archive", err=True)
+
+    def report(self, result: FileResult):
+        for message, err in result.messages:
+            click.echo(message, err=err)
+        if result.stdout is not None:
+            click.echo(result.stdout)
+        if result.diff:
+            self.print_diff(result.diff)
+
     def formatting_result(self, all_files: int, changed_files: int, skipped_files: int, stdin: bool):
         """
         Print formatting summary and return status code.
@@ -89,77 +285,182 @@ class Robotidy:
             return 0
         return 1
 
-    def log_formatted_source(self, source: str, stdin: bool):
-        if stdin:
-            return
+    @staticmethod
+    def log_configurations(configs: list[Config]):
+        """Print how many configurations were used and how many of them had distinct transformers setup."""
+        distinct = len({id(config.transformers) for config in configs})
+        configs_plurar = "" if len(configs) == 1 else "s"
+        distinct_plurar = "" if distinct == 1 else "s"
+        click.echo(
+            f"Used {len(configs)} configuration{configs_plurar} "
+            f"with {distinct} distinct transformers setup{distinct_plurar}"
+        )
+
+    def get_formatted_source_message(self, source, transformer: str | None = None) -> str:
+        changed_by = f" (changed by {transformer})" if transformer else ""
         if not self.config.overwrite:
-            click.echo(f"Would reformat {source}")
-        else:
-            click.echo(f"Reformatted {source}")
+            return f"Would reformat {source}{changed_by}"
+        return f"Reformatted {source}{changed_by}"
+
+    def fails_fast(self, config: Config) -> bool:
+        return config.check and self.main_config.default.fail_fast
 
-    def transform_until_stable(self, model, disabler_finder):
-        diff, old_model, new_model = self.transform(model, disabler_finder.disablers)
+    def transform_until_stable(self, model, disabler_finder, first_pass=None):
+        """
+        Transform the model until the transformers do not change it (up to ``reruns`` times). ``first_pass`` is the
+        result of the first transformation, if the model was already transformed once.
+        """
+        diff, old_model, new_model = first_pass or self.transform(model, disabler_finder.disablers)
         reruns = self.config.reruns
+        pass_model = old_model
         while diff and reruns:
-            model = get_model(new_model.text)
+            model = self.get_model_for_rerun(model, pass_model, new_model)
             disabler_finder.visit(model)
-            new_diff, _, new_model = self.transform(model, disabler_finder.disablers)
+            new_diff, pass_model, new_model = self.transform(model, disabler_finder.disablers)
             if not new_diff:
                 break
             reruns -= 1
         return diff, old_model, new_model, model
 
+    def get_model_for_rerun(self, model, old_model, new_model):
+        """
+        Return model for the next run of the transformers.
+
+        If the transformers only modified the values of the tokens, the model structure is the same as if the text was
+        parsed again - only positions of the tokens need to be updated. Otherwise, the model text is parsed again.
+        """
+        if old_model.structure != new_model.structure:
+            return self.get_model(new_model.text, model.source)
+        return misc.ModelPositionsUpdater().visit(model)
+
+    def set_languages(self, model):
+        """
+        Set the languages of the model (the configured languages and the languages from its ``Language:`` header) in
+        the transformers. It is also done for the models parsed outside of Robotidy, such as the models from the API.
+        """
+        languages = self.config.get_file_languages(model)
+        for transformer in self.config.transformers:
+            transformer.languages = languages
+
     def transform(self, model, disablers):
-        old_model = misc.StatementLinesCollector(model)
+        self.set_languages(model)
+        old_model = misc.StatementLinesCollector(model, keep_text=self.config.show_diff)
+        for step in pipeline.fuse_transformers(self.get_transformers(disablers), disablers):
+            step.visit(model)
+        new_model = misc.StatementLinesCollector(model)
+        return new_model != old_model, old_model, new_model
+
+    def get_transformers(self, disablers) -> list:
+        transformers = []
         for transformer in self.config.transformers:
             setattr(transformer, "disablers", disablers)  # set dynamically to allow using external transformers
             if disablers.is_disabled_in_file(transformer.__class__.__name__):
                 continue
+            transformers.append(transformer)
+        return transformers
+
+    def find_changing_transformer(self, text: str, source, disablers) -> str | None:
+        """
+        Parse the source again and run the transformers one by one to find the transformer that introduced the change
+        kept until the end.
+
+        The first transformer that changed the model is not enough - later transformers can revert its changes (for
+        example aligners add the separators removed by ``NormalizeSeparators``). The digest of the model content is
+        compared with the original after each transformer instead.
+        """
+        model = self.get_model(text, source)
+        self.set_languages(model)
+        original = misc.get_content_digest(model)
+        changed_by = None
+        for transformer in self.get_transformers(disablers):
             transformer.visit(model)
-        new_model = misc.StatementLinesCollector(model)
-        return new_model != old_model, old_model, new_model
+            if misc.get_content_digest(model) == original:
+                changed_by = None
+            elif changed_by is None:
+                changed_by = transformer.__class__.__name__
+        return changed_by
 
     @staticmethod
     def load_from_stdin() -> str:
         return sys.stdin.read()
 
-    def print_to_stdout(self, collected_lines):
-        if not self.config.show_diff:
-            click.echo(collected_lines.text)
+    def save_model(self, source_file: misc.SourceFile, model) -> str | None:
+        """Save the model and return the path of the written file."""
+        if not self.config.overwrite:
+            return None
+        output = self.config.output or source_file.path
+        # the source file is only written if its content changed
+        original = None if self.config.output else source_file.content
+        writer = misc.ModelWriter(
+            output=output,
+            newline=self.get_line_ending(source_file),
+            original=original,
+            bom=source_file.bom,
+            fsync=self.main_config.default.fsync == "file",
+        )
+        if writer.write(model):
+            return str(output)
+        return None
 
-    def save_model(self, source, model):
-        if self.config.overwrite:
-            output = self.config.output or source
-            misc.ModelWriter(output=output, newline=self.get_line_ending(source)).write(model)
+    def render_archive_member(self, source_file: misc.SourceFile, model) -> bytes | None:
+        """Return the formatted content of the source file from the archive, or ``None`` if it is not written."""
+        if not self.config.overwrite or self.config.output:
+            return None
+        writer = misc.ModelWriter(output=None, newline=self.get_line_ending(source_file), bom=source_file.bom)
+        content = writer.render(model)
+        return None if content == source_file.content else content
 
-    def get_line_ending(self, path: str):
+    def get_line_ending(self, source_file: misc.SourceFile):
         if self.config.formatting.line_sep == "auto":
-            with open(path) as f:
-                f.readline()
-                if f.newlines is None:
-                    return os.linesep
-                if isinstance(f.newlines, str):
-                    return f.newlines
-                else:
-                    return f.newlines[0]
+            return source_file.newline or os.linesep
         return self.config.formatting.line_sep
 
-    def output_diff(
+    def get_diff(
         self,
         path: str,
         old_model: misc.StatementLinesCollector,
         new_model: misc.StatementLinesCollector,
-    ):
+    ) -> list[str] | None:
         if not self.config.show_diff:
-            return
+            return None
         old = [l + "\n" for l in old_model.text.splitlines()]
         new = [l + "\n" for l in new_model.text.splitlines()]
-        lines = list(unified_diff(old, new, fromfile=f"{path}\tbefore", tofile=f"{path}\tafter"))
-        if not lines:
+        return list(unified_diff(old, new, fromfile=f"{path}\tbefore", tofile=f"{path}\tafter"))
+
+    def print_diff(self, lines: list[str]):
+        if not (self.config.color and misc.is_terminal()):
+            # the diff is written in one block, without rendering it with rich (tabs are expanded the same way)
+            click.echo("".join(line.expandtabs(8) for line in lines), nl=False)
             return
-        if self.config.color:
-            output = misc.decorate_diff_with_color(lines)
-        else:
-            output = misc.escape_rich_markup(lines)
-        for line in output:
+        console = get_console()
+        for line in misc.decorate_diff_with_color(lines):
             console.print(line, end="", highlight=False, soft_wrap=True)
+
+
+_worker_app: Robotidy | None = None
+
+
+def _init_worker(raw_config: RawConfig, changed_lines, git_source):
+    """
+    Load configuration in the worker process. Messages are already printed by the main process. The lines changed
+    since the ``--diff-against`` revision, and the files and configuration files of the ``--git-rev`` revision (or
+    the index) are already read from git.
+    """
+    global _worker_app
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        main_config = MainConfig(raw_config)
+    main_config.changed_lines = changed_lines
+    main_config.git_source = git_source
+    _worker_app = Robotidy(main_config)
+
+
+def _transform_in_worker(source) -> FileResult:
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        config = _worker_app.main_config.get_config_for(source)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        result = _worker_app.transform_file(source, config)
+    # output printed directly by the transformers
+    captured = [(output.getvalue().rstrip("\n"), err) for output, err in ((stdout, False), (stderr, True))]
+    result.messages = [(message, err) for message, err in captured if message] + result.messages
+    return result
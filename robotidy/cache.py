@@ -0,0 +1,127 @@
+"""
+Persistent cache of the sources that are already formatted.
+
+Cache is stored per configuration fingerprint (hash of all options that affect the formatting) and contains digests of
+the file contents that were not changed by Robotidy. Files with known digest can be skipped without parsing them.
+
+Cache file contains the header followed by the fixed-size records (content digest, last used timestamp) sorted by
+digest, so the lookup does not require loading the cache into the dictionary.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HEADER = b"RTC1"
+RECORD = struct.Struct("<16sI")  # content digest, last used time (seconds since epoch)
+DIGEST_SIZE = 16
+MAX_ENTRIES = 200_000
+CACHE_DIR_ENV = "ROBOTIDY_CACHE_DIR"
+
+
+def get_cache_dir(cache_dir: Path | None = None) -> Path:
+    """Return cache directory from the option, environment variable or the platform default user cache directory."""
+    if cache_dir:
+        return Path(cache_dir)
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV])
+    if sys.platform == "win32":
+        user_cache = Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local"))
+    elif sys.platform == "darwin":
+        user_cache = Path.home() / "Library" / "Caches"
+    else:
+        user_cache = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return user_cache / "robotidy"
+
+
+def get_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def get_fingerprint(*parts) -> str:
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def read_records(path: Path) -> bytes:
+    """Read cache file records. Missing or invalid cache file is treated as an empty cache."""
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return b""
+    if not data.startswith(HEADER) or (len(data) - len(HEADER)) % RECORD.size:
+        return b""
+    return data[len(HEADER) :]
+
+
+class Cache:
+    """Sorted, fixed-size records of the formatted files digests with least recently used eviction."""
+
+    def __init__(self, path: Path, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.records = read_records(path)
+        self.used: dict[bytes, int] = {}
+
+    @classmethod
+    def for_fingerprint(cls, cache_dir: Path, fingerprint: str) -> "Cache":
+        return cls(cache_dir / f"cache.{fingerprint}.bin")
+
+    def __len__(self):
+        return len(self.records) // RECORD.size
+
+    def __contains__(self, digest: bytes | None) -> bool:
+        if digest is None:
+            return False
+        if digest in self.used:
+            return True
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            start = middle * RECORD.size
+            if self.records[start : start + DIGEST_SIZE] < digest:
+                low = middle + 1
+            else:
+                high = middle
+        start = low * RECORD.size
+        return self.records[start : start + DIGEST_SIZE] == digest
+
+    def add(self, digest: bytes):
+        """Mark digest as formatted and recently used."""
+        self.used[digest] = int(time.time())
+
+    def write(self):
+        """
+        Merge used entries with the current content of the cache file and replace it atomically.
+
+        The cache file is read again before writing so the entries written by the concurrent runs are not lost. If two
+        runs write at the same time, the last one wins - which only results in cache misses in the next run.
+        """
+        if not self.used:
+            return
+        entries = dict(RECORD.iter_unpack(read_records(self.path)))
+        entries.update(self.used)
+        if len(entries) > self.max_entries:
+            recent = sorted(entries.items(), key=lambda entry: entry[1], reverse=True)[: self.max_entries]
+            entries = dict(recent)
+        data = HEADER + b"".join(RECORD.pack(digest, used) for digest, used in sorted(entries.items()))
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.path.parent, prefix=self.path.name, delete=False) as fp:
+                fp.write(data)
+        except OSError:  # cache is optional, read-only or full file system should not stop formatting
+            return
+        try:
+            os.replace(fp.name, self.path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.unlink(fp.name)
+            return
+        self.records = data[len(HEADER) :]
+        self.used = {}
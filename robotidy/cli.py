@@ -4,20 +4,13 @@ import sys
 from pathlib import Path
 from typing import Pattern
 
-try:
-    import rich_click as click
+import click
 
-    RICH_PRESENT = True
-except ImportError:  # Fails on vendored-in LSP plugin
-    import click
-
-    RICH_PRESENT = False
-
-from robotidy import app
+from robotidy import app, cache
 from robotidy import config as config_module
-from robotidy import decorators, exceptions, files, skip, version
+from robotidy import daemon, decorators, exceptions, files, skip, version
 from robotidy.config import RawConfig, csv_list_type, validate_target_version
-from robotidy.rich_console import console
+from robotidy.rich_console import get_console
 from robotidy.transformers import TransformConfigMap, TransformConfigParameter, load_transformers
 from robotidy.utils import misc
 
@@ -32,7 +25,7 @@ CLI_OPTIONS_LIST = [
     },
     {
         "name": "Work modes",
-        "options": ["--overwrite", "--diff", "--check", "--force-order"],
+        "options": ["--overwrite", "--diff", "--check", "--fail-fast", "--git-rev", "--git-index", "--force-order"],
     },
     {
         "name": "Documentation",
@@ -53,11 +46,12 @@ CLI_OPTIONS_LIST = [
             "--separator",
             "--startline",
             "--endline",
+            "--diff-against",
         ],
     },
     {
         "name": "File exclusion",
-        "options": ["--exclude", "--extend-exclude", "--skip-gitignore"],
+        "options": ["--exclude", "--extend-exclude", "--skip-gitignore", "--changed-since", "--staged"],
     },
     skip.option_group,
     {
@@ -66,6 +60,13 @@ CLI_OPTIONS_LIST = [
             "--target-version",
             "--language",
             "--reruns",
+            "--workers",
+            "--discovery-threads",
+            "--discover",
+            "--cache",
+            "--cache-dir",
+            "--fsync",
+            "--daemon",
             "--verbose",
             "--color",
             "--output",
@@ -75,20 +76,88 @@ CLI_OPTIONS_LIST = [
     },
 ]
 
-if RICH_PRESENT:
-    click.rich_click.USE_RICH_MARKUP = True
-    click.rich_click.USE_MARKDOWN = True
-    click.rich_click.FORCE_TERMINAL = None  # workaround rich_click trying to force color in GitHub Actions
-    click.rich_click.STYLE_OPTION = "bold sky_blue3"
-    click.rich_click.STYLE_SWITCH = "bold sky_blue3"
-    click.rich_click.STYLE_METAVAR = "bold white"
-    click.rich_click.STYLE_OPTION_DEFAULT = "grey37"
-    click.rich_click.STYLE_OPTIONS_PANEL_BORDER = "grey66"
-    click.rich_click.STYLE_USAGE = "magenta"
-    click.rich_click.OPTION_GROUPS = {
+
+def import_rich_click():
+    """Import and configure ``rich_click``. Return ``None`` if it is not installed (vendored-in LSP plugin)."""
+    try:
+        import rich_click
+    except ImportError:
+        return None
+    rich_click.rich_click.USE_RICH_MARKUP = True
+    rich_click.rich_click.USE_MARKDOWN = True
+    rich_click.rich_click.FORCE_TERMINAL = None  # workaround rich_click trying to force color in GitHub Actions
+    rich_click.rich_click.STYLE_OPTION = "bold sky_blue3"
+    rich_click.rich_click.STYLE_SWITCH = "bold sky_blue3"
+    rich_click.rich_click.STYLE_METAVAR = "bold white"
+    rich_click.rich_click.STYLE_OPTION_DEFAULT = "grey37"
+    rich_click.rich_click.STYLE_OPTIONS_PANEL_BORDER = "grey66"
+    rich_click.rich_click.STYLE_USAGE = "magenta"
+    rich_click.rich_click.OPTION_GROUPS = {
         "robotidy": CLI_OPTIONS_LIST,
         "python -m robotidy": CLI_OPTIONS_LIST,
     }
+    return rich_click
+
+
+class RichOnDemandCommand(click.Command):
+    """
+    Command that formats the help and error messages with ``rich_click``.
+
+    ``rich_click`` (and ``rich``) take noticeable time to import, so they are only imported when the help or the error
+    message is displayed. The options are parsed and the command is run with plain ``click``.
+    """
+
+    def get_rich_command(self):
+        rich_click = import_rich_click()
+        if rich_click is None:
+            return None
+        return rich_click.RichCommand(
+            name=self.name,
+            context_settings=self.context_settings,
+            callback=self.callback,
+            params=self.params,
+            help=self.help,
+        )
+
+    def get_help(self, ctx: click.Context) -> str:
+        rich_command = self.get_rich_command()
+        if rich_command is None:
+            return super().get_help(ctx)
+        rich_ctx = rich_command.make_context(ctx.info_name, [], parent=ctx.parent, resilient_parsing=True)
+        return rich_command.get_help(rich_ctx)
+
+    def main(self, args=None, prog_name=None, complete_var=None, standalone_mode=True, **extra):
+        if not standalone_mode:
+            return super().main(args, prog_name, complete_var, standalone_mode, **extra)
+        try:
+            exit_code = super().main(args, prog_name, complete_var, standalone_mode=False, **extra)
+        except click.ClickException as err:
+            self.show_error(err)
+            sys.exit(err.exit_code)
+        except click.Abort:
+            click.echo("Aborted!", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(exit_code)
+
+    def show_error(self, err: click.ClickException):
+        """
+        Display the error with ``rich_click``. There is no public API for formatting the error alone, so the error is
+        raised from the callback of the ``RichCommand`` which displays it the same way as when it is raised while
+        running the command.
+        """
+        rich_click = import_rich_click()
+        if rich_click is None:
+            err.show()
+            return
+
+        def raise_error():
+            raise err
+
+        error_command = rich_click.RichCommand(name=self.name, context_settings=self.context_settings, callback=raise_error)
+        try:
+            error_command.main(args=[], prog_name=self.name)
+        except SystemExit:
+            pass
 
 
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
@@ -121,7 +190,7 @@ def print_transformer_docs(transformer):
     from rich.markdown import Markdown
 
     md = Markdown(str(transformer), code_theme="native", inline_code_lexer="robotframework")
-    console.print(md)
+    get_console().print(md)
 
 
 @decorators.optional_rich
@@ -183,6 +252,7 @@ def print_transformers_list(global_config: config_module.MainConfig):
         if enabled != transformer.enabled_by_default:
             decorated_enable = f"[bold magenta]{decorated_enable}*"
         table.add_row(transformer.name, decorated_enable)
+    console = get_console()
     console.print(table)
     console.print(
         "Transformers are listed in the order they are run by default. If the transformer was enabled/disabled by the "
@@ -236,7 +306,7 @@ def generate_config(global_config: config_module.MainConfig):
         fp.write(tomli_w.dumps(toml_config))
 
 
-@click.command(context_settings=CONTEXT_SETTINGS)
+@click.command(cls=RichOnDemandCommand, context_settings=CONTEXT_SETTINGS)
 @click.option(
     "--transform",
     "-t",
@@ -294,6 +364,19 @@ def generate_config(global_config: config_module.MainConfig):
     show_default=True,
     help="Skip **.gitignore** files and do not ignore files listed inside.",
 )
+@click.option(
+    "--changed-since",
+    default=None,
+    metavar="REV",
+    help="Transform only the files changed since the git revision (including uncommitted and untracked files). "
+    "Changed files are read from git instead of walking the directories. Exclusion rules still apply.",
+)
+@click.option(
+    "--staged",
+    is_flag=True,
+    help="Transform only the files with the changes staged in git (since **--changed-since** revision if set, "
+    "otherwise since HEAD).",
+)
 @click.option(
     "--ignore-git-dir",
     is_flag=True,
@@ -338,6 +421,25 @@ def generate_config(global_config: config_module.MainConfig):
     "Return code 1 means that at least 1 file would change. Any internal error will overwrite this status.",
     show_default=True,
 )
+@click.option(
+    "--fail-fast",
+    is_flag=True,
+    help="Stop on the first file that would be reformatted and print the name of the transformer that would change "
+    "it. The remaining files are not transformed. Can only be used with --check.",
+)
+@click.option(
+    "--git-rev",
+    default=None,
+    metavar="REV",
+    help="Check the source files from the git revision instead of the working tree, without checking them out. "
+    "Configuration files are read from the same revision. Implies --check and the files are never overwritten.",
+)
+@click.option(
+    "--git-index",
+    is_flag=True,
+    help="Check the source files staged in the git index instead of the working tree. Configuration files are read "
+    "from the index. Implies --check and the files are never overwritten.",
+)
 @click.option(
     "-s",
     "--spacecount",
@@ -400,6 +502,13 @@ def generate_config(global_config: config_module.MainConfig):
     type=int,
     help="Limit robotidy only to selected area. Line numbers start from 1.",
 )
+@click.option(
+    "--diff-against",
+    default=None,
+    metavar="REV",
+    help="Format only the lines changed since the git revision (including uncommitted and untracked changes). "
+    "Files without changes are skipped.",
+)
 @click.option(
     "--line-length",
     default=120,
@@ -469,6 +578,56 @@ def generate_config(global_config: config_module.MainConfig):
     help="Robotidy will rerun the transformations up to reruns times until the code stop changing.",
     show_default="0",
 )
+@click.option(
+    "--workers",
+    "-w",
+    type=config_module.OPTION_TYPES["workers"],
+    help="Number of processes used to format the files in parallel. Use 1 to disable parallel formatting. "
+    "Without this option, the files are formatted in parallel only if there are at least 16 of them.",
+    show_default="number of CPUs",
+)
+@click.option(
+    "--discovery-threads",
+    type=config_module.OPTION_TYPES["discovery_threads"],
+    help="Number of threads used to list the directories when searching for the source files. "
+    "It can speed up the search on slow (for example network) file systems.",
+    show_default="1",
+)
+@click.option(
+    "--discover",
+    type=config_module.OPTION_TYPES["discover"],
+    default="walk",
+    help="How the source files are found in the directories: **walk** the directories, or list the files tracked by "
+    "**git** (and the untracked files that are not ignored) with git ls-files. Exclusion patterns apply to both.",
+    show_default=True,
+)
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    help="Skip files that were not changed since the last run with the same configuration.",
+    show_default=True,
+)
+@click.option(
+    "--cache-dir",
+    type=config_module.OPTION_TYPES["cache_dir"],
+    default=None,
+    help=f"Directory where the cache is stored. Can be also set with {cache.CACHE_DIR_ENV} environment variable.",
+    show_default="user cache directory",
+)
+@click.option(
+    "--fsync",
+    type=config_module.OPTION_TYPES["fsync"],
+    default="none",
+    help="Flush the formatted files to the disk. With 'file', each file is flushed before it replaces the source "
+    "file. With 'batch', all formatted files are flushed at the end of the run, which is faster for many files.",
+    show_default=True,
+)
+@click.option(
+    "--daemon",
+    is_flag=True,
+    help="Start the daemon that keeps loaded configurations in memory and formats the files for the robotidy "
+    f"commands run in the meantime. Set {daemon.DISABLE_DAEMON_ENV} environment variable to not use the daemon.",
+)
 @skip.comments_option
 @skip.documentation_option
 @skip.return_values_option
@@ -493,8 +652,11 @@ def cli(ctx: click.Context, **kwargs):
     Full documentation available at <https://robotidy.readthedocs.io> .
     """
     print_deprecation_warning()
+    if kwargs.pop("daemon"):
+        daemon.serve(cache_dir=kwargs["cache_dir"])
+        sys.exit(0)
     cli_config = RawConfig.from_cli(ctx=ctx, **kwargs)
-    global_config = config_module.MainConfig(cli_config)
+    global_config = config_module.MainConfig(cli_config, config_cache=ctx.obj)
     global_config.validate_src_is_required()
     if global_config.default.list_transformers:
         print_transformers_list(global_config)
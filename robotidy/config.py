@@ -7,6 +7,7 @@ import re
 import sys
 from collections import namedtuple
 from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
 from typing import Pattern
 
@@ -17,10 +18,17 @@ except ImportError:
 
 import click
 from click.core import ParameterSource
+from robot.errors import DataError
 
-from robotidy import exceptions, files, skip
-from robotidy.transformers import TransformConfig, TransformConfigMap, convert_transform_config, load_transformers
-from robotidy.utils import misc
+from robotidy import cache, exceptions, files, skip, version
+from robotidy.transformers import (
+    TRANSFORMERS,
+    TransformConfig,
+    TransformConfigMap,
+    convert_transform_config,
+    load_transformers,
+)
+from robotidy.utils import archive, git, misc
 
 
 class FormattingConfig:
@@ -90,6 +98,24 @@ def csv_list_type(value: str | None) -> list[str]:
     return value.split(",")
 
 
+FSYNC_MODES = ("none", "file", "batch")
+# options validated with the same types in the cli and in the configuration file
+OPTION_TYPES = {
+    "workers": click.IntRange(min=1),
+    "discovery_threads": click.IntRange(min=1),
+    "discover": click.Choice(files.DISCOVERY_BACKENDS),
+    "cache_dir": click.Path(file_okay=False, dir_okay=True, writable=True, path_type=Path),
+    "fsync": click.Choice(FSYNC_MODES),
+}
+
+
+def validate_option_value(name: str, value):
+    try:
+        return OPTION_TYPES[name].convert(value, None, None)
+    except click.BadParameter as err:
+        raise click.BadParameter(err.message, param_hint=f"'{name}' in the configuration file") from None
+
+
 def convert_transformers_config(
     param_name: str,
     config: dict,
@@ -134,10 +160,15 @@ class RawConfig:
     exclude: Pattern = re.compile(files.DEFAULT_EXCLUDES)
     extend_exclude: Pattern = None
     skip_gitignore: bool = False
+    changed_since: str = None
+    staged: bool = False
     overwrite: bool = False
     diff: bool = False
     color: bool = True
     check: bool = False
+    fail_fast: bool = False
+    git_rev: str = None
+    git_index: bool = False
     spacecount: int = 4
     indent: int = None
     continuation_indent: int = None
@@ -148,6 +179,7 @@ class RawConfig:
     separator: str = "space"
     startline: int = None
     endline: int = None
+    diff_against: str = None
     line_length: int = 120
     list_transformers: str = ""
     generate_config: str = ""
@@ -157,6 +189,12 @@ class RawConfig:
     target_version: int = misc.ROBOT_VERSION.major
     language: list[str] = field(default_factory=list)
     reruns: int = 0
+    workers: int = None
+    discovery_threads: int = None
+    discover: str = "walk"
+    cache: bool = True
+    cache_dir: Path = None
+    fsync: str = "none"
     ignore_git_dir: bool = False
     skip_comments: bool = False
     skip_documentation: bool = False
@@ -206,6 +244,8 @@ class RawConfig:
                 parsed_config[key] = str_to_bool(value)
             elif key == "target_version":
                 parsed_config[key] = validate_target_version(value)
+            elif key in OPTION_TYPES:
+                parsed_config[key] = validate_option_value(key, value)
             elif key == "language":
                 parsed_config[key] = csv_list_type(value)
             elif value_type == "int":
@@ -242,24 +282,47 @@ class RawConfig:
 class MainConfig:
     """Main configuration file which contains default configuration and map of sources and their configurations."""
 
-    def __init__(self, cli_config: RawConfig):
+    def __init__(self, cli_config: RawConfig, config_cache: ConfigCache | None = None):
+        self.config_cache = config_cache
+        self.transformers_pool = TransformersPool() if config_cache is None else config_cache.transformers_pool
         self.loaded_configs = {}
-        self.default = self.load_config_from_option(cli_config)
-        self.default_loaded = Config.from_raw_config(self.default)
+        self.archives: dict[str, archive.ArchiveSource] = {}
+        self.default = self.load_config_from_option(self.set_git_source_mode(cli_config))
+        if self.default.fail_fast and not self.default.check:
+            raise click.UsageError("--fail-fast can only be used with --check")
+        self.default_loaded = self.load_config(self.default)
         self.sources = self.get_sources(self.default.src)
 
+    @staticmethod
+    def set_git_source_mode(cli_config: RawConfig) -> RawConfig:
+        """The files read from git are only checked: ``--check`` is enabled and the files are never overwritten."""
+        if not cli_config.git_rev and not cli_config.git_index:
+            return cli_config
+        return dataclasses.replace(
+            cli_config, check=True, overwrite=False, defined_in_cli=cli_config.defined_in_cli | {"check", "overwrite"}
+        )
+
+    def read_config_file(self, config_path: Path) -> dict:
+        if self.config_cache is None:
+            return files.read_pyproject_config(config_path)
+        return self.config_cache.read_config_file(config_path)
+
+    def load_config(self, raw_config: RawConfig) -> Config:
+        if self.config_cache is None:
+            return Config.from_raw_config(raw_config, self.transformers_pool)
+        return self.config_cache.get_config(raw_config)
+
     def validate_src_is_required(self):
         if self.sources or self.default.list_transformers or self.default.desc or self.default.generate_config:
             return
         print("No source path provided. Run robotidy --help to see how to use robotidy")
         sys.exit(1)
 
-    @staticmethod
-    def load_config_from_option(cli_config: RawConfig) -> RawConfig:
+    def load_config_from_option(self, cli_config: RawConfig) -> RawConfig:
         """If there is config path passed from cli, load it and overwrite default config."""
         if cli_config.config:
             config_path = Path(cli_config.config)
-            config_file = files.read_pyproject_config(config_path)
+            config_file = self.read_config_file(config_path)
             cli_config = cli_config.from_config_file(config_file, config_path)
         return cli_config
 
@@ -274,28 +337,113 @@ class MainConfig:
         config_path = files.find_source_config_file(src, self.default.ignore_git_dir)
         if not config_path:
             return None
-        config = files.read_pyproject_config(config_path)
+        config = self.read_config_file(config_path)
         if not config or "src" not in config:
             return None
         raw_config = self.default.from_config_file(config, config_path)
-        loaded_config = Config.from_raw_config(raw_config)
+        loaded_config = self.load_config(raw_config)
         self.loaded_configs[str(loaded_config.config_directory)] = loaded_config
         return tuple(config["src"])
 
     def get_sources_with_configs(self):
+        if self.git_source is not None:
+            yield from self.get_git_sources_with_configs()
+            return
         sources = files.get_paths(
             self.sources,
             self.default.exclude,
             self.default.extend_exclude,
             self.default.skip_gitignore,
+            self.default.discovery_threads,
+            self.get_changed_files(),
+            self.default.discover,
         )
         for source in sources:
-            if self.default.config:
-                loaded_config = self.default_loaded
-            else:
-                src = Path(".").resolve() if source == "-" else source
-                loaded_config = self.get_config_for_source(src)
-            yield SourceAndConfig(source, loaded_config)
+            if self.changed_lines is not None and self.get_changed_path(source) is None:
+                continue
+            if source != "-" and archive.is_archive(source):
+                yield from self.get_archive_sources_with_configs(source)
+                continue
+            yield SourceAndConfig(source, self.get_config_for(source))
+
+    def get_archive_sources_with_configs(self, path: Path):
+        """
+        Yield the source files read from the zip or tar archive. The configuration is the same for all of them. The
+        archive is rewritten with the formatted files (see ``archive.ArchiveSource``) unless ``--check`` or
+        ``--output`` is used.
+        """
+        config = self.get_config_for_source(path)
+        rewrite = config.overwrite and not config.output
+        archive_source = archive.ArchiveSource(path, files.INCLUDE_EXT, rewrite, self.default.fsync != "none")
+        self.archives[str(path)] = archive_source
+        try:
+            for source in archive_source:
+                yield SourceAndConfig(source, config)
+        except DataError as err:
+            click.echo(f"{err}\nSkipping archive", err=True)
+
+    @cached_property
+    def git_source(self) -> git.GitSource | None:
+        """Git revision (``--git-rev``) or the index (``--git-index``) the source files are read from."""
+        if not self.default.git_rev and not self.default.git_index:
+            return None
+        return git.GitSource(self.default.git_rev)
+
+    def get_worker_git_source(self) -> git.GitSource | None:
+        """Return the git source with all configuration files read, to be copied to the worker processes."""
+        if self.git_source is None:
+            return None
+        with self.git_source.reader:
+            self.git_source.read_configs(files.CONFIG_NAMES)
+        return self.git_source
+
+    def get_git_sources_with_configs(self):
+        paths = files.get_git_paths(self.sources, self.git_source, self.default.exclude, self.default.extend_exclude)
+        with self.git_source.reader:
+            for path in paths:
+                source = self.git_source.read(path)
+                if source is not None:
+                    yield SourceAndConfig(source, self.get_config_for(source))
+
+    def get_changed_files(self) -> list[Path] | None:
+        """Files changed since the ``--changed-since`` revision (or staged with ``--staged``), read from git."""
+        if not self.default.changed_since and not self.default.staged:
+            return None
+        return git.get_changed_files(self.default.changed_since, self.default.staged)
+
+    @cached_property
+    def changed_lines(self) -> git.ChangedLines | None:
+        """Lines changed since the ``--diff-against`` revision. Only the changed files are transformed."""
+        if not self.default.diff_against:
+            return None
+        return git.get_changed_lines(self.default.diff_against)
+
+    def get_changed_path(self, source) -> Path | None:
+        """Return the path of the source as stored in ``changed_lines``, or ``None`` if the source was not changed."""
+        if source == "-":
+            return None
+        if source in self.changed_lines:
+            return source
+        source = Path(source).resolve()
+        return source if source in self.changed_lines else None
+
+    def get_lines_ranges(self, source) -> git.LinesRanges | None:
+        """Return the lines that can be formatted in the source, or ``None`` if all lines can be formatted."""
+        if self.changed_lines is None:
+            return None
+        path = self.get_changed_path(source)
+        return self.changed_lines[path] if path is not None else None
+
+    def get_config_for(self, source) -> "Config":
+        """Return configuration for the source path, ``-`` (stdin) or the source file read from git or the archive."""
+        if self.default.config:
+            return self.default_loaded
+        if isinstance(source, archive.ArchiveSourceFile):
+            return self.get_config_for_source(Path(source.archive))
+        if isinstance(source, git.GitSourceFile):
+            return self.get_config_for_git_path(source.git_path)
+        src = Path(".").resolve() if source == "-" else source
+        return self.get_config_for_source(src)
 
     def get_config_for_source(self, source: Path):
         config_path = files.find_source_config_file(source, self.default.ignore_git_dir)
@@ -303,13 +451,172 @@ class MainConfig:
             return self.default_loaded
         if str(config_path.parent) in self.loaded_configs:
             return self.loaded_configs[str(config_path.parent)]
-        config_file = files.read_pyproject_config(config_path)
+        config_file = self.read_config_file(config_path)
+        raw_config = self.default.from_config_file(config_file, config_path)
+        loaded_config = self.load_config(raw_config)
+        self.loaded_configs[str(loaded_config.config_directory)] = loaded_config
+        return loaded_config
+
+    def get_config_for_git_path(self, path: str):
+        """Return configuration for the file from git. The configuration file is read from the same revision."""
+        git_config_path = self.git_source.find_config_file(path, files.CONFIG_NAMES)
+        if git_config_path is None:
+            return self.default_loaded
+        config_path = self.git_source.root.joinpath(*git_config_path.split("/"))
+        if str(config_path.parent) in self.loaded_configs:
+            return self.loaded_configs[str(config_path.parent)]
+        content = self.git_source.read_config(git_config_path) or b""
+        config_file = files.read_pyproject_config(config_path, content)
         raw_config = self.default.from_config_file(config_file, config_path)
-        loaded_config = Config.from_raw_config(raw_config)
+        loaded_config = self.load_config(raw_config)
         self.loaded_configs[str(loaded_config.config_directory)] = loaded_config
         return loaded_config
 
 
+def log_loaded_config(raw_config: RawConfig):
+    if raw_config.verbose and raw_config.config_path:
+        click.echo(f"Loaded configuration from {raw_config.config_path}")
+
+
+class ConfigCache:
+    """
+    Configurations reused between the runs in the same process (for example by ``robotidy --daemon``).
+
+    Configuration files are read again only if they were modified. Loaded configurations (with the transformer
+    instances) are reused if all the options, including the ones read from the configuration files, are the same.
+    Custom transformer modules are imported only once, so their modifications are not used until the process restarts.
+    """
+
+    # options that are not used by the loaded configuration
+    IGNORED_OPTIONS = (
+        "src",
+        "exclude",
+        "extend_exclude",
+        "skip_gitignore",
+        "changed_since",
+        "staged",
+        "config",
+        "ignore_git_dir",
+        "list_transformers",
+        "generate_config",
+        "desc",
+        "workers",
+        "discovery_threads",
+        "discover",
+        "cache",
+        "cache_dir",
+        "fsync",
+        "fail_fast",
+        "git_rev",
+        "git_index",
+        "diff_against",
+        "defined_in_cli",
+        "defined_in_config",
+    )
+
+    def __init__(self):
+        self.config_files: dict[str, tuple[tuple[int, int], dict]] = {}
+        self.configs: dict[str, Config] = {}
+        self.transformers_pool = TransformersPool()
+
+    def read_config_file(self, config_path: Path) -> dict:
+        try:
+            stat = config_path.stat()
+        except OSError:
+            return files.read_pyproject_config(config_path)
+        modified = (stat.st_mtime_ns, stat.st_size)
+        key = str(config_path.resolve())
+        cached = self.config_files.get(key)
+        if cached is None or cached[0] != modified:
+            cached = (modified, files.read_pyproject_config(config_path))
+            self.config_files[key] = cached
+        return copy.deepcopy(cached[1])
+
+    def get_config_key(self, raw_config: RawConfig) -> str:
+        options = [
+            getattr(raw_config, option.name)
+            for option in dataclasses.fields(raw_config)
+            if option.name not in self.IGNORED_OPTIONS
+        ]
+        # color mode of the configuration also depends on the environment of the client
+        return repr([*options, "NO_COLOR" in os.environ])
+
+    def get_config(self, raw_config: RawConfig) -> Config:
+        key = self.get_config_key(raw_config)
+        if key not in self.configs:
+            self.configs[key] = Config.from_raw_config(raw_config, self.transformers_pool)
+        else:
+            log_loaded_config(raw_config)
+        return self.configs[key]
+
+
+class TransformersPool:
+    """
+    Transformer instances shared between the configurations.
+
+    In the projects with many configuration files, most of the directories end up with the same transformers setup.
+    Transformers are imported and created only once for each distinct setup: the transformers with their arguments,
+    the skip and formatting options, the target version and the languages. Transformers read the options of the other
+    transformers from the same configuration (such as ``SplitTooLongLine`` line length), so the whole list of the
+    transformers is shared and not the single instances.
+    """
+
+    def __init__(self):
+        self.transformers: dict[str, tuple[TransformConfigMap, list, dict]] = {}
+
+    @staticmethod
+    def get_key(
+        transformers_config: TransformConfigMap, force_order, target_version, skip, formatting, language
+    ) -> str:
+        transformers = list(transformers_config.transformers.values())
+        custom = any(transformer.name not in TRANSFORMERS for transformer in transformers)
+        return repr(
+            [
+                transformers,
+                force_order,
+                target_version,
+                sorted(skip.__dict__.items()) if skip else None,
+                sorted(formatting.__dict__.items()),
+                language,
+                os.getcwd() if custom else None,  # custom transformers paths are relative to the working directory
+            ]
+        )
+
+    def get_transformers(
+        self, transformers_config: TransformConfigMap, force_order, target_version, skip, formatting, language
+    ) -> tuple[TransformConfigMap, list, dict]:
+        """
+        Return the transformers configuration (completed with the default transformers), the list of transformer
+        instances and the lookup of them by name.
+        """
+        key = self.get_key(transformers_config, force_order, target_version, skip, formatting, language)
+        if key not in self.transformers:
+            self.transformers[key] = self.load_transformers(
+                transformers_config, force_order, target_version, skip, formatting
+            )
+        return self.transformers[key]
+
+    @staticmethod
+    def load_transformers(
+        transformers_config: TransformConfigMap, force_order, target_version, skip, formatting
+    ) -> tuple[TransformConfigMap, list, dict]:
+        transformers = []
+        transformers_lookup = dict()
+        containers = load_transformers(
+            transformers_config,
+            force_order=force_order,
+            target_version=target_version,
+            skip=skip,
+        )
+        for transformer in containers:
+            # inject global settings TODO: handle it better
+            setattr(transformer.instance, "formatting_config", formatting)
+            setattr(transformer.instance, "transformers", transformers_lookup)
+            transformers.append(transformer.instance)
+            transformers_lookup[transformer.name] = transformer.instance
+        return transformers_config, transformers, transformers_lookup
+
+
 class Config:
     """Configuration after loading dynamic attributes like transformer list."""
 
@@ -329,7 +636,10 @@ class Config:
         language: list[str] | None,
         reruns: int,
         config_path: Path | None,
+        transformers_pool: TransformersPool | None = None,
     ):
+        if transformers_pool is None:
+            transformers_pool = TransformersPool()
         self.formatting = formatting
         self.overwrite = self.set_overwrite_mode(overwrite, check)
         self.show_diff = show_diff
@@ -340,16 +650,62 @@ class Config:
         self.reruns = reruns
         self.config_directory = config_path.parent if config_path else None
         self.language = self.get_languages(language)
-        self.transformers = []
-        self.transformers_lookup = dict()
-        self.transformers_config = transformers_config
-        self.load_transformers(transformers_config, force_order, target_version, skip)
+        self.transformers_config, self.transformers, self.transformers_lookup = self.load_transformers(
+            transformers_pool, transformers_config, force_order, target_version, skip, language
+        )
+        self.fingerprint = self.get_fingerprint(skip, target_version, language)
+
+    def get_fingerprint(self, skip_config, target_version: int, language: list[str] | None) -> str:
+        """Return hash of all options that affect the formatted code. It is used as a key for the cache."""
+        transformers = []
+        for name, transformer in self.transformers_lookup.items():
+            module = sys.modules.get(transformer.__class__.__module__)
+            module_path = getattr(module, "__file__", None)
+            if module_path and not transformer.__class__.__module__.startswith("robotidy."):
+                modified = os.stat(module_path).st_mtime_ns  # external transformer code may change between the runs
+            else:
+                modified = None
+            transformers.append((name, modified))
+        transformers_args = sorted(
+            (name, sorted(config.args.items())) for name, config in self.transformers_config.transformers.items()
+        )
+        return cache.get_fingerprint(
+            version.__version__,
+            misc.ROBOT_VERSION.major,
+            misc.ROBOT_VERSION.minor,
+            misc.ROBOT_VERSION.fix,
+            transformers,
+            transformers_args,
+            sorted(self.formatting.__dict__.items()),
+            sorted(skip_config.__dict__.items()) if skip_config else None,
+            target_version,
+            language,
+            self.reruns,
+        )
 
     @staticmethod
-    def get_languages(lang):
+    def get_languages(lang) -> tuple | None:
+        """
+        Return the configured languages. ``Languages`` object is changed when the file with the ``Language:`` header is
+        parsed, so only the loaded (immutable) languages are stored and ``Languages`` is created for every file.
+        """
         if Languages is None:
             return None
-        return Languages(lang)
+        return tuple(Languages(lang).languages)
+
+    def get_file_languages(self, model=None):
+        """
+        Return new languages for parsing a single file, so languages of the file are not shared with other files.
+        English is added the same way as in the configured languages, together with the singular English headers.
+
+        If the already parsed ``model`` is given, the languages from its ``Language:`` header are also added.
+        """
+        if self.language is None:
+            return None
+        languages = Languages(self.language)
+        for language in getattr(model, "languages", ()):
+            languages.add_language(language)
+        return languages
 
     @staticmethod
     def set_overwrite_mode(overwrite: bool, check: bool) -> bool:
@@ -364,7 +720,7 @@ class Config:
         return "NO_COLOR" not in os.environ
 
     @classmethod
-    def from_raw_config(cls, raw_config: "RawConfig"):
+    def from_raw_config(cls, raw_config: "RawConfig", transformers_pool: TransformersPool | None = None):
         skip_config = skip.SkipConfig(
             documentation=raw_config.skip_documentation,
             return_values=raw_config.skip_return_values,
@@ -398,8 +754,7 @@ class Config:
             raw_config.transform, raw_config.custom_transformers, raw_config.configure
         )
 
-        if raw_config.verbose and raw_config.config_path:
-            click.echo(f"Loaded configuration from {raw_config.config_path}")
+        log_loaded_config(raw_config)
 
         return cls(
             formatting=formatting,
@@ -416,22 +771,21 @@ class Config:
             language=raw_config.language,
             reruns=raw_config.reruns,
             config_path=raw_config.config_path,
+            transformers_pool=transformers_pool,
         )
 
-    def load_transformers(self, transformers_config: TransformConfigMap, force_order, target_version, skip):
+    def load_transformers(
+        self,
+        transformers_pool: TransformersPool,
+        transformers_config: TransformConfigMap,
+        force_order,
+        target_version,
+        skip,
+        language,
+    ) -> tuple[TransformConfigMap, list, dict]:
         # Workaround to pass configuration to transformer before the instance is created
         if "GenerateDocumentation" in transformers_config.transformers:
             transformers_config.transformers["GenerateDocumentation"].args["template_directory"] = self.config_directory
-        transformers = load_transformers(
-            transformers_config,
-            force_order=force_order,
-            target_version=target_version,
-            skip=skip,
+        return transformers_pool.get_transformers(
+            transformers_config, force_order, target_version, skip, self.formatting, language
         )
-        for transformer in transformers:
-            # inject global settings TODO: handle it better
-            setattr(transformer.instance, "formatting_config", self.formatting)
-            setattr(transformer.instance, "transformers", self.transformers_lookup)
-            setattr(transformer.instance, "languages", self.language)
-            self.transformers.append(transformer.instance)
-            self.transformers_lookup[transformer.name] = transformer.instance
@@ -0,0 +1,322 @@
+"""
+Formatting daemon (``robotidy --daemon``) and its client.
+
+The daemon keeps Robotidy modules imported and loaded configurations (with the transformer instances) in memory, and
+runs the commands sent by the clients in its own process. It listens on the localhost HTTP port, which is stored
+together with the access token in the state file in the cache directory. The cache directory is taken from the
+``--cache-dir`` option or ``ROBOTIDY_CACHE_DIR`` environment variable of the daemon and the client (the cache directory
+from the configuration file is not used, since the client does not read the configuration files).
+
+If the state file exists, the ``robotidy`` command sends its arguments, working directory, standard input, the
+environment variables that affect the output and whether the output is displayed in the terminal to the daemon and
+prints the result. If the daemon is not available, the command is run as usual.
+
+This module is imported by the ``robotidy`` entry point before anything else, so only the standard library modules
+are imported on the module level.
+"""
+
+from __future__ import annotations
+
+import http.client
+import io
+import json
+import os
+import secrets
+import signal
+import sys
+import traceback
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+from robotidy import cache, version
+
+STATE_FILE = "daemon.json"
+DISABLE_DAEMON_ENV = "ROBOTIDY_NO_DAEMON"
+TOKEN_HEADER = "X-Robotidy-Token"
+CONNECT_TIMEOUT = 1.0
+CLIENT_ENV = ("NO_COLOR", "FORCE_COLOR", "TERM", "COLORTERM", cache.CACHE_DIR_ENV)
+
+
+def get_state_path(cache_dir: str | Path | None = None) -> Path:
+    return cache.get_cache_dir(cache_dir) / STATE_FILE
+
+
+def get_cache_dir_option(args: list[str]) -> str | None:
+    """Return the value of the last ``--cache-dir`` option from the command line arguments."""
+    cache_dir = None
+    for index, arg in enumerate(args):
+        if arg == "--":
+            break
+        if arg == "--cache-dir" and index + 1 < len(args):
+            cache_dir = args[index + 1]
+        elif arg.startswith("--cache-dir="):
+            cache_dir = arg[len("--cache-dir=") :]
+    return cache_dir
+
+
+def get_environment() -> dict:
+    """Daemon can be only used by the clients with the same Robotidy version and Python environment."""
+    return {"version": version.__version__, "prefix": sys.prefix}
+
+
+def read_state(cache_dir: str | Path | None = None) -> dict | None:
+    try:
+        with open(get_state_path(cache_dir), encoding="utf-8") as fp:
+            state = json.load(fp)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("environment") != get_environment():
+        return None
+    return state
+
+
+def write_state(state: dict, cache_dir: str | Path | None = None):
+    state_path = get_state_path(cache_dir)
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    # state file contains the access token, so it is only readable by the owner
+    fd = os.open(state_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as fp:
+        json.dump(state, fp)
+
+
+def remove_state(token: str, cache_dir: str | Path | None = None):
+    """Remove the state file if it was not replaced by another daemon."""
+    state = read_state(cache_dir)
+    if state is not None and state.get("token") == token:
+        try:
+            get_state_path(cache_dir).unlink()
+        except OSError:
+            pass
+
+
+class ClientOutput(io.StringIO):
+    """Captured output of the command, which is displayed in the terminal if the client output is."""
+
+    def __init__(self, tty: bool = False):
+        super().__init__()
+        self.tty = tty
+
+    def isatty(self) -> bool:
+        return self.tty
+
+
+def is_tty(stream) -> bool:
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def get_client_env() -> dict:
+    """Environment variables of the client that affect the output (``None`` if the variable is not set)."""
+    return {name: os.environ.get(name) for name in CLIENT_ENV}
+
+
+def set_env(env: dict):
+    for name, value in env.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+
+@contextmanager
+def client_environment(env: dict):
+    """Use the client environment variables while the command is run, and restore the daemon ones afterwards."""
+    env = {name: value for name, value in env.items() if name in CLIENT_ENV}
+    previous_env = {name: os.environ.get(name) for name in env}
+    set_env(env)
+    try:
+        yield
+    finally:
+        set_env(previous_env)
+
+
+def run_command(
+    args: list[str], cwd: str, stdin: str | None, config_cache, env: dict | None = None, tty: dict | None = None
+) -> dict:
+    """
+    Run robotidy command in the current process and return its exit code and output. ``env`` contains the client
+    environment variables and ``tty`` tells if the client ``stdout`` and ``stderr`` are displayed in the terminal.
+
+    The command changes the process wide working directory, ``sys.stdin``, ``sys.stdout``, ``sys.stderr`` and
+    environment variables while it is run, so only one command can be run at a time (see ``DaemonServer``).
+    """
+    import click
+
+    from robotidy import files
+    from robotidy.cli import cli
+    from robotidy.rich_console import get_console
+
+    tty = tty or {}
+    stdout, stderr = ClientOutput(tty.get("stdout", False)), ClientOutput(tty.get("stderr", False))
+    previous_cwd, previous_stdin = os.getcwd(), sys.stdin
+    exit_code = 0
+    # file system could change since the last command. Imported modules of the custom transformers are not reloaded,
+    # and the loaded configurations are reused when the options are the same, so the daemon needs to be restarted
+    # after the custom transformers are modified
+    files.find_source_config_file.cache_clear()
+    files.find_project_root.cache_clear()
+    files.get_gitignore.cache_clear()
+    # console detects the colors from the output of the client
+    get_console.cache_clear()
+    try:
+        os.chdir(cwd)
+        sys.stdin = io.StringIO(stdin or "")
+        with client_environment(env or {}), redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                exit_code = cli.main(
+                    args=args,
+                    prog_name="robotidy",
+                    standalone_mode=False,
+                    obj=config_cache,
+                    default_map={"workers": 1},  # formatting in the daemon process is faster than starting new ones
+                )
+            except SystemExit as err:
+                exit_code = err.code
+            except click.exceptions.Exit as err:
+                exit_code = err.exit_code
+            except click.ClickException as err:
+                err.show()
+                exit_code = err.exit_code
+            except click.Abort:
+                exit_code = 1
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+    finally:
+        os.chdir(previous_cwd)
+        sys.stdin = previous_stdin
+    if exit_code is None:
+        exit_code = 0
+    elif not isinstance(exit_code, int):
+        stderr.write(f"{exit_code}\n")
+        exit_code = 1
+    return {"exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    server: DaemonServer
+
+    def do_POST(self):  # noqa
+        if self.headers.get(TOKEN_HEADER) != self.server.token:
+            self.send_error(403)
+            return
+        if self.path != "/run":
+            self.send_error(404)
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            args, cwd, stdin = request["args"], request["cwd"], request.get("stdin")
+            env, tty = dict(request.get("env", {})), dict(request.get("tty", {}))
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400)
+            return
+        if request.get("environment") != get_environment():
+            self.send_error(409, "Client uses different Robotidy version or Python environment")
+            return
+        if "--daemon" in args:
+            self.send_error(400, "Daemon cannot be started by the daemon")
+            return
+        response = json.dumps(run_command(args, cwd, stdin, self.server.config_cache, env, tty)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):  # noqa
+        pass
+
+
+class DaemonServer(HTTPServer):
+    """
+    Localhost HTTP server that handles the requests one by one in the main thread.
+
+    The requests must not be handled in multiple threads (the server must not be combined with ``ThreadingMixIn``),
+    since ``run_command`` changes the process wide working directory, standard streams and environment variables for
+    the time of the command.
+    """
+
+    def __init__(self, port: int = 0):
+        from robotidy.config import ConfigCache
+
+        super().__init__(("127.0.0.1", port), DaemonRequestHandler)
+        self.token = secrets.token_hex(16)
+        self.config_cache = ConfigCache()
+
+    def get_state(self) -> dict:
+        return {
+            "host": self.server_address[0],
+            "port": self.server_port,
+            "token": self.token,
+            "pid": os.getpid(),
+            "environment": get_environment(),
+        }
+
+
+def serve(port: int = 0, cache_dir: str | Path | None = None):
+    server = DaemonServer(port)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # remove the state file when terminated
+    write_state(server.get_state(), cache_dir)
+    print(f"Robotidy daemon is listening on http://127.0.0.1:{server.server_port} . Press Ctrl+C to stop it.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        remove_state(server.token, cache_dir)
+
+
+def run_in_daemon(args: list[str]) -> int | None:
+    """Run the command in the daemon and return its exit code or ``None`` if the daemon is not available."""
+    state = read_state(get_cache_dir_option(args))
+    if state is None:
+        return None
+    stdin = sys.stdin.read() if "-" in args else None
+    request = {
+        "args": args,
+        "cwd": os.getcwd(),
+        "stdin": stdin,
+        "env": get_client_env(),
+        "tty": {"stdout": is_tty(sys.stdout), "stderr": is_tty(sys.stderr)},
+        "environment": get_environment(),
+    }
+    connection = http.client.HTTPConnection(state["host"], state["port"], timeout=CONNECT_TIMEOUT)
+    try:
+        connection.connect()
+        connection.sock.settimeout(None)  # formatting can take longer than connecting
+        connection.request(
+            "POST",
+            "/run",
+            body=json.dumps(request).encode("utf-8"),
+            headers={TOKEN_HEADER: state["token"], "Content-Type": "application/json"},
+        )
+        response = connection.getresponse()
+        result = json.loads(response.read()) if response.status == 200 else None
+    except (OSError, ValueError, http.client.HTTPException):
+        result = None
+    finally:
+        connection.close()
+    if result is None:
+        if stdin is not None:
+            sys.stdin = io.StringIO(stdin)
+        return None
+    sys.stdout.write(result["stdout"])
+    sys.stdout.flush()
+    sys.stderr.write(result["stderr"])
+    return result["exit_code"]
+
+
+def main():
+    """Entry point of the ``robotidy`` command."""
+    args = sys.argv[1:]
+    if "--daemon" not in args and not os.environ.get(DISABLE_DAEMON_ENV):
+        exit_code = run_in_daemon(args)
+        if exit_code is not None:
+            sys.exit(exit_code)
+    from robotidy.cli import cli
+
+    cli()
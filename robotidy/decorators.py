@@ -1,9 +1,6 @@
 import functools
 
-try:
-    import rich_click as click
-except ImportError:
-    import click
+import click
 
 from robotidy import exceptions
 
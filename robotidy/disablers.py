@@ -1,10 +1,15 @@
+import ast
 import functools
 import re
-from typing import Dict, List, Optional
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple, Union
 
-from robot.api.parsing import Comment, CommentSection, ModelVisitor, Token
+from robot.api.parsing import Comment, CommentSection, EmptyLine, ModelVisitor, Token
+from robot.parsing.model import Statement
 
 ALL_TRANSFORMERS = "all"
+DISABLER_MARKER = "robotidy:"  # every disabler comment contains it
 
 
 def skip_if_disabled(func):
@@ -20,6 +25,7 @@ def skip_if_disabled(func):
             return node
         return func(self, node, *args, **kwargs)
 
+    wrapper.skips_disabled = True
     return wrapper
 
 
@@ -43,20 +49,75 @@ def skip_section_if_disabled(func):
 
     @functools.wraps(func)
     def wrapper(self, node, *args, **kwargs):
-        class_name = self.__class__.__name__
-        if self.disablers.is_node_disabled(class_name, node):
+        if is_section_skipped(self, node):
             return node
-        if self.disablers.is_header_disabled(class_name, node.lineno):
-            return node
-        if self.skip:
-            section_name = get_section_name_from_header_type(node)
-            if self.skip.section(section_name):
-                return node
         return func(self, node, *args, **kwargs)
 
+    wrapper.skips_disabled = True
+    wrapper.skips_section = True
     return wrapper
 
 
+def is_section_skipped(transformer, node) -> bool:
+    """Check if the section is disabled or skipped for the transformer (the checks of ``skip_section_if_disabled``)."""
+    class_name = transformer.__class__.__name__
+    if transformer.disablers.is_node_disabled(class_name, node):
+        return True
+    if transformer.disablers.is_header_disabled(class_name, node.lineno):
+        return True
+    return bool(transformer.skip and transformer.skip.section(get_section_name_from_header_type(node)))
+
+
+def find_statement(node, last: bool = False, positioned: bool = False) -> Optional[Statement]:
+    """
+    Return the first (or the last) statement of the node. Only the children on the path to the statement are visited,
+    instead of the whole block as in ``lineno`` and ``end_lineno`` of the block.
+
+    With ``positioned=True``, the empty lines added by the transformers (without the position in the source) are
+    ignored.
+    """
+    if isinstance(node, Statement):
+        if positioned and isinstance(node, EmptyLine) and not is_positioned(node):
+            return None
+        return node
+    fields = reversed(node._fields) if last else node._fields
+    for field in fields:
+        value = getattr(node, field, None)
+        children = value if isinstance(value, list) else [value]
+        for child in reversed(children) if last else children:
+            if isinstance(child, ast.AST):
+                statement = find_statement(child, last, positioned)
+                if statement is not None:
+                    return statement
+    return None
+
+
+def is_positioned(node: Statement) -> bool:
+    return 0 < node.lineno <= node.end_lineno
+
+
+def is_block(node) -> bool:
+    """
+    Check if the node is a block (section, test, keyword or control structure) other than the whole file. The node is
+    tested by its shape because ``Block`` base class is not available before Robot Framework 6.1.
+    """
+    return not isinstance(node, Statement) and isinstance(getattr(node, "body", None), list)
+
+
+def get_lineno(node) -> int:
+    if not is_block(node):
+        return node.lineno
+    statement = find_statement(node)
+    return statement.lineno if statement else -1
+
+
+def get_end_lineno(node) -> int:
+    if not is_block(node):
+        return node.end_lineno
+    statement = find_statement(node, last=True)
+    return statement.end_lineno if statement else -1
+
+
 def is_line_start(node):
     for token in node.tokens:
         if token.type == Token.SEPARATOR:
@@ -65,17 +126,55 @@ def is_line_start(node):
     return False
 
 
+class LinesIndex:
+    """
+    Index of the disabled lines ranges. The ranges are sorted by the start line and the furthest end line is stored for
+    every prefix of them, so the ranges containing (or overlapping) the given lines are found with one bisect.
+    """
+
+    def __init__(self, lines: List[Tuple[int, int]]):
+        lines = sorted(lines)
+        self.starts = [start_line for start_line, _ in lines]
+        self.max_ends = list(accumulate((end_line for _, end_line in lines), max))
+
+    def __bool__(self):
+        return bool(self.starts)
+
+    def contains(self, lineno: int, end_lineno: int) -> bool:
+        """Check if any range contains all the lines."""
+        index = bisect_right(self.starts, lineno)
+        return index > 0 and self.max_ends[index - 1] >= end_lineno
+
+    def overlaps(self, lineno: int, end_lineno: int) -> bool:
+        """Check if any range contains any of the lines."""
+        index = bisect_right(self.starts, end_lineno)
+        return index > 0 and self.max_ends[index - 1] >= lineno
+
+    def is_node_disabled(self, node, full_match=True) -> bool:
+        if not node or not self.starts:
+            return False
+        lineno = get_lineno(node)
+        end_lineno = max(lineno, get_end_lineno(node))  # workaround for transformers setting -1 as end_lineno
+        if full_match:
+            return self.contains(lineno, end_lineno)
+        return self.overlaps(lineno, end_lineno)
+
+
 class DisablersInFile:
     def __init__(
         self,
         start_line: Optional[int],
         end_line: Optional[int],
         file_end: Optional[int] = None,
+        lines_ranges: Optional[List[Tuple[int, int]]] = None,
     ):
         self.start_line = start_line
         self.end_line = end_line
         self.file_end = file_end
-        self.disablers = {ALL_TRANSFORMERS: DisabledLines(start_line, end_line, file_end)}
+        self.lines_ranges = lines_ranges
+        self.disablers = {ALL_TRANSFORMERS: DisabledLines(start_line, end_line, file_end, lines_ranges)}
+        self.nothing_disabled = True  # shortcut for the checks in the files without any disabled lines
+        self.indexes: Dict[str, LinesIndex] = {}  # lines disabled for all transformers and for the given transformer
 
     @property
     def file_disabled(self):
@@ -83,12 +182,31 @@ class DisablersInFile:
 
     def parse_global_disablers(self):
         self.disablers[ALL_TRANSFORMERS].parse_global_disablers()
+        if self.disablers[ALL_TRANSFORMERS].lines:
+            self.nothing_disabled = False
+            self.indexes = {}
 
     def sort_disablers(self):
         for disabled_lines in self.disablers.values():
             disabled_lines.sort_disablers()
+        self.indexes = {name: self.build_index(name) for name in self.disablers}
+
+    def build_index(self, transformer_name: str) -> LinesIndex:
+        """Build the index of the lines disabled for all transformers combined with the lines of the transformer."""
+        disabled_for_all = self.disablers[ALL_TRANSFORMERS]
+        if transformer_name == ALL_TRANSFORMERS or transformer_name not in self.disablers:
+            return disabled_for_all.index
+        return LinesIndex(disabled_for_all.lines + self.disablers[transformer_name].lines)
+
+    def get_index(self, transformer_name: str) -> LinesIndex:
+        index = self.indexes.get(transformer_name)
+        if index is None:
+            index = self.indexes[transformer_name] = self.build_index(transformer_name)
+        return index
 
     def add_disabler(self, transformer: str, start_line: int, end_line: int, file_level: bool = False):
+        self.nothing_disabled = False
+        self.indexes = {}
         if transformer not in self.disablers:
             self.disablers[transformer] = DisabledLines(self.start_line, self.end_line, self.file_end)
         self.disablers[transformer].add_disabler(start_line, end_line)
@@ -96,11 +214,14 @@ class DisablersInFile:
             self.disablers[transformer].disabled_whole = file_level
 
     def add_disabled_header(self, transformer: str, lineno):
+        self.nothing_disabled = False
         if transformer not in self.disablers:
             self.disablers[transformer] = DisabledLines(self.start_line, self.end_line, self.file_end)
         self.disablers[transformer].add_disabled_header(lineno)
 
     def is_disabled_in_file(self, transformer_name: str) -> bool:
+        if self.nothing_disabled:
+            return False
         if self.disablers[ALL_TRANSFORMERS].disabled_whole:
             return True
         if transformer_name not in self.disablers:
@@ -108,6 +229,8 @@ class DisablersInFile:
         return self.disablers[transformer_name].disabled_whole
 
     def is_header_disabled(self, transformer_name: str, line) -> bool:
+        if self.nothing_disabled:
+            return False
         if self.disablers[ALL_TRANSFORMERS].is_header_disabled(line):
             return True
         if transformer_name not in self.disablers:
@@ -115,67 +238,111 @@ class DisablersInFile:
         return self.disablers[transformer_name].is_header_disabled(line)
 
     def is_node_disabled(self, transformer_name: str, node, full_match=True) -> bool:
-        if self.disablers[ALL_TRANSFORMERS].is_node_disabled(node, full_match):
-            return True
-        if transformer_name not in self.disablers:
+        if self.nothing_disabled:
+            return False
+        return self.get_index(transformer_name).is_node_disabled(node, full_match)
+
+    def has_disabled_lines(self) -> bool:
+        """Check if any lines are disabled for all transformers, including the lines outside of selected range."""
+        return bool(self.disablers[ALL_TRANSFORMERS].lines)
+
+    def is_block_disabled_for_all(self, node) -> bool:
+        """
+        Check if all statements of the block are disabled for all transformers. Unlike in ``is_node_disabled``, the
+        empty lines added to the end of the block by the transformers do not make the block look shorter. If the first
+        or the last statement was rebuilt without the position in the source, the block is not considered disabled.
+        """
+        first = find_statement(node)
+        if first is None or not is_positioned(first):
+            return False
+        last = find_statement(node, last=True, positioned=True)
+        if last is None or not is_positioned(last):
             return False
-        return self.disablers[transformer_name].is_node_disabled(node, full_match)
+        return self.get_index(ALL_TRANSFORMERS).contains(first.lineno, last.end_lineno)
 
 
 class DisabledLines:
-    def __init__(self, start_line, end_line, file_end):
+    def __init__(self, start_line, end_line, file_end, lines_ranges=None):
         self.start_line = start_line
         self.end_line = end_line
         self.file_end = file_end
+        self.lines_ranges = lines_ranges
         self.lines = []
         self.disabled_headers = set()
         self.disabled_whole = False
+        self._index: Optional[LinesIndex] = None
+
+    @property
+    def index(self) -> LinesIndex:
+        if self._index is None:
+            self._index = LinesIndex(self.lines)
+        return self._index
 
     def add_disabler(self, start_line, end_line):
         self.lines.append((start_line, end_line))
+        self._index = None
 
     def add_disabled_header(self, lineno):
         self.disabled_headers.add(lineno)
 
     def parse_global_disablers(self):
-        if not self.start_line:
+        """Disable the lines outside of the selected lines (``--startline``/``--endline`` and the lines ranges)."""
+        enabled = self.get_enabled_lines()
+        if enabled is None:
             return
-        end_line = self.end_line if self.end_line else self.start_line
-        if self.start_line > 1:
-            self.add_disabler(1, self.start_line - 1)
-        if end_line < self.file_end:
-            self.add_disabler(end_line + 1, self.file_end)
+        previous_end = 0
+        for start_line, end_line in enabled:
+            if start_line > previous_end + 1:
+                self.add_disabler(previous_end + 1, start_line - 1)
+            previous_end = max(previous_end, end_line)
+        if previous_end < self.file_end:
+            self.add_disabler(previous_end + 1, self.file_end)
+
+    def get_enabled_lines(self) -> Optional[List[Tuple[int, int]]]:
+        if not self.start_line and self.lines_ranges is None:
+            return None
+        enabled = sorted(self.lines_ranges) if self.lines_ranges is not None else [(1, self.file_end)]
+        if self.start_line:
+            end_line = self.end_line if self.end_line else self.start_line
+            enabled = [
+                (max(start, self.start_line), min(end, end_line))
+                for start, end in enabled
+                if start <= end_line and end >= self.start_line
+            ]
+        return enabled
 
     def sort_disablers(self):
         self.lines = sorted(self.lines, key=lambda x: x[0])
+        self._index = LinesIndex(self.lines)
 
     def is_header_disabled(self, line):
         return line in self.disabled_headers
 
     def is_node_disabled(self, node, full_match=True):
-        if not node or not self.lines:
-            return False
-        end_lineno = max(node.lineno, node.end_lineno)  # workaround for transformers setting -1 as end_lineno
-        if full_match:
-            for start_line, end_line in self.lines:
-                # lines are sorted on start_line, so we can return on first match
-                if end_line >= end_lineno:
-                    return start_line <= node.lineno
-        else:
-            for start_line, end_line in self.lines:
-                if node.lineno <= end_line and end_lineno >= start_line:
-                    return True
-        return False
+        return self.index.is_node_disabled(node, full_match)
+
+    def is_lines_range_disabled(self, lineno: int, end_lineno: int) -> bool:
+        return self.index.contains(lineno, end_lineno)
 
 
 class RegisterDisablers(ModelVisitor):
-    def __init__(self, start_line, end_line):
+    def __init__(self, start_line, end_line, lines_ranges=None):
         self.start_line = start_line
         self.end_line = end_line
-        self.disablers = DisablersInFile(start_line, end_line)
+        self.lines_ranges = lines_ranges
+        self.disablers = DisablersInFile(start_line, end_line, lines_ranges=lines_ranges)
         self.disabler_pattern = re.compile(r"\s*#\s?robotidy:\s?(?P<disabler>on|off) ?=?(?P<transformers>[\w,\s]*)")
         self.disablers_in_scope: List[Dict[str, int]] = []
         self.file_level_disablers = False
+        self.has_markers = True
+
+    def prescan(self, source: Union[str, bytes]):
+        """
+        Check the source text (or the UTF-8 encoded content) for the disabler comments before the model is visited.
+        If there are none, the model is not traversed - only the lines outside of the selected lines are disabled.
+        """
+        marker = DISABLER_MARKER if isinstance(source, str) else DISABLER_MARKER.encode()
+        self.has_markers = marker in source
 
     def is_disabled_in_file(self, transformer_name: str = ALL_TRANSFORMERS):
         return self.disablers.is_disabled_in_file(transformer_name)
@@ -194,8 +361,10 @@ class RegisterDisablers(ModelVisitor):
 
     def visit_File(self, node):  # noqa
         self.file_level_disablers = False
-        self.disablers = DisablersInFile(self.start_line, self.end_line, node.end_lineno)
+        self.disablers = DisablersInFile(self.start_line, self.end_line, node.end_lineno, self.lines_ranges)
         self.disablers.parse_global_disablers()
+        if not self.has_markers:
+            return
         self.stack = []
         for index, section in enumerate(node.sections):
             self.file_level_disablers = index == 0 and isinstance(section, CommentSection)
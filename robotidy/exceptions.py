@@ -56,3 +56,7 @@ class NoSuchOptionError(NoSuchOption):
         rec_finder = misc.RecommendationFinder()
         similar = rec_finder.find(option_name, allowed_options)
         super().__init__(option_name, possibilities=similar)
+
+
+class GitError(RobotidyConfigError):
+    pass
@@ -1,21 +1,20 @@
 from __future__ import annotations
 
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, Iterable, Iterator, Pattern
 
-import pathspec
-
-try:
-    import rich_click as click
-except ImportError:
-    import click
-
+import click
 import tomli
 
+from robotidy.utils import archive, git
+
 DEFAULT_EXCLUDES = r"/(\.direnv|\.eggs|\.git|\.hg|\.nox|\.tox|\.venv|venv|\.svn)/"
 INCLUDE_EXT = (".robot", ".resource")
 DOTFILE_CONFIG = ".robotidy"
+DISCOVERY_BACKENDS = ("walk", "git")
 CONFIG_NAMES = ("robotidy.toml", "pyproject.toml", DOTFILE_CONFIG)
 
 
@@ -71,31 +70,54 @@ def find_project_root(srcs: tuple[str, ...], ignore_git_dir: bool = False) -> Pa
     return directory
 
 
-def load_toml_file(config_path: Path) -> dict[str, Any]:
+def load_toml_file(config_path: Path, content: bytes | None = None) -> dict[str, Any]:
+    """Load the configuration file. If the ``content`` is given (for example read from git), the file is not read."""
     try:
+        if content is not None:
+            return tomli.loads(content.decode("utf-8"))
         with config_path.open("rb") as tf:
             config = tomli.load(tf)
         return config
-    except (tomli.TOMLDecodeError, OSError) as e:
+    except (tomli.TOMLDecodeError, OSError, UnicodeDecodeError) as e:
         raise click.FileError(filename=str(config_path), hint=f"Error reading configuration file: {e}")
 
 
-def read_pyproject_config(config_path: Path) -> dict[str, Any]:
-    config = load_toml_file(config_path)
+def read_pyproject_config(config_path: Path, content: bytes | None = None) -> dict[str, Any]:
+    config = load_toml_file(config_path, content)
     if config_path.name != DOTFILE_CONFIG or "tool" in config:
         config = config.get("tool", {}).get("robotidy", {})
     return {k.replace("--", "").replace("-", "_"): v for k, v in config.items()}
 
 
+class GitIgnore:
+    """
+    Combined rules of the ``.gitignore`` files.
+
+    ``pathspec`` is only imported when the first ``.gitignore`` file with the rules is found.
+    """
+
+    def __init__(self, spec=None):
+        self.spec = spec
+
+    def extend(self, lines: list[str]) -> GitIgnore:
+        import pathspec
+
+        spec = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, lines)
+        return GitIgnore(spec if self.spec is None else self.spec + spec)
+
+    def match_file(self, path: str | Path) -> bool:
+        return self.spec is not None and self.spec.match_file(path)
+
+
 @lru_cache()
-def get_gitignore(root: Path) -> pathspec.PathSpec:
-    """Return a PathSpec matching gitignore content if present."""
+def get_gitignore(root: Path) -> GitIgnore:
+    """Return rules of the gitignore file if present."""
     gitignore = root / ".gitignore"
-    lines: list[str] = []
-    if gitignore.is_file():
-        with gitignore.open(encoding="utf-8") as gf:
-            lines = gf.readlines()
-    return pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, lines)
+    if not gitignore.is_file():
+        return GitIgnore()
+    with gitignore.open(encoding="utf-8") as gf:
+        lines = gf.readlines()
+    return GitIgnore().extend(lines)
 
 
 def should_parse_path(
@@ -103,7 +125,7 @@ def should_parse_path(
     root_parent: Path,
     exclude: Pattern[str] | None,
     extend_exclude: Pattern[str] | None,
-    gitignore: pathspec.PathSpec | None,
+    gitignore: GitIgnore | None,
 ) -> bool:
     normalized_path = str(path)
     for pattern in (exclude, extend_exclude):
@@ -115,7 +137,7 @@ def should_parse_path(
         if gitignore.match_file(relative_path):
             return False
     if path.is_file():
-        return path.suffix in INCLUDE_EXT
+        return path.suffix in INCLUDE_EXT or archive.is_archive(path)
     if exclude and exclude.match(path.name):
         return False
     return True
@@ -133,48 +155,288 @@ def get_paths(
     exclude: Pattern | None,
     extend_exclude: Pattern | None,
     skip_gitignore: bool,
-):
+    threads: int | None = None,
+    changed_files: Iterable[Path] | None = None,
+    discover: str = "walk",
+) -> Iterator[Path | str]:
+    """
+    Yield source files (and ``-`` for stdin) as they are found.
+
+    Sources are yielded in the order they were given and the directories are walked in sorted order, so the order is
+    deterministic. Paths are only remembered when they could be found twice (with more than one source).
+
+    If ``threads`` is greater than 1, directories are listed in the thread pool ahead of the walk, which speeds up
+    the discovery on slow (for example network) file systems.
+
+    If ``changed_files`` are given (for example read from git), only these files are yielded and the directories are
+    not walked. The same exclusion rules apply to them.
+
+    With ``discover="git"``, the files in the directories are listed with ``git ls-files`` instead of walking the
+    directories, and the ``.gitignore`` rules are applied by git.
+
+    Zip and tar archives are only yielded if they are given as the sources - the directories are not searched for them.
+    """
+    if changed_files is not None:
+        changed_files = {path.resolve() for path in changed_files}
     root = find_project_root(src)
-    if skip_gitignore:
+    if skip_gitignore or discover == "git" or all(source == "-" for source in src):
         gitignore = None
     else:
         gitignore = get_gitignore(root)
-    sources = set()
+    root_parent = root.parent if root.parent else root
+    with SourceWalker(exclude, extend_exclude, root_parent, threads, include_ignored=skip_gitignore) as walker:
+        paths = iterate_sources(src, walker, gitignore, changed_files, discover)
+        if len(src) < 2:
+            yield from paths
+            return
+        seen = set()
+        for path in paths:
+            key = str(path)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield path
+
+
+def get_git_paths(
+    src: tuple[str, ...], git_source: git.GitSource, exclude: Pattern | None, extend_exclude: Pattern | None
+) -> Iterator[str]:
+    """
+    Yield the paths (relative to the repository root) of the source files from the git revision or the index, that
+    are under the source paths and are not excluded. Files and directories are not read from the disk.
+    """
+    root = str(git_source.root)
+    with SourceWalker(exclude, extend_exclude, git_source.root.parent) as walker:
+        seen = set()
+        for s in src:
+            if s == "-":
+                continue
+            path = Path(s).resolve()
+            try:
+                relative = path.relative_to(git_source.root).as_posix()
+            except ValueError:
+                raise click.BadParameter(f"{s} is outside of the git repository {root}") from None
+            if relative in git_source.paths:
+                directory, files = str(path.parent), [relative]
+            else:
+                if relative != "." and walker.is_excluded(str(path), path.name, True):
+                    continue
+                prefix = "" if relative == "." else relative + "/"
+                directory, files = str(path), sorted(file for file in git_source.paths if file.startswith(prefix))
+            files = [os.path.join(root, *file.split("/")) for file in files if os.path.splitext(file)[1] in INCLUDE_EXT]
+            for file in walker.filter_files(directory, files, None):
+                git_path = Path(file).relative_to(git_source.root).as_posix()
+                if git_path not in seen:
+                    seen.add(git_path)
+                    yield git_path
+
+
+def iterate_sources(
+    src: tuple[str, ...],
+    walker: "SourceWalker",
+    gitignore: GitIgnore | None,
+    changed_files: set[Path] | None = None,
+    discover: str = "walk",
+):
     for s in src:
         if s == "-":
-            sources.add("-")
+            yield "-"
             continue
         path = Path(s).resolve()
-        root_parent = root.parent if root.parent else root
-        if not should_parse_path(path, root_parent, exclude, extend_exclude, gitignore):
+        if not should_parse_path(path, walker.root_parent, walker.exclude, walker.extend_exclude, gitignore):
             continue
         if path.is_file():
-            sources.add(path)
+            if changed_files is None or path in changed_files:
+                yield path
         elif path.is_dir():
-            sources.update(iterate_dir((path,), exclude, extend_exclude, root_parent, gitignore))
-        elif s == "-":
-            sources.add(path)
+            if changed_files is not None:
+                yield from walker.walk_changed(path, gitignore, changed_files)
+            elif discover == "git":
+                yield from walker.walk_git(path)
+            else:
+                yield from walker.walk(path, gitignore)
 
-    return sources
 
+def scan_dir(path: str, read_gitignore: bool) -> tuple[list[tuple[str, bool]], list[str]]:
+    """
+    Return directory entries (name, is directory) in the sorted order and lines of the directory ``.gitignore`` file.
 
-def iterate_dir(
-    paths: Iterable[Path],
-    exclude: Pattern | None,
-    extend_exclude: Pattern | None,
-    root_parent: Path,
-    gitignore: pathspec.PathSpec | None,
-) -> Iterator[Path]:
-    for path in paths:
-        if not should_parse_path(path, root_parent, exclude, extend_exclude, gitignore):
-            continue
-        if path.is_dir():
-            yield from iterate_dir(
-                path.iterdir(),
-                exclude,
-                extend_exclude,
-                root_parent,
-                gitignore + get_gitignore(path) if gitignore is not None else None,
+    Only directories and files with the supported extensions are returned. The type of the entry is read from the
+    directory listing if the file system provides it, without calling ``stat`` on each file.
+    """
+    entries = []
+    has_gitignore = False
+    with os.scandir(path) as dir_entries:
+        for entry in dir_entries:
+            if entry.name == ".gitignore":
+                has_gitignore = True
+            if entry.is_dir():
+                entries.append((entry.name, True))
+            elif os.path.splitext(entry.name)[1] in INCLUDE_EXT and entry.is_file():
+                entries.append((entry.name, False))
+    # sort the same way as full paths: directory 'a' (as 'a/') is after file 'a.robot'
+    entries.sort(key=lambda entry: entry[0] + "/" if entry[1] else entry[0])
+    gitignore_lines = read_gitignore_lines(path) if read_gitignore and has_gitignore else []
+    return entries, gitignore_lines
+
+
+def read_gitignore_lines(path: str) -> list[str]:
+    gitignore_path = os.path.join(path, ".gitignore")
+    if not os.path.isfile(gitignore_path):
+        return []
+    with open(gitignore_path, encoding="utf-8") as gf:
+        return gf.readlines()
+
+
+class SourceWalker:
+    """
+    Walk the directories and yield source files that are not excluded.
+
+    Excluded directories (by ``exclude``, ``extend_exclude`` or ``.gitignore``) are not walked. Paths are matched as
+    strings - directories with the trailing separator - and ``Path`` objects are only created for the found files.
+    Combined ``.gitignore`` rules are only created for the directories with their own ``.gitignore`` file.
+    """
+
+    def __init__(
+        self,
+        exclude: Pattern | None,
+        extend_exclude: Pattern | None,
+        root_parent: Path,
+        threads: int | None = None,
+        include_ignored: bool = False,
+    ):
+        self.exclude = exclude
+        self.extend_exclude = extend_exclude
+        self.patterns = [pattern for pattern in (exclude, extend_exclude) if pattern]
+        self.root_parent = root_parent
+        self.root_prefix = os.path.join(str(root_parent), "")
+        self.executor = ThreadPoolExecutor(max_workers=threads) if threads and threads > 1 else None
+        self.include_ignored = include_ignored  # files ignored by git are listed by ``walk_git``
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    def walk(self, path: Path, gitignore: GitIgnore | None) -> Iterator[Path]:
+        yield from self.walk_dir(str(path), self.get_relative_path(str(path)), gitignore, None)
+
+    def get_relative_path(self, path: str) -> str:
+        if path.startswith(self.root_prefix):
+            return path[len(self.root_prefix) :]
+        return path
+
+    def scan(self, path: str, gitignore: GitIgnore | None) -> Future | None:
+        """Start listing directory in the thread pool. Without the thread pool, the directory is listed when walked."""
+        if self.executor is None:
+            return None
+        return self.executor.submit(scan_dir, path, gitignore is not None)
+
+    def is_excluded(self, path: str, name: str, is_dir: bool) -> bool:
+        for pattern in self.patterns:
+            match = pattern.search(path)
+            if match and match.group(0):
+                return True
+            if is_dir:
+                match = pattern.search(path + os.sep)
+                if match and match.group(0):
+                    return True
+        return is_dir and self.exclude is not None and self.exclude.match(name) is not None
+
+    def walk_dir(
+        self, path: str, relative_path: str, gitignore: GitIgnore | None, listing: Future | None
+    ) -> Iterator[Path]:
+        entries, gitignore_lines = listing.result() if listing else scan_dir(path, gitignore is not None)
+        if gitignore_lines:
+            gitignore = gitignore.extend(gitignore_lines)
+        included = []
+        for name, is_dir in entries:
+            entry_path = os.path.join(path, name)
+            entry_relative_path = os.path.join(relative_path, name)
+            if self.is_excluded(entry_path, name, is_dir):
+                continue
+            if gitignore is not None and gitignore.match_file(
+                entry_relative_path + "/" if is_dir else entry_relative_path
+            ):
+                continue
+            included.append(
+                (entry_path, entry_relative_path, self.scan(entry_path, gitignore) if is_dir else None, is_dir)
             )
-        elif path.is_file():
-            yield path
+        for entry_path, entry_relative_path, entry_listing, is_dir in included:
+            if is_dir:
+                yield from self.walk_dir(entry_path, entry_relative_path, gitignore, entry_listing)
+            else:
+                yield Path(entry_path)
+
+    def walk_changed(self, path: Path, gitignore: GitIgnore | None, changed_files: Iterable[Path]) -> Iterator[Path]:
+        """
+        Yield the changed files from the directory, in the same order and excluded by the same rules as in ``walk``.
+        Only the directories with the changed files are checked (and their ``.gitignore`` files read), the directories
+        are not listed.
+        """
+        prefix = os.path.join(str(path), "")
+        files = [
+            str(file)
+            for file in changed_files
+            if str(file).startswith(prefix) and os.path.splitext(file.name)[1] in INCLUDE_EXT
+        ]
+        files.sort(key=lambda file: get_walk_order_key(file[len(prefix) :]))
+        if gitignore is not None:
+            gitignore = gitignore.extend(read_gitignore_lines(str(path)))
+        for file in self.filter_files(str(path), files, gitignore):
+            if os.path.isfile(file):
+                yield Path(file)
+
+    def walk_git(self, path: Path) -> Iterator[Path]:
+        """
+        Yield the files tracked by git and the untracked files from the directory (listed by ``git ls-files``), in the
+        same order and excluded by the same patterns as in ``walk``. The ``.gitignore`` rules are applied by git.
+        """
+        prefix = os.path.join(str(path), "")
+        files = (
+            prefix + file.replace("/", os.sep)
+            for file in git.list_files(path, self.include_ignored)
+            if os.path.splitext(file)[1] in INCLUDE_EXT
+        )
+        for file in self.filter_files(str(path), files, None):
+            yield Path(file)
+
+    def filter_files(self, path: str, files: Iterable[str], gitignore: GitIgnore | None) -> Iterator[str]:
+        """Yield the files from the directory that are not excluded, as in ``walk`` but without listing directories."""
+        directories = {path: (True, gitignore)}
+        for file in files:
+            included, gitignore = self.get_directory_rules(os.path.dirname(file), directories)
+            if not included or self.is_excluded(file, os.path.basename(file), False):
+                continue
+            if gitignore is not None and gitignore.match_file(self.get_relative_path(file)):
+                continue
+            yield file
+
+    def get_directory_rules(
+        self, directory: str, directories: dict[str, tuple[bool, GitIgnore | None]]
+    ) -> tuple[bool, GitIgnore | None]:
+        """Return whether the directory would be walked and the ``.gitignore`` rules for its entries."""
+        if directory in directories:
+            return directories[directory]
+        included, gitignore = self.get_directory_rules(os.path.dirname(directory), directories)
+        if included:
+            name = os.path.basename(directory)
+            if self.is_excluded(directory, name, True):
+                included = False
+            elif gitignore is not None:
+                if gitignore.match_file(self.get_relative_path(directory) + "/"):
+                    included = False
+                else:
+                    gitignore_lines = read_gitignore_lines(directory)
+                    if gitignore_lines:
+                        gitignore = gitignore.extend(gitignore_lines)
+        directories[directory] = (included, gitignore)
+        return included, gitignore
+
+
+def get_walk_order_key(relative_path: str) -> tuple[str, ...]:
+    """Sort the paths the same way as the directories are walked: directory 'a' (as 'a/') is after file 'a.robot'."""
+    *directories, name = relative_path.split(os.sep)
+    return (*(directory + "/" for directory in directories), name)
@@ -1,15 +1,35 @@
-try:
-    from rich.console import Console
-except ImportError:  # Fails on vendored-in LSP plugin
+from functools import lru_cache
 
-    class Console:
-        @staticmethod
-        def print(msg, *args, **kwargs):
-            print(
-                "It looks line you have rich module uninstalled. "
-                "Install it to be able to use robotidy in the cli mode."
-            )
-            print(msg)
 
+class FallbackConsole:
+    @staticmethod
+    def print(msg, *args, **kwargs):
+        print("It looks line you have rich module uninstalled. Install it to be able to use robotidy in the cli mode.")
+        print(msg)
 
-console = Console()
+
+@lru_cache()
+def get_console():
+    """
+    Return the shared rich console.
+
+    Importing rich takes noticeable time, so it is only imported when something is printed with the console (such as
+    the diff or the list of the transformers).
+    """
+    try:
+        from rich.console import Console
+    except ImportError:  # Fails on vendored-in LSP plugin
+        return FallbackConsole()
+    return Console()
+
+
+def __getattr__(name):
+    """
+    Create the shared ``console`` (and import ``Console``) when they are accessed, so importing the module does not
+    import rich. Kept for the code that imports them from this module.
+    """
+    if name == "console":
+        return get_console()
+    if name == "Console":
+        return type(get_console())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
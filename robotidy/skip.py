@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import re
-from typing import Pattern
+from functools import lru_cache
+from typing import Iterable, Pattern
 
 import click
 from robot.api import Token
@@ -26,6 +27,54 @@ def validate_regex(value: str) -> Pattern | None:
         raise ValueError(f"'{value}' is not a valid regular expression.") from None
 
 
+class KeywordCallMatcher:
+    """
+    Decide if the keyword call should be skipped, based on the keyword names and the patterns.
+
+    The patterns without groups and inline flags are combined into one regex, so the name is searched once. Decisions
+    are remembered by the keyword name (up to ``MAX_MEMO_SIZE`` names), because the same keywords are usually called
+    many times.
+    """
+
+    MAX_MEMO_SIZE = 10_000
+
+    def __init__(self, names: Iterable[str], patterns: Iterable[str]):
+        self.names = {normalize_name(name) for name in names}
+        self.patterns = self.combine_patterns([validate_regex(pattern) for pattern in patterns])
+        self.memo: dict[str, bool] = {}
+
+    def __bool__(self):
+        return bool(self.names or self.patterns)
+
+    @staticmethod
+    def combine_patterns(patterns: list[Pattern]) -> list[Pattern]:
+        default_flags = re.compile("").flags
+        simple = [pattern for pattern in patterns if not pattern.groups and pattern.flags == default_flags]
+        if len(simple) < 2:
+            return patterns
+        combined = re.compile("|".join(f"(?:{pattern.pattern})" for pattern in simple))
+        return [combined, *(pattern for pattern in patterns if pattern not in simple)]
+
+    def match(self, name: str) -> bool:
+        decision = self.memo.get(name)
+        if decision is None:
+            decision = normalize_name(name) in self.names or any(pattern.search(name) for pattern in self.patterns)
+            if len(self.memo) >= self.MAX_MEMO_SIZE:
+                self.memo.clear()
+            self.memo[name] = decision
+        return decision
+
+
+@lru_cache(maxsize=128)
+def get_keyword_call_matcher(names: tuple[str, ...], patterns: tuple[str, ...]) -> KeywordCallMatcher:
+    """
+    Return the matcher shared by all transformers with the same keyword call names and patterns to skip. Only the
+    recently used matchers are kept, so long running processes (such as ``robotidy --daemon``) do not keep the
+    matchers of all configurations they have loaded.
+    """
+    return KeywordCallMatcher(names, patterns)
+
+
 class SkipConfig:
     """Skip configuration (global and for each transformer)."""
 
@@ -106,8 +155,11 @@ class Skip:
         self.documentation = skip_config.documentation
         self.comments = skip_config.comments
         self.block_comments = skip_config.block_comments
-        self.keyword_call_names = {normalize_name(name) for name in skip_config.keyword_call}
-        self.keyword_call_pattern = {validate_regex(pattern) for pattern in skip_config.keyword_call_pattern}
+        self.keyword_call_matcher = get_keyword_call_matcher(
+            tuple(skip_config.keyword_call), tuple(skip_config.keyword_call_pattern)
+        )
+        self.keyword_call_names = self.keyword_call_matcher.names
+        self.keyword_call_pattern = self.keyword_call_matcher.patterns
         self.any_keword_call = self.check_any_keyword_call()
         self.skip_settings = self.parse_skip_settings(skip_config)
         self.skip_sections = set(skip_config.sections)
@@ -131,18 +183,15 @@ class Skip:
         return skip_settings
 
     def check_any_keyword_call(self):
-        return self.keyword_call_names or self.keyword_call_pattern
+        return bool(self.keyword_call_matcher)
 
     def keyword_call(self, node):
-        if not getattr(node, "keyword", None) or not self.any_keword_call:
+        if not self.any_keword_call:
             return False
-        normalized = normalize_name(node.keyword)
-        if normalized in self.keyword_call_names:
-            return True
-        for pattern in self.keyword_call_pattern:
-            if pattern.search(node.keyword):
-                return True
-        return False
+        keyword = getattr(node, "keyword", None)
+        if not keyword:
+            return False
+        return self.keyword_call_matcher.match(keyword)
 
     def setting(self, name):
         if not self.skip_settings:
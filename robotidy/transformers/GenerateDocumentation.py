@@ -2,14 +2,16 @@ from __future__ import annotations
 
 import re
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from jinja2 import Template
-from jinja2.exceptions import TemplateError
 from robot.api.parsing import Documentation, ModelVisitor, Token
 
 from robotidy.exceptions import InvalidParameterValueError
 from robotidy.transformers import Transformer
 
+if TYPE_CHECKING:
+    from jinja2 import Template
+
 GOOGLE_TEMPLATE = """    Short description.
 {% if keyword.arguments|length > 0 %}
 {{ formatting.cont_indent }}Args:
@@ -147,6 +149,9 @@ class GenerateDocumentation(Transformer):
     visit_SettingSection = visit_TestCaseSection
 
     def load_template(self, template: str, template_directory: str | None = None) -> Template:
+        from jinja2 import Template
+        from jinja2.exceptions import TemplateError
+
         try:
             return Template(self.get_template(template, template_directory))
         except TemplateError as err:
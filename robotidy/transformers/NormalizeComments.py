@@ -38,6 +38,7 @@ class NormalizeComments(Transformer):
     ```
     """
 
+    STATEMENT_LOCAL = True
     HANDLES_SKIP = frozenset(
         {
             "skip_comments",
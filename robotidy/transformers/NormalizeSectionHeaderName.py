@@ -34,6 +34,7 @@ class NormalizeSectionHeaderName(Transformer):
     ```
     """
 
+    STATEMENT_LOCAL = True
     HANDLES_SKIP = frozenset({"skip_sections"})
     EN_SINGULAR_HEADERS = {
         "comment",
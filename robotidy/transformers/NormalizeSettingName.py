@@ -37,6 +37,8 @@ class NormalizeSettingName(Transformer):
     ```
     """
 
+    STATEMENT_LOCAL = True
+
     @skip_section_if_disabled
     def visit_Section(self, node):  # noqa
         return self.generic_visit(node)
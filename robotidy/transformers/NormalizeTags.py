@@ -32,6 +32,8 @@ class NormalizeTags(Transformer):
     The duplicates will not be removed with ``preserve_format`` set to ``True``.
     """
 
+    STATEMENT_LOCAL = True
+
     CASE_FUNCTIONS = {
         "lowercase": str.lower,
         "uppercase": str.upper,
@@ -41,6 +41,7 @@ class OrderTags(Transformer):
       - ``reverse = False``
     """
 
+    STATEMENT_LOCAL = True
     ENABLED = False
 
     def __init__(
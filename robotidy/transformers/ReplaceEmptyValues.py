@@ -36,6 +36,7 @@ class ReplaceEmptyValues(Transformer):
     ```
     """
 
+    STATEMENT_LOCAL = True
     HANDLES_SKIP = frozenset({"skip_sections"})
 
     def __init__(self, skip: Skip = None):
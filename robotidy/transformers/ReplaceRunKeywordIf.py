@@ -83,6 +83,8 @@ class ReplaceRunKeywordIf(Transformer):
     ```
     """
 
+    STATEMENT_LOCAL = True
+
     @skip_section_if_disabled
     def visit_Section(self, node):  # noqa
         return self.generic_visit(node)
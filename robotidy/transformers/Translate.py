@@ -78,6 +78,7 @@ class Translate(Transformer):
         else:
             self.language, self.settings = None, None
         self._bdd_mapping = None
+        self._bdd_mapping_languages = None
         self.bdd = self.get_translated_bdd(
             but_alternative,
             given_alternative,
@@ -88,8 +89,10 @@ class Translate(Transformer):
 
     @property
     def bdd_mapping(self):
-        if self._bdd_mapping is None:
+        if self._bdd_mapping is None or self._bdd_mapping_languages is not self.languages:
+            # languages are different for every file, as they include the languages from the file header
             self._bdd_mapping = {}
+            self._bdd_mapping_languages = self.languages
             for language in self.languages:
                 self._bdd_mapping.update({name.title(): "But" for name in language.but_prefixes})
                 self._bdd_mapping.update({name.title(): "Given" for name in language.given_prefixes})
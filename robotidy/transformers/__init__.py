@@ -6,7 +6,9 @@ need to inherit from ``ModelTransformer`` or ``ast.NodeTransformer`` class. Fina
 ``TRANSFORMERS`` variable in this file.
 
 If you don't want to run your transformer by default and only when calling robotidy with --transform YourTransformer
-then add ``ENABLED = False`` class attribute inside.
+then add ``ENABLED = False`` class attribute inside. Core transformers that are disabled or require newer Robot
+Framework version (``MIN_VERSION`` class attribute) also need to be listed in ``TRANSFORMERS_METADATA``, so they are not
+imported when they will not run.
 """
 
 from __future__ import annotations
@@ -18,11 +20,7 @@ import textwrap
 from itertools import chain
 from typing import Iterable
 
-try:
-    import rich_click as click
-except ImportError:
-    import click
-
+import click
 from robot.api.parsing import ModelTransformer
 from robot.errors import DataError
 from robot.utils.importer import Importer
@@ -68,6 +66,33 @@ TRANSFORMERS = [
 ]
 
 
+class TransformerMetadata:
+    """Class attributes of the core transformer that decide whether it will run, available without importing it."""
+
+    def __init__(self, enabled: bool = True, min_version: int | None = None):
+        self.enabled = enabled
+        self.min_version = min_version
+
+
+DEFAULT_METADATA = TransformerMetadata()
+TRANSFORMERS_METADATA = {
+    "ReplaceWithVAR": TransformerMetadata(enabled=False, min_version=7),
+    "GenerateDocumentation": TransformerMetadata(enabled=False),
+    "OrderTags": TransformerMetadata(enabled=False),
+    "RenameVariables": TransformerMetadata(enabled=False),
+    "IndentNestedKeywords": TransformerMetadata(enabled=False),
+    "AlignTemplatedTestCases": TransformerMetadata(enabled=False),
+    "AlignTestCasesSection": TransformerMetadata(enabled=False),
+    "AlignKeywordsSection": TransformerMetadata(enabled=False),
+    "SmartSortKeywords": TransformerMetadata(enabled=False),
+    "RenameTestCases": TransformerMetadata(enabled=False),
+    "RenameKeywords": TransformerMetadata(enabled=False),
+    "ReplaceReturns": TransformerMetadata(min_version=5),
+    "ReplaceBreakContinue": TransformerMetadata(min_version=5),
+    "InlineIf": TransformerMetadata(min_version=5),
+    "Translate": TransformerMetadata(enabled=False, min_version=6),
+}
+
 IMPORTER = Importer()
 
 
@@ -81,6 +106,12 @@ class TransformConfig:
         self.is_config_only = is_config
         self.duplicate_reported = False
 
+    def __repr__(self):
+        return (
+            f"TransformConfig(name={self.name!r}, args={self.args!r}, force_include={self.force_include!r}, "
+            f"custom_transformer={self.custom_transformer!r}, is_config={self.is_config_only!r})"
+        )
+
     def convert_args(self, args):
         """
         Convert list of param=value arguments to dictionary.
@@ -477,6 +508,24 @@ def can_run_in_robot_version(transformer, overwritten, target_version):
     return False
 
 
+def will_not_run(name: str, transformers_config: TransformConfigMap, target_version) -> bool:
+    """
+    Check if the core transformer will not run using its metadata, so it does not need to be imported.
+
+    Transformers forcefully enabled in not supported Robot Framework version are imported to report why they cannot run.
+    """
+    if name not in TRANSFORMERS:
+        return False
+    metadata = TRANSFORMERS_METADATA.get(name, DEFAULT_METADATA)
+    args = transformers_config.transformers[name].args
+    default_enabled = True if transformers_config.force_included_only else metadata.enabled
+    if not args.get("enabled", default_enabled):
+        return True
+    if metadata.min_version is None or target_version >= metadata.min_version:
+        return False
+    return not transformers_config.transformer_was_forcefully_enabled(name)
+
+
 def load_transformers(
     transformers_config: TransformConfigMap,
     target_version,
@@ -491,7 +540,10 @@ def load_transformers(
     if not force_order:
         transformers_config.order_using_list(TRANSFORMERS)
     for name, transformer_config in transformers_config.transformers.items():
-        if not allow_disabled and not transformers_config.transformer_should_be_included(name):
+        if not allow_disabled and (
+            not transformers_config.transformer_should_be_included(name)
+            or will_not_run(name, transformers_config, target_version)
+        ):
             continue
         for container in import_transformer(name, transformers_config, skip):
             if transformers_config.force_included_only:
@@ -0,0 +1,198 @@
+"""
+Read the source files from the zip and tar archives without extracting them, and write the archives with the formatted
+source files.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import secrets
+import stat
+import tarfile
+import zipfile
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+from robot.errors import DataError
+
+from robotidy.utils.misc import SourceFile, fsync_directory, get_error_message
+
+TAR_COMPRESSION = {
+    ".tar": "",
+    ".tar.gz": "gz",
+    ".tgz": "gz",
+    ".tar.bz2": "bz2",
+    ".tbz2": "bz2",
+    ".tar.xz": "xz",
+    ".txz": "xz",
+}
+ARCHIVE_EXT = (".zip", *TAR_COMPRESSION)
+
+
+def is_archive(path) -> bool:
+    return str(path).endswith(ARCHIVE_EXT)
+
+
+def get_tar_compression(path) -> str:
+    return next(compression for ext, compression in TAR_COMPRESSION.items() if str(path).endswith(ext))
+
+
+class ArchiveSourceFile(SourceFile):
+    """
+    Source file read from the archive. It is displayed as ``archive:member``. ``index`` is the position of the member
+    in the archive.
+    """
+
+    def __init__(self, archive: str, member: str, index: int, content: bytes):
+        super().__init__(f"{archive}:{member}", content)
+        self.archive = archive
+        self.member = member
+        self.index = index
+
+
+class ArchiveSource:
+    """
+    Source files from the zip or tar archive, read in one sequential pass over the archive. Only the members with the
+    ``include_ext`` extensions are yielded.
+
+    If ``rewrite`` is set, the members are copied to the new archive in the same order, while the archive is read. The
+    formatted content of the yielded source files is set with ``set_content`` (or ``None`` if it did not change) - the
+    members are written as soon as the content of the preceding source files is known, so only the members waiting
+    for it are kept in memory. The new archive replaces the original one when all members are written, and only if
+    any of the source files changed.
+    """
+
+    def __init__(self, path: Path, include_ext: Iterable[str], rewrite: bool = False, fsync: bool = False):
+        self.path = path
+        self.include_ext = tuple(include_ext)
+        self.rewrite = rewrite
+        self.fsync = fsync
+        self.pending = deque()  # [member info, content, index of the source file or None if the content is known]
+        self.contents = {}
+        self.read_all = False
+        self.changed = False
+        self.temp_path: str | None = None
+        self.temp_file: BinaryIO | None = None
+        self.writer = None
+
+    def __iter__(self) -> Iterator[ArchiveSourceFile]:
+        try:
+            members = self.read_zip() if str(self.path).endswith(".zip") else self.read_tar()
+            for index, (info, name, content) in enumerate(members):
+                is_source = content is not None and name.endswith(self.include_ext)
+                if self.rewrite:
+                    self.pending.append([info, content, index if is_source else None])
+                if is_source:
+                    yield ArchiveSourceFile(str(self.path), name, index, content)
+                if self.rewrite:
+                    self.write_pending()
+        # RuntimeError is raised for encrypted zip members and unsupported compression methods
+        except (tarfile.TarError, zipfile.BadZipFile, zlib.error, EOFError, OSError, RuntimeError) as err:
+            self.close()
+            raise DataError(f"Reading archive '{self.path}' failed: {type(err).__name__}: {err}") from None
+        self.read_all = True
+        self.write_pending()
+
+    def read_zip(self) -> Iterator[tuple[zipfile.ZipInfo, str, bytes | None]]:
+        with zipfile.ZipFile(self.path) as archive:
+            for info in archive.infolist():
+                yield info, info.filename, None if info.is_dir() else archive.read(info)
+
+    def read_tar(self) -> Iterator[tuple[tarfile.TarInfo, str, bytes | None]]:
+        with tarfile.open(self.path, "r|*") as archive:
+            for info in archive:
+                content = archive.extractfile(info).read() if info.isfile() else None
+                yield info, info.name, content
+
+    def set_content(self, index: int, content: bytes | None):
+        """Set the formatted content of the source file (``None`` if it did not change) and write the ready members."""
+        if not self.rewrite:
+            return
+        if content is not None:
+            self.changed = True
+        self.contents[index] = content
+        self.write_pending()
+
+    def write_pending(self):
+        while self.pending:
+            info, content, index = self.pending[0]
+            if index is not None:
+                if index not in self.contents:
+                    return
+                formatted = self.contents.pop(index)
+                content = content if formatted is None else formatted
+            self.pending.popleft()
+            self.write_member(info, content)
+        if self.read_all:
+            self.finish()
+
+    def open_writer(self):
+        directory, name = os.path.split(os.path.realpath(self.path))
+        self.temp_path = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.tmp")
+        self.temp_file = open(self.temp_path, "xb")
+        if str(self.path).endswith(".zip"):
+            self.writer = zipfile.ZipFile(self.temp_file, "w")
+        else:
+            self.writer = tarfile.open(fileobj=self.temp_file, mode=f"w|{get_tar_compression(self.path)}")
+
+    def write_member(self, info, content: bytes | None):
+        try:
+            if self.writer is None:
+                self.open_writer()
+            if isinstance(self.writer, zipfile.ZipFile):
+                self.writer.writestr(info, b"" if content is None else content)
+            elif content is None:
+                self.writer.addfile(info)
+            else:
+                info.size = len(content)
+                self.writer.addfile(info, io.BytesIO(content))
+        except OSError:
+            self.close()
+            raise DataError(f"Writing archive '{self.path}' failed: {get_error_message()}") from None
+
+    def finish(self):
+        """Replace the archive with the written one if any of the source files changed."""
+        if self.writer is None or not self.changed:
+            self.close()
+            return
+        real_path = os.path.realpath(self.path)
+        try:
+            self.writer.close()
+            self.writer = None
+            if self.fsync:
+                self.temp_file.flush()
+                os.fsync(self.temp_file.fileno())
+            self.temp_file.close()
+            os.chmod(self.temp_path, stat.S_IMODE(os.stat(real_path).st_mode))
+            os.replace(self.temp_path, real_path)
+            self.temp_path = None
+        except OSError:
+            self.close()
+            raise DataError(f"Writing archive '{self.path}' failed: {get_error_message()}") from None
+        if self.fsync:
+            fsync_directory(os.path.dirname(real_path))
+        self.close()
+
+    def close(self):
+        """Stop writing the archive. The archive is not replaced if it was not written completely."""
+        self.pending.clear()
+        self.contents.clear()
+        self.rewrite = False
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except OSError:
+                pass
+            self.writer = None
+        if self.temp_file is not None:
+            self.temp_file.close()
+            self.temp_file = None
+        if self.temp_path is not None:
+            try:
+                os.remove(self.temp_path)
+            except OSError:
+                pass
+            self.temp_path = None
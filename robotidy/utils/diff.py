@@ -0,0 +1,235 @@
+"""
+Unified diff of the source code before and after the formatting.
+
+``difflib.unified_diff`` compares whole files with ``SequenceMatcher``, which is slow for the large files with many
+changes. Here the lines are replaced with integer ids first (equal lines get the same id), so the lines are only
+hashed once. Common lines at the start and the end of the files are skipped, and the remaining region is split on the
+lines that occur exactly once in both files (as in the patience diff). Only the small regions between these anchors
+are compared with Myers algorithm.
+
+The output has the same format as ``difflib.unified_diff`` output.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Iterator, Tuple
+
+MAX_EDIT_DISTANCE = 1000  # regions that differ more are reported as replaced without searching for the common lines
+
+Opcode = Tuple[str, int, int, int, int]
+
+
+def unified_diff(
+    a: list[str], b: list[str], fromfile: str = "", tofile: str = "", n: int = 3, lineterm: str = "\n"
+) -> Iterator[str]:
+    """Compare the lists of lines and yield the lines of the unified diff, the same as ``difflib.unified_diff``."""
+    started = False
+    for group in group_opcodes(get_opcodes(a, b), n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}{lineterm}"
+            yield f"+++ {tofile}{lineterm}"
+        first, last = group[0], group[-1]
+        yield f"@@ -{format_range(first[1], last[2])} +{format_range(first[3], last[4])} @@{lineterm}"
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in a[i1:i2]:
+                    yield " " + line
+                continue
+            if tag in ("replace", "delete"):
+                for line in a[i1:i2]:
+                    yield "-" + line
+            if tag in ("replace", "insert"):
+                for line in b[j1:j2]:
+                    yield "+" + line
+
+
+def format_range(start: int, stop: int) -> str:
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def get_opcodes(a: list[str], b: list[str]) -> list[Opcode]:
+    """Return the list of operations that turn ``a`` into ``b`` in ``SequenceMatcher.get_opcodes`` format."""
+    ids = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    blocks = []
+    match_region(a_ids, 0, len(a_ids), b_ids, 0, len(b_ids), blocks, find_anchors=True)
+    return blocks_to_opcodes(blocks, len(a_ids), len(b_ids))
+
+
+def match_region(
+    a: list[int], alo: int, ahi: int, b: list[int], blo: int, bhi: int, blocks: list, find_anchors: bool = False
+):
+    """Append matching blocks ``(i, j, size)`` of ``a[alo:ahi]`` and ``b[blo:bhi]`` to ``blocks`` in order."""
+    start = alo
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    if alo > start:
+        blocks.append((start, blo - (alo - start), alo - start))
+    suffix = 0
+    while alo < ahi - suffix and blo < bhi - suffix and a[ahi - suffix - 1] == b[bhi - suffix - 1]:
+        suffix += 1
+    ahi, bhi = ahi - suffix, bhi - suffix
+    if alo < ahi and blo < bhi:
+        anchors = get_anchors(a, alo, ahi, b, blo, bhi) if find_anchors else []
+        if anchors:
+            for i, j in anchors:
+                match_region(a, alo, i, b, blo, j, blocks)
+                blocks.append((i, j, 1))
+                alo, blo = i + 1, j + 1
+            match_region(a, alo, ahi, b, blo, bhi, blocks)
+        else:
+            blocks.extend(myers(a, alo, ahi, b, blo, bhi))
+    if suffix:
+        blocks.append((ahi, bhi, suffix))
+
+
+def get_anchors(a: list[int], alo: int, ahi: int, b: list[int], blo: int, bhi: int) -> list[tuple[int, int]]:
+    """
+    Return the positions of the lines that occur exactly once in both regions, and are in the same order in both of
+    them (the longest increasing subsequence).
+    """
+    a_unique = unique_positions(a, alo, ahi)
+    b_unique = unique_positions(b, blo, bhi)
+    pairs = [(i, b_unique[line]) for line, i in a_unique.items() if line in b_unique]
+    if not pairs:
+        return []
+    pairs.sort()
+    # longest increasing subsequence of the positions in b
+    tails = []
+    tail_indexes = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        position = bisect_left(tails, j)
+        if position == len(tails):
+            tails.append(j)
+            tail_indexes.append(index)
+        else:
+            tails[position] = j
+            tail_indexes[position] = index
+        previous[index] = tail_indexes[position - 1] if position else -1
+    anchors = []
+    index = tail_indexes[-1]
+    while index != -1:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def unique_positions(lines: list[int], lo: int, hi: int) -> dict[int, int]:
+    positions = {}
+    duplicated = set()
+    for index in range(lo, hi):
+        line = lines[index]
+        if line in positions:
+            duplicated.add(line)
+        else:
+            positions[line] = index
+    for line in duplicated:
+        del positions[line]
+    return positions
+
+
+def myers(a: list[int], alo: int, ahi: int, b: list[int], blo: int, bhi: int) -> list[tuple[int, int, int]]:
+    """
+    Return matching blocks of the shortest edit script found with Myers algorithm. If the regions differ by more than
+    ``MAX_EDIT_DISTANCE`` lines, no matching blocks are returned and the whole region is reported as replaced.
+    """
+    n, m = ahi - alo, bhi - blo
+    max_distance = min(n + m, MAX_EDIT_DISTANCE)
+    offset = max_distance + 1
+    furthest = [0] * (2 * offset + 1)
+    trace = []
+    for distance in range(max_distance + 1):
+        trace.append(furthest[offset - distance : offset + distance + 1])
+        for k in range(-distance, distance + 1, 2):
+            if k == -distance or (k != distance and furthest[offset + k - 1] < furthest[offset + k + 1]):
+                x = furthest[offset + k + 1]
+            else:
+                x = furthest[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            furthest[offset + k] = x
+            if x >= n and y >= m:
+                return backtrack(trace, distance, n, m, alo, blo)
+    return []
+
+
+def backtrack(trace: list[list[int]], distance: int, x: int, y: int, alo: int, blo: int) -> list[tuple[int, int, int]]:
+    """Follow the furthest reaching paths stored in ``trace`` back to the start and collect the diagonals."""
+    blocks = []
+    for d in range(distance, -1, -1):
+        k = x - y
+        if d == 0:
+            previous_x = previous_y = start_x = 0
+        else:
+            furthest = trace[d]  # furthest[d + k] is the furthest x on the diagonal k before the step d
+            if k == -d or (k != d and furthest[d + k - 1] < furthest[d + k + 1]):
+                previous_k = k + 1  # line inserted from b
+                previous_x = start_x = furthest[d + previous_k]
+            else:
+                previous_k = k - 1  # line deleted from a
+                previous_x = furthest[d + previous_k]
+                start_x = previous_x + 1
+            previous_y = previous_x - previous_k
+        # lines are equal on the diagonal after the step
+        if x > start_x:
+            blocks.append((alo + start_x, blo + start_x - k, x - start_x))
+        x, y = previous_x, previous_y
+    blocks.reverse()
+    return blocks
+
+
+def blocks_to_opcodes(blocks: list[tuple[int, int, int]], a_length: int, b_length: int) -> list[Opcode]:
+    opcodes = []
+    i = j = 0
+    merged = []
+    for block in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == block[0] and merged[-1][1] + merged[-1][2] == block[1]:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + block[2])
+        else:
+            merged.append(block)
+    for ai, bj, size in merged + [(a_length, b_length, 0)]:
+        if i < ai and j < bj:
+            opcodes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, ai, j, bj))
+        if size:
+            opcodes.append(("equal", ai, ai + size, bj, bj + size))
+        i, j = ai + size, bj + size
+    return opcodes
+
+
+def group_opcodes(opcodes: list[Opcode], n: int = 3) -> Iterator[list[Opcode]]:
+    """Group the operations into hunks with up to ``n`` lines of context, as ``SequenceMatcher.get_grouped_opcodes``."""
+    codes = list(opcodes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
@@ -0,0 +1,314 @@
+"""
+Read the files and the changes from the local git repository. Only the ``git`` executable is required.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import posixpath
+import re
+import subprocess
+import weakref
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from robotidy.exceptions import GitError
+from robotidy.utils.misc import SourceFile
+
+READ_SIZE = 1 << 16
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(?P<start>\d+)(?:,(?P<count>\d+))? @@")
+
+LinesRanges = List[Tuple[int, int]]
+ChangedLines = Dict[Path, Optional[LinesRanges]]  # None if all lines of the file are changed
+
+
+def run_git(args: list[str], cwd: Path | None = None) -> str:
+    command = ["git", "-c", "core.quotePath=false", *args]
+    try:
+        process = subprocess.run(command, cwd=cwd, capture_output=True)
+    except OSError as err:
+        raise GitError(f"Failed to run git: {err}") from None
+    if process.returncode:
+        error = process.stderr.decode("utf-8", errors="replace").strip()
+        raise GitError(f"'git {' '.join(args)}' failed: {error}")
+    return process.stdout.decode("utf-8", errors="surrogateescape")
+
+
+def stream_git(args: list[str], cwd: Path | None = None) -> Iterator[str]:
+    """Run git and yield the NUL separated entries of its output as soon as they are read."""
+    command = ["git", "-c", "core.quotePath=false", *args]
+    try:
+        process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as err:
+        raise GitError(f"Failed to run git: {err}") from None
+    with process:
+        pending = b""
+        while True:
+            chunk = process.stdout.read1(READ_SIZE)
+            if not chunk:
+                break
+            *entries, pending = (pending + chunk).split(b"\0")
+            for entry in entries:
+                yield entry.decode("utf-8", errors="surrogateescape")
+        error = process.stderr.read().decode("utf-8", errors="replace").strip()
+    if process.returncode:
+        raise GitError(f"'git {' '.join(args)}' failed: {error}")
+
+
+def list_files(directory: Path, include_ignored: bool = False) -> Iterator[str]:
+    """
+    Yield the paths (relative to the directory) of the files tracked by git and of the untracked files, in the sorted
+    order. Tracked files removed from the working tree are skipped. Untracked files ignored by git are only included
+    with ``include_ignored``.
+    """
+    deleted = set(stream_git(["ls-files", "-z", "--deleted"], directory))
+    tracked = (path for path in stream_git(["ls-files", "-z", "--cached"], directory) if path not in deleted)
+    others = ["ls-files", "-z", "--others"]
+    if not include_ignored:
+        others.append("--exclude-standard")
+    yield from heapq.merge(tracked, stream_git(others, directory))
+
+
+def get_toplevel(cwd: Path | None = None) -> Path:
+    return Path(run_git(["rev-parse", "--show-toplevel"], cwd).rstrip("\n")).resolve()
+
+
+def validate_revision(rev: str):
+    if rev.startswith("-"):
+        raise GitError(f"Invalid git revision: '{rev}'")
+
+
+def get_untracked_files(root: Path) -> list[str]:
+    return [path for path in run_git(["ls-files", "-z", "--others", "--exclude-standard"], root).split("\0") if path]
+
+
+def get_changed_lines(rev: str, cwd: Path | None = None) -> ChangedLines:
+    """
+    Return the ranges of the lines changed in the working tree since the ``rev`` revision, mapped by the resolved file
+    paths. Untracked files are mapped to ``None`` (all lines are changed). Files with only the removed lines are not
+    included.
+    """
+    validate_revision(rev)
+    root = get_toplevel(cwd)
+    diff = run_git(
+        ["diff", "--no-color", "--no-ext-diff", "--unified=0", "--src-prefix=a/", "--dst-prefix=b/", rev, "--"], root
+    )
+    changed: ChangedLines = parse_changed_lines(diff, root)
+    for path in get_untracked_files(root):
+        changed[(root / path).resolve()] = None
+    return changed
+
+
+def get_changed_files(rev: str | None, staged: bool = False, cwd: Path | None = None) -> list[Path]:
+    """
+    Return the paths of the files changed since the ``rev`` revision (``HEAD`` if not set) and not removed.
+
+    If ``staged`` is set, only the changes added to the index are read. Otherwise the changes in the working tree are
+    read, and the untracked files (that are not ignored) are also included.
+    """
+    args = ["diff", "--name-only", "-z", "--no-renames", "--diff-filter=d"]
+    if staged:
+        args.append("--cached")
+    if rev:
+        validate_revision(rev)
+        args.append(rev)
+    elif not staged:
+        args.append("HEAD")
+    root = get_toplevel(cwd)
+    paths = [path for path in run_git([*args, "--"], root).split("\0") if path]
+    if not staged:
+        paths.extend(get_untracked_files(root))
+    return [root / path for path in paths]
+
+
+def parse_changed_lines(diff: str, root: Path) -> dict[Path, LinesRanges]:
+    """Parse the ``git diff --unified=0`` output and return the ranges of the added or modified lines."""
+    changed = {}
+    lines_ranges = None
+    in_header = False
+    for line in diff.split("\n"):
+        if line.startswith("diff --git "):
+            in_header = True
+            lines_ranges = None
+        elif in_header and line.startswith("+++ "):
+            path = unquote_path(line[4:])
+            if path != "/dev/null":  # not a removed file
+                lines_ranges = changed.setdefault((root / path[2:]).resolve(), [])
+        elif line.startswith("@@"):
+            in_header = False
+            match = HUNK_HEADER.match(line)
+            if not match or lines_ranges is None:
+                continue
+            start = int(match.group("start"))
+            count = int(match.group("count") or 1)
+            if count:
+                lines_ranges.append((start, start + count - 1))
+    return {path: lines_ranges for path, lines_ranges in changed.items() if lines_ranges}
+
+
+def unquote_path(path: str) -> str:
+    """Decode the path that git quotes (with C-style escapes) if it contains special characters."""
+    path = path.rstrip("\t")  # git appends a tab after the paths with spaces
+    if not path.startswith('"'):
+        return path
+    escaped = path[1:-1].encode("utf-8", errors="surrogateescape").decode("unicode_escape")
+    return escaped.encode("latin-1").decode("utf-8", errors="surrogateescape")
+
+
+class CatFile:
+    """Read the objects from the repository with one long-lived ``git cat-file --batch`` process."""
+
+    def __init__(self, cwd: Path | None = None):
+        self.cwd = cwd
+        self.process: subprocess.Popen | None = None
+        _readers.add(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self) -> subprocess.Popen:
+        command = ["git", "cat-file", "--batch"]
+        try:
+            return subprocess.Popen(command, cwd=self.cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except OSError as err:
+            raise GitError(f"Failed to run git: {err}") from None
+
+    def read(self, name: str) -> bytes | None:
+        """Return the content of the object (such as ``HEAD:path/file.robot``) or ``None`` if it does not exist."""
+        if "\n" in name:
+            return None
+        if self.process is None:
+            self.process = self.start()
+        self.process.stdin.write(name.encode("utf-8", errors="surrogateescape") + b"\n")
+        self.process.stdin.flush()
+        header = self.process.stdout.readline()
+        if not header:
+            raise GitError("'git cat-file --batch' exited unexpectedly")
+        fields = header.split()
+        if len(fields) != 3:  # missing or ambiguous object
+            return None
+        content = self.process.stdout.read(int(fields[2]))
+        self.process.stdout.read(1)  # new line after the content
+        return content
+
+    def close(self):
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.wait()
+        self.process = None
+
+    def detach(self):
+        """Close the pipes of the process started by the parent process, without waiting for it."""
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process = None
+
+
+_readers: weakref.WeakSet[CatFile] = weakref.WeakSet()
+
+
+def _detach_inherited_readers():
+    """
+    Forked processes (such as the worker processes) inherit the pipes of the running ``git cat-file`` processes. They
+    are closed, so the processes see the end of the input when the parent process closes them.
+    """
+    for reader in list(_readers):
+        reader.detach()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_detach_inherited_readers)
+
+
+class GitSourceFile(SourceFile):
+    """Source file read from the git revision or from the index. ``git_path`` is relative to the repository root."""
+
+    def __init__(self, path: str, content: bytes, git_path: str):
+        super().__init__(path, content)
+        self.git_path = git_path
+
+
+class GitSource:
+    """
+    Files of the git revision, or of the index if the revision is not set, read without checking them out.
+
+    Paths are relative to the repository root and use ``/`` as the separator.
+    """
+
+    def __init__(self, rev: str | None, cwd: Path | None = None):
+        if rev:
+            validate_revision(rev)
+        self.rev = rev
+        self.root = get_toplevel(cwd)
+        self.reader = CatFile(self.root)
+        self._paths: set[str] | None = None
+        self.config_contents: dict[str, bytes | None] = {}
+
+    def __getstate__(self):
+        """
+        The reader is not copied to the other processes (such as the worker processes). The list of the files and the
+        read configuration files are copied instead - see ``read_configs``.
+        """
+        state = self.__dict__.copy()
+        state["_paths"] = self.paths
+        state["reader"] = None
+        return state
+
+    def list_files(self) -> Iterator[str]:
+        """Yield the paths of all files in the sorted order."""
+        if self.rev:
+            yield from stream_git(["ls-tree", "-r", "-z", "--name-only", "--full-tree", self.rev], self.root)
+            return
+        previous = None
+        for path in stream_git(["ls-files", "-z", "--cached"], self.root):
+            if path != previous:  # the files with the merge conflicts are listed once for every stage
+                yield path
+            previous = path
+
+    @property
+    def paths(self) -> set[str]:
+        if self._paths is None:
+            self._paths = set(self.list_files())
+        return self._paths
+
+    def get_name(self, path: str) -> str:
+        """Return the name of the file object, used by git (and displayed in the messages)."""
+        return f"{self.rev}:{path}" if self.rev else f":{path}"
+
+    def read(self, path: str) -> GitSourceFile | None:
+        content = self.reader.read(self.get_name(path))
+        if content is None:
+            return None
+        return GitSourceFile(self.get_name(path), content, path)
+
+    def read_config(self, path: str) -> bytes | None:
+        if path not in self.config_contents:
+            self.config_contents[path] = self.reader.read(self.get_name(path))
+        return self.config_contents[path]
+
+    def read_configs(self, config_names: Iterable[str]):
+        """Read all configuration files from the revision, so the copies of the source do not need to read them."""
+        config_names = set(config_names)
+        for path in sorted(self.paths):
+            if posixpath.basename(path) in config_names:
+                self.read_config(path)
+
+    def find_config_file(self, path: str, config_names: Iterable[str]) -> str | None:
+        """Return the path of the configuration file from the closest parent directory of the file in the revision."""
+        directory = posixpath.dirname(path)
+        while True:
+            for config_name in config_names:
+                config_path = posixpath.join(directory, config_name)
+                if config_path in self.paths:
+                    return config_path
+            if not directory:
+                return None
+            directory = posixpath.dirname(directory)
@@ -1,23 +1,24 @@
 from __future__ import annotations
 
 import ast
+import codecs
 import difflib
+import hashlib
 import os
 import re
+import secrets
+import stat
+import sys
 from enum import Enum
 from functools import total_ordering
 from typing import Iterable, Pattern
 
 import click
-
-try:
-    from rich.markup import escape
-except ImportError:  # Fails on vendored-in LSP plugin
-    escape = None
-
-from robot.api.parsing import Comment, End, If, IfHeader, ModelVisitor, Token
+from robot.api.parsing import Comment, End, If, IfHeader, ModelTransformer, ModelVisitor, Token
+from robot.errors import DataError
 from robot.parsing.model import Statement
-from robot.utils.robotio import file_writer
+from robot.utils import get_error_message
+from robot.utils.robotio import create_destination_directory
 from robot.version import VERSION as RF_VERSION
 
 
@@ -64,21 +65,128 @@ class TargetVersion(Enum):
     RF7 = 7
 
 
+class ContentDigestCollector(ModelVisitor):
+    """Hash of the model content, the same as ``StatementLinesCollector.digest``, without collecting anything else."""
+
+    def __init__(self):
+        self.content_hash = hashlib.blake2b(digest_size=16)
+
+    def visit_Statement(self, node):  # noqa
+        statement = "".join(token.value for token in node.tokens)
+        self.content_hash.update(statement.encode("utf-8", "surrogatepass"))
+
+
+def get_content_digest(model) -> bytes:
+    collector = ContentDigestCollector()
+    collector.visit(model)
+    return collector.content_hash.digest()
+
+
 class StatementLinesCollector(ModelVisitor):
     """
     Used to get writeable presentation of Robot Framework model.
+
+    Together with the text, the hash of the content is calculated. Models are compared using the hash, so the text
+    does not need to be stored if it is not used (``keep_text=False``).
+
+    The hash of the model structure (types of the nodes and tokens without separators, number of lines and errors in
+    statements) is also calculated. If the structure of the model did not change after the transformation,
+    parsing the model text again would result in the same model.
     """
 
-    def __init__(self, model):
-        self.text = ""
+    def __init__(self, model, keep_text: bool = True):
+        self.lines = [] if keep_text else None
+        self.content_hash = hashlib.blake2b(digest_size=16)
+        self.structure_hash = hashlib.blake2b(digest_size=16)
+        self._text = None
         self.visit(model)
 
+    def generic_visit(self, node):
+        self.structure_hash.update(f"{type(node).__name__}(".encode())
+        super().generic_visit(node)
+        self.structure_hash.update(b")")
+
     def visit_Statement(self, node):  # noqa
-        for token in node.tokens:
-            self.text += token.value
+        statement = "".join(token.value for token in node.tokens)
+        self.content_hash.update(statement.encode("utf-8", "surrogatepass"))
+        token_types = ",".join(token.type for token in node.tokens if token.type != Token.SEPARATOR)
+        errors = len(getattr(node, "errors", ()))
+        self.structure_hash.update(f"{type(node).__name__}:{errors}:{statement.count(chr(10))}:{token_types};".encode())
+        if self.lines is not None:
+            self.lines.append(statement)
+
+    @property
+    def text(self) -> str:
+        if self.lines is None:
+            raise ValueError("Text of the model was not collected. Use keep_text=True to collect it.")
+        if self._text is None:
+            self._text = "".join(self.lines)
+            self.lines = [self._text]
+        return self._text
+
+    @property
+    def digest(self) -> bytes:
+        return self.content_hash.digest()
+
+    @property
+    def structure(self) -> bytes:
+        return self.structure_hash.digest()
 
     def __eq__(self, other):
-        return other.text == self.text
+        return other.digest == self.digest
+
+
+class ModelPositionsUpdater(ModelTransformer):
+    """
+    Update line numbers and column offsets of the tokens in the modified model, so they match the positions in the
+    model text (same as if the model text was parsed again).
+
+    Transformers may reuse the same statement or token instance in multiple places - such statements and tokens are
+    replaced by the copies, so each of them can have its own position.
+    """
+
+    def __init__(self):
+        self.lineno = 1
+        self.col_offset = 0
+        self.line_end = None
+        self.seen = set()
+
+    def visit_File(self, node):  # noqa
+        self.lineno = 1
+        self.col_offset = 0
+        self.line_end = None
+        self.seen = set()
+        return self.generic_visit(node)
+
+    def visit_Statement(self, node):  # noqa
+        if id(node) in self.seen:
+            node = type(node)(node.tokens, node.errors)
+        self.seen.add(id(node))
+        tokens = []
+        for token in node.tokens:
+            if id(token) in self.seen:
+                token = Token(token.type, token.value, error=token.error)
+            self.seen.add(id(token))
+            self.update_position(token)
+            tokens.append(token)
+        node.tokens = tuple(tokens)
+        return node
+
+    def update_position(self, token):
+        if not token.value and self.line_end is not None:
+            # empty tokens (such as implicit END of the inline IF) are placed at the end of the previous line
+            token.lineno, token.col_offset = self.line_end
+            return
+        token.lineno = self.lineno
+        token.col_offset = self.col_offset
+        new_lines = token.value.count("\n")
+        if not new_lines:
+            self.col_offset += len(token.value)
+            self.line_end = None
+            return
+        self.lineno += new_lines
+        self.col_offset = len(token.value) - token.value.rindex("\n") - 1
+        self.line_end = (token.lineno, token.col_offset + len(token.value))
 
 
 def validate_regex(value: str | None) -> Pattern | None:
@@ -90,6 +198,8 @@ def validate_regex(value: str | None) -> Pattern | None:
 
 def decorate_diff_with_color(contents: list[str]) -> list[str]:
     """Decorate diff lines with rich console styles."""
+    from rich.markup import escape
+
     lines = []
     for line in contents:
         style = None
@@ -109,9 +219,25 @@ def decorate_diff_with_color(contents: list[str]) -> list[str]:
 
 
 def escape_rich_markup(lines):
+    from rich.markup import escape
+
     return [escape(line) for line in lines]
 
 
+def is_terminal(stream=None) -> bool:
+    """
+    Check if the stream (standard output by default) is displayed in the terminal. Colors can be also forced with
+    ``FORCE_COLOR`` environment variable, the same as in rich.
+    """
+    if os.environ.get("FORCE_COLOR"):
+        return True
+    stream = sys.stdout if stream is None else stream
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
 def normalize_name(name):
     return name.lower().replace("_", "").replace(" ", "")
 
@@ -256,21 +382,150 @@ class RecommendationFinder:
         return norm_cand
 
 
-class ModelWriter(ModelVisitor):
-    def __init__(self, output, newline):
-        self.writer = file_writer(output, newline=newline)
-        self.close_writer = True
+class SourceFile:
+    """
+    Content of the source file, read only once.
+
+    The same bytes are used to check the cache, detect the line endings and the encoding, parse the model and to
+    compare with the formatted code before writing it back.
+    """
+
+    def __init__(self, path, content: bytes):
+        self.path = path
+        self.content = content
+        self.bom = content.startswith(codecs.BOM_UTF8)
+
+    @classmethod
+    def read(cls, path) -> SourceFile:
+        try:
+            with open(path, "rb") as fp:
+                return cls(path, fp.read())
+        except OSError as err:
+            raise DataError(f"{type(err).__name__}: {err}") from None
+
+    @property
+    def text(self) -> str:
+        """Decoded content without the byte order mark. Robot Framework source files are always UTF-8 encoded."""
+        content = self.content[len(codecs.BOM_UTF8) :] if self.bom else self.content
+        try:
+            return content.decode("utf-8")
+        except UnicodeDecodeError as err:
+            raise DataError(f"{type(err).__name__}: {err}") from None
+
+    @property
+    def newline(self) -> str | None:
+        """Line ending of the first line or ``None`` if there is only one line."""
+        match = re.search(rb"\r\n?|\n", self.content)
+        return match.group().decode() if match else None
+
+
+def write_atomically(path, content: bytes, fsync: bool = False):
+    """
+    Write the content to the temporary file in the same directory with a single write and rename it to the path, so
+    the file is never left partially written. Permissions of the existing file are kept. If ``fsync`` is set, the file
+    is flushed to the disk before it is renamed.
+    """
+    real_path = os.path.realpath(path)  # do not replace the symbolic link with the file
+    create_destination_directory(real_path)
+    try:
+        mode = stat.S_IMODE(os.stat(real_path).st_mode)
+    except FileNotFoundError:
+        mode = None
+    if mode is not None and not os.access(real_path, os.W_OK):
+        raise DataError(f"Opening file '{path}' failed: Permission denied")
+    directory, name = os.path.split(real_path)
+    temp_path = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.tmp")
+    try:
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(content)
+                if fsync:
+                    fp.flush()
+                    os.fsync(fp.fileno())
+            if mode is not None:
+                os.chmod(temp_path, mode)
+            os.replace(temp_path, real_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    except OSError:
+        raise DataError(f"Opening file '{path}' failed: {get_error_message()}") from None
+    if fsync:
+        fsync_directory(directory)
+
 
-    def write(self, model):
+def fsync_directory(directory: str):
+    """Flush the directory entries (such as renamed files) to the disk. Not supported on Windows."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def fsync_files(paths: Iterable[str]):
+    """Flush the written files and their directories to the disk in one batch at the end of the run."""
+    directories = set()
+    for path in paths:
+        real_path = os.path.realpath(path)
         try:
-            self.visit(model)
-        finally:
-            if self.close_writer:
-                self.writer.close()
+            with open(real_path, "rb") as fp:
+                os.fsync(fp.fileno())
+        except OSError:
+            continue
+        directories.add(os.path.dirname(real_path))
+    for directory in sorted(directories):
+        fsync_directory(directory)
+
+
+class ModelWriter(ModelVisitor):
+    """
+    Write the model to the output file.
+
+    The model is rendered into one buffer which is written atomically (see ``write_atomically``). If the content of
+    the output file is known (``original``), the file is only written if the content is different. The byte order
+    mark is written if ``bom`` is set, to keep it in the formatted file.
+    """
+
+    def __init__(self, output, newline, original: bytes | None = None, bom: bool = False, fsync: bool = False):
+        self.output = output
+        self.newline = newline
+        self.original = original
+        self.bom = bom
+        self.fsync = fsync
+        self.parts = []
+
+    def render(self, model) -> bytes:
+        """Return the encoded content of the model, as it would be written to the output file."""
+        self.visit(model)
+        content = "".join(self.parts)
+        if self.newline != "\n":
+            content = content.replace("\n", self.newline)
+        encoded = content.encode("utf-8")
+        if self.bom:
+            encoded = codecs.BOM_UTF8 + encoded
+        return encoded
+
+    def write(self, model) -> bool:
+        """Write the model and return ``True`` if the output file was written."""
+        encoded = self.render(model)
+        if encoded == self.original:
+            return False
+        write_atomically(self.output, encoded, self.fsync)
+        return True
 
     def visit_Statement(self, statement):  # noqa
         for token in statement.tokens:
-            self.writer.write(token.value)
+            self.parts.append(token.value)
 
 
 class TestTemplateFinder(ast.NodeVisitor):
@@ -69,5 +69,5 @@ setup(
         ],
         "generate_config": ["tomli_w>=1.0,<1.2"],
     },
-    entry_points={"console_scripts": ["robotidy=robotidy.cli:cli"]},
+    entry_points={"console_scripts": ["robotidy=robotidy.daemon:main"]},
 )
@@ -1,3 +1,5 @@
+import tempfile
+import time
 from pathlib import Path
 
 from invoke import task
@@ -39,6 +41,11 @@ def add_transformer(ctx, name, disabled=False):
     with open(test_dir / "test_transformer.py", "w") as f:
         f.write(test_template)
     _add_transformer_to_internal_list(name)
+    if disabled:
+        print(
+            f"Transformer '{name}' is disabled by default. Add it to TRANSFORMERS_METADATA with enabled=False, "
+            "so it is not imported when it will not run."
+        )
 
 
 def _add_transformer_to_internal_list(name):
@@ -70,3 +77,33 @@ def create_release_docs(ctx, version):
         doc_template = Template(fp.read()).render(version=version)
     with open(release_docs_path, "w") as fp:
         fp.write(doc_template)
+
+
+@task
+def benchmark_discovery(ctx, files=100_000, threads=8):
+    """Measure time of searching for the source files in the synthetic directory tree."""
+    from robotidy.files import DEFAULT_EXCLUDES, get_paths
+    from robotidy.utils.misc import validate_regex
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir, "project")
+        print(f"Creating synthetic directory tree with {files} files in {root}")
+        files_per_dir = 50
+        for index in range(files):
+            directory = root / f"suite_{index // (files_per_dir * 20)}" / f"nested_{index // files_per_dir}"
+            if index % files_per_dir == 0:
+                directory.mkdir(parents=True)
+                (directory / "README.md").touch()
+            suffix = ".resource" if index % 5 == 0 else ".robot"
+            (directory / f"test_{index}{suffix}").touch()
+        (root / ".git").mkdir()
+        for index in range(1000):
+            (root / ".git" / f"object_{index}").touch()
+        (root / ".gitignore").write_text("nested_1/\n*_7.robot\n")
+        for discovery_threads in (1, threads):
+            start = time.perf_counter()
+            found = sum(
+                1 for _ in get_paths((str(root),), validate_regex(DEFAULT_EXCLUDES), None, False, discovery_threads)
+            )
+            elapsed = time.perf_counter() - start
+            print(f"Found {found} files in {elapsed:.2f}s using {discovery_threads} thread(s)")
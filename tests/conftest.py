@@ -16,3 +16,9 @@ def pytest_collection_modifyitems(config, items):
     for item in items:
         if "e2e" in item.keywords:
             item.add_marker(skip_e2e)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Do not share formatting cache between the tests and with the user cache directory."""
+    monkeypatch.setenv("ROBOTIDY_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
@@ -1,8 +1,21 @@
+from __future__ import annotations
+
+import io
+import os
 from pathlib import Path
 
+import pytest
 from robot.api import get_model
 
-from robotidy.api import transform_model
+from robotidy.api import Formatter, transform_model
+from robotidy.transformers import TransformConfig
+from robotidy.utils import misc
+
+SOURCE = "*** test cases ***\nTest\n  Keyword  argument\n"
+
+
+def get_transform_config(config: str) -> list[TransformConfig]:
+    return [TransformConfig(config, force_include=True, custom_transformer=False, is_config=False)]
 
 
 class TestAPI:
@@ -99,3 +112,53 @@ class TestAPI:
         model = get_model(source)
         transformed = transform_model(model, config_path, separator="tab")
         assert transformed == expected
+
+    @pytest.mark.skipif(not misc.rf_supports_lang(), reason="Languages are supported in RF 6.0+")
+    def test_translate_bdd(self, tmp_path):
+        model = get_model(io.StringIO("*** Test Cases ***\nTest\n    Given Keyword\n"))
+        transform = get_transform_config("Translate:language=pl:translate_bdd=True")
+        transformed = transform_model(model, str(tmp_path), transform=transform)
+        assert transformed == "*** Przypadki Testowe ***\nTest\n    Mając Keyword\n"
+
+
+class TestFormatter:
+    def test_format_string(self, tmp_path):
+        formatter = Formatter()
+        formatted = formatter.format_string(SOURCE, tmp_path / "test.robot")
+        assert formatted == "*** Test Cases ***\nTest\n    Keyword    argument\n"
+        assert formatter.format_string(formatted, tmp_path / "test.robot") is None
+
+    def test_format_model(self, tmp_path):
+        source = tmp_path / "test.robot"
+        source.write_text(SOURCE)
+        formatted = Formatter(spacecount=2).format_model(get_model(source))
+        assert formatted == "*** Test Cases ***\nTest\n  Keyword  argument\n"
+
+    @pytest.mark.skipif(not misc.rf_supports_lang(), reason="Languages are supported in RF 6.0+")
+    def test_format_localized_model(self):
+        source = "language: pl\n\n*** Przypadki Testowe ***\nTest\n  Mając  Keyword\n"
+        formatted = Formatter().format_model(get_model(io.StringIO(source)))
+        assert formatted == "language: pl\n\n*** Przypadki Testowe ***\nTest\n    Mając    Keyword\n"
+
+    @pytest.mark.skipif(not misc.rf_supports_lang(), reason="Languages are supported in RF 6.0+")
+    def test_format_model_with_translate(self):
+        formatter = Formatter(transform=get_transform_config("Translate:translate_bdd=True"))
+        source = "language: pl\n\n*** Przypadki Testowe ***\nTest\n    Mając Keyword\n"
+        formatted = formatter.format_model(get_model(io.StringIO(source)))
+        assert formatted == "language: pl\n\n*** Test Cases ***\nTest\n    Given Keyword\n"
+        # languages of the previous model are not used for the next one
+        source = "*** Test Cases ***\nTest\n    Mając Keyword\n"
+        assert formatter.format_model(get_model(io.StringIO(source))) is None
+
+    def test_configuration_reused_until_modified(self, tmp_path):
+        config_path = tmp_path / "robotidy.toml"
+        config_path.write_text("[tool.robotidy]\nspacecount = 2\n")
+        formatter = Formatter()
+        assert formatter.format_string(SOURCE, tmp_path / "test.robot").endswith("\n  Keyword  argument\n")
+        transformers = formatter.get_robotidy(tmp_path / "test.robot").config.transformers
+        assert formatter.format_string(SOURCE, tmp_path / "other.robot").endswith("\n  Keyword  argument\n")
+        assert formatter.get_robotidy(tmp_path / "other.robot").config.transformers is transformers
+        config_path.write_text("[tool.robotidy]\nspacecount = 8\n")
+        modified = config_path.stat().st_mtime_ns + 1_000_000_000
+        os.utime(config_path, ns=(modified, modified))
+        assert formatter.format_string(SOURCE, tmp_path / "test.robot").endswith("\n        Keyword        argument\n")
@@ -0,0 +1,87 @@
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+from robotidy.cache import Cache, get_digest
+
+from .utils import run_tidy
+
+TEST_DATA_DIR = Path(__file__).parent / "testdata"
+TRANSFORM = ["--transform", "NormalizeSectionHeaderName"]
+
+
+class TestCache:
+    def test_empty_cache(self, tmp_path):
+        cache = Cache(tmp_path / "cache.bin")
+        assert len(cache) == 0
+        assert get_digest(b"content") not in cache
+        assert None not in cache
+
+    def test_write_and_read(self, tmp_path):
+        digests = [get_digest(str(index).encode()) for index in range(100)]
+        cache = Cache(tmp_path / "nested" / "cache.bin")
+        for digest in digests:
+            cache.add(digest)
+        cache.write()
+        cache = Cache(tmp_path / "nested" / "cache.bin")
+        assert len(cache) == 100
+        assert all(digest in cache for digest in digests)
+        assert get_digest(b"other") not in cache
+
+    def test_invalid_cache_file(self, tmp_path):
+        cache_path = tmp_path / "cache.bin"
+        cache_path.write_bytes(b"not a cache")
+        assert len(Cache(cache_path)) == 0
+
+    def test_concurrent_writers_are_merged(self, tmp_path):
+        cache_path = tmp_path / "cache.bin"
+        first, second = Cache(cache_path), Cache(cache_path)
+        first.add(get_digest(b"first"))
+        second.add(get_digest(b"second"))
+        first.write()
+        second.write()
+        cache = Cache(cache_path)
+        assert get_digest(b"first") in cache
+        assert get_digest(b"second") in cache
+
+    def test_least_recently_used_are_evicted(self, tmp_path):
+        cache_path = tmp_path / "cache.bin"
+        cache = Cache(cache_path, max_entries=2)
+        for index, name in enumerate((b"oldest", b"older", b"newest")):
+            cache.used[get_digest(name)] = index
+        cache.write()
+        cache = Cache(cache_path)
+        assert len(cache) == 2
+        assert get_digest(b"oldest") not in cache
+        assert get_digest(b"newest") in cache
+
+
+class TestCacheCli:
+    def run_check(self, source, *args):
+        return run_tidy(["--check", "--workers", "1", *TRANSFORM, *args, str(source)], exit_code=0)
+
+    def test_formatted_file_is_not_parsed_again(self, tmp_path):
+        source = tmp_path / "golden.robot"
+        shutil.copy(TEST_DATA_DIR / "check" / "golden.robot", source)
+        self.run_check(source)
+        with patch("robotidy.app.Robotidy.get_model") as mock_get_model:
+            result = self.run_check(source)
+            mock_get_model.assert_not_called()
+        assert "0 files would be reformatted, 1 file would be left unchanged." in result.output
+
+    def test_modified_file_is_parsed(self, tmp_path):
+        source = tmp_path / "golden.robot"
+        shutil.copy(TEST_DATA_DIR / "check" / "golden.robot", source)
+        self.run_check(source)
+        source.write_text(source.read_text() + "\n*** settings ***\n")
+        result = run_tidy(["--check", "--workers", "1", *TRANSFORM, str(source)], exit_code=1)
+        assert f"Would reformat {source}" in result.output
+
+    def test_no_cache(self, tmp_path):
+        source = tmp_path / "golden.robot"
+        shutil.copy(TEST_DATA_DIR / "check" / "golden.robot", source)
+        cache_dir = tmp_path / "cache"
+        self.run_check(source, "--no-cache", "--cache-dir", str(cache_dir))
+        assert not cache_dir.exists()
+        self.run_check(source, "--cache-dir", str(cache_dir))
+        assert len(list(cache_dir.glob("cache.*.bin"))) == 1
@@ -1,21 +1,27 @@
+import io
 import os
 import re
 import shutil
+import subprocess
+import tarfile
+import zipfile
 from contextlib import contextmanager
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
-from click import FileError, NoSuchOption
+from click import BadParameter, FileError, NoSuchOption
 
-from robotidy import skip
+from robotidy import app, skip
+from robotidy.app import Robotidy
 from robotidy.config import RawConfig
 from robotidy.files import DEFAULT_EXCLUDES, find_project_root, get_paths, load_toml_file, read_pyproject_config
+from robotidy.pipeline import fuse_transformers
 from robotidy.transformers.aligners_core import AlignKeywordsTestsSection
 from robotidy.transformers.AlignSettingsSection import AlignSettingsSection
 from robotidy.utils import misc
 
-from .utils import run_tidy
+from .utils import init_git_repo, run_tidy
 
 TEST_DATA_DIR = Path(__file__).parent / "testdata"
 
@@ -213,6 +219,30 @@ class TestCli:
             RawConfig().from_config_file(config_file, config_path)
         assert f"No such option: {option}" in str(err)
 
+    @pytest.mark.parametrize(
+        "option, value",
+        [("workers", 0), ("workers", "many"), ("discovery_threads", -1), ("discover", "find"), ("fsync", "all")],
+    )
+    def test_read_invalid_option_value_config(self, option, value, tmp_path):
+        with pytest.raises(BadParameter) as err:
+            RawConfig().from_config_file({option: value}, tmp_path / "pyproject.toml")
+        assert f"Invalid value for '{option}' in the configuration file" in err.value.format_message()
+
+    def test_read_invalid_cache_dir_config(self, tmp_path):
+        cache_file = tmp_path / "cache"
+        cache_file.touch()
+        with pytest.raises(BadParameter) as err:
+            RawConfig().from_config_file({"cache_dir": str(cache_file)}, tmp_path / "pyproject.toml")
+        assert "is a file" in err.value.format_message()
+
+    def test_read_option_values_config(self, tmp_path):
+        config = {"workers": 2, "discover": "git", "cache_dir": str(tmp_path), "fsync": "batch"}
+        raw_config = RawConfig().from_config_file(config, tmp_path / "pyproject.toml")
+        assert raw_config.workers == 2
+        assert raw_config.discover == "git"
+        assert raw_config.cache_dir == tmp_path
+        assert raw_config.fsync == "batch"
+
     @pytest.mark.parametrize("flag", ["--list", "-l"])
     @pytest.mark.parametrize("target_version", ["4", "5", None])
     def test_list_transformers(self, flag, target_version):
@@ -356,6 +386,183 @@ class TestCli:
                 mock_writer.assert_not_called()
             assert expected_output in result.output
 
+    @pytest.mark.parametrize("workers", ["1", "2"])
+    def test_check_fail_fast(self, tmp_path, workers):
+        sources = [tmp_path / f"test{index}.robot" for index in range(6)]
+        for source in sources:
+            source.write_text("*** Test Cases ***\nTest\n    Keyword    ${arg}\n")
+        sources[2].write_text("*** Test Cases ***\nTest\n    Keyword  ${arg}\n")
+        sources[4].write_text("*** test cases ***\nTest\n    Keyword    ${arg}\n")
+        result = run_tidy(
+            ["--check", "--fail-fast", "--no-cache", "--workers", workers, str(tmp_path)],
+            exit_code=1,
+            overwrite_input=True,
+        )
+        assert f"Would reformat {sources[2]} (changed by NormalizeSeparators)\n" in result.output
+        assert str(sources[4]) not in result.output
+        assert "\n1 file would be reformatted, 2 files would be left unchanged.\n" in result.output
+
+    @pytest.mark.parametrize(
+        "files, workers, parallel", [(2, [], False), (app.PARALLEL_MIN_SOURCES, [], True), (2, ["--workers", "2"], True)]
+    )
+    def test_parallel_only_with_enough_files_by_default(self, tmp_path, files, workers, parallel):
+        for index in range(files):
+            (tmp_path / f"test{index}.robot").write_text("*** Test Cases ***\nTest\n    Keyword\n")
+        transform_in_pool = Robotidy.transform_in_pool
+        with patch.object(
+            Robotidy, "transform_in_pool", autospec=True, side_effect=transform_in_pool
+        ) as mock_pool, patch("robotidy.app.os.cpu_count", return_value=2):
+            run_tidy(["--check", "--no-cache", *workers, str(tmp_path)], overwrite_input=True)
+        assert mock_pool.called == parallel
+
+    def test_check_fail_fast_reverted_changes(self, tmp_path):
+        # NormalizeSeparators changes the aligned settings, but AlignSettingsSection aligns them again
+        source = tmp_path / "test.robot"
+        source.write_text(
+            "*** Settings ***\nLibrary     Collections\nResource    a.resource\n\n\n*** Test Cases ***\nTest\n    Keyword\n"
+        )
+        result = run_tidy(["--check", "--fail-fast", "--no-cache", str(source)])
+        assert "\n0 files would be reformatted, 1 file would be left unchanged.\n" in result.output
+
+    def test_fail_fast_requires_check(self, tmp_path):
+        source = tmp_path / "test.robot"
+        source.write_text("*** test cases ***\nTest\n    Keyword\n")
+        run_tidy(["--fail-fast", "--no-cache", str(source)], exit_code=2, overwrite_input=True)
+        assert source.read_text() == "*** test cases ***\nTest\n    Keyword\n"
+
+    def test_check_fail_fast_tracks_only_changed_file(self, tmp_path):
+        formatted, changed = tmp_path / "a.robot", tmp_path / "b.robot"
+        formatted.write_text("*** Test Cases ***\nTest\n    Keyword    ${arg}\n")
+        changed.write_text("*** Test Cases ***\nTest\n    Keyword  ${arg}\n")
+        find_changing_transformer = Robotidy.find_changing_transformer
+        with patch("robotidy.app.pipeline.fuse_transformers", wraps=fuse_transformers) as mock_fuse, patch.object(
+            Robotidy, "find_changing_transformer", autospec=True, side_effect=find_changing_transformer
+        ) as mock_find:
+            result = run_tidy(["--check", "--fail-fast", "--no-cache", str(tmp_path)], exit_code=1)
+        assert f"Would reformat {changed} (changed by NormalizeSeparators)\n" in result.output
+        assert mock_fuse.call_count == 2  # both files are transformed with the fused transformers
+        assert mock_find.call_count == 1
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+    @pytest.mark.parametrize("workers", ["1", "2"])
+    def test_diff_against(self, tmp_path, workers):
+        source = "*** Test Cases ***\nTest\n    Step  1\n    Step  2\n\nOther\n    Step  3\n"
+        changed, not_changed = tmp_path / "changed.robot", tmp_path / "not_changed.robot"
+        changed.write_text(source)
+        not_changed.write_text(source)
+        init_git_repo(tmp_path)
+        with switch_cwd(tmp_path):
+            changed.write_text(source.replace("Step  2", "Step  22"))
+            untracked = tmp_path / "untracked.robot"
+            untracked.write_text(source)
+            result = run_tidy(["--diff-against", "HEAD", "--no-cache", "--workers", workers, "."], overwrite_input=True)
+        assert str(not_changed) not in result.output
+        assert not_changed.read_text() == source
+        assert changed.read_text() == source.replace("Step  2", "Step    22")
+        assert untracked.read_text() == (
+            "*** Test Cases ***\nTest\n    Step    1\n    Step    2\n\nOther\n    Step    3\n"
+        )
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+    def test_git_rev_and_git_index(self, tmp_path):
+        formatted = "*** Test Cases ***\nTest\n  Keyword  ${arg}\n"
+        (tmp_path / "nested").mkdir()
+        (tmp_path / "nested" / "test.robot").write_text(formatted)
+        (tmp_path / "nested" / "other.robot").write_text(formatted)
+        (tmp_path / "nested" / "robotidy.toml").write_text("[tool.robotidy]\nspacecount = 2\n")
+        init_git_repo(tmp_path)
+        with switch_cwd(tmp_path):
+            (tmp_path / "nested" / "robotidy.toml").write_text("[tool.robotidy]\nspacecount = 4\n")
+            subprocess.run(["git", "add", "."], check=True)
+            (tmp_path / "nested" / "test.robot").write_text("*** test cases ***\nTest\n  Keyword  ${arg}\n")
+            # worker processes use the configuration files read by the main process
+            from_rev = run_tidy(["--git-rev", "HEAD", "--no-cache", "--workers", "2", "."], overwrite_input=True)
+            from_index = run_tidy(["--git-index", "--diff", "--no-cache", "nested"], exit_code=1)
+        assert "0 files would be reformatted, 2 files would be left unchanged." in from_rev.output
+        assert "Would reformat :nested/test.robot\n" in from_index.output
+        assert "+    Keyword    ${arg}\n" in from_index.output
+        assert (tmp_path / "nested" / "test.robot").read_text() == "*** test cases ***\nTest\n  Keyword  ${arg}\n"
+
+    @pytest.mark.parametrize("archive_name", ["suites.zip", "suites.tar", "suites.tar.gz"])
+    def test_archive_source(self, tmp_path, archive_name):
+        members = {
+            "a.robot": b"*** test cases ***\nTest\n    Keyword\n",
+            "readme.txt": b"*** test cases ***\n",
+            "nested/b.resource": b"*** Keywords ***\nKeyword\n    No Operation\n",
+        }
+        archive_path = tmp_path / archive_name
+        if archive_name.endswith(".zip"):
+            with zipfile.ZipFile(archive_path, "w") as archive:
+                for name, content in members.items():
+                    archive.writestr(name, content)
+        else:
+            with tarfile.open(archive_path, "w:gz" if archive_name.endswith(".gz") else "w") as archive:
+                for name, content in members.items():
+                    info = tarfile.TarInfo(name)
+                    info.size = len(content)
+                    archive.addfile(info, io.BytesIO(content))
+        checked = run_tidy(["--check", "--no-cache", str(archive_path)], exit_code=1)
+        assert f"Would reformat {archive_path}:a.robot\n" in checked.output
+        assert "1 file would be reformatted, 1 file would be left unchanged." in checked.output
+        run_tidy(["--no-cache", "--workers", "2", str(archive_path)], overwrite_input=True)
+        if archive_name.endswith(".zip"):
+            with zipfile.ZipFile(archive_path) as archive:
+                formatted = {name: archive.read(name) for name in archive.namelist()}
+        else:
+            with tarfile.open(archive_path) as archive:
+                formatted = {info.name: archive.extractfile(info).read() for info in archive}
+        assert formatted == {**members, "a.robot": b"*** Test Cases ***\nTest\n    Keyword\n"}
+        assert list(formatted) == list(members)
+
+    @staticmethod
+    def create_encrypted_zip(archive_path, members: dict, encrypted: str):
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            for name, content in members.items():
+                archive.writestr(name, content)
+        data = bytearray(archive_path.read_bytes())
+        # set the encryption flag of the member in the central directory, which is checked before reading the member
+        header = data.find(b"PK\x01\x02")
+        while header != -1:
+            name_length = int.from_bytes(data[header + 28 : header + 30], "little")
+            if data[header + 46 : header + 46 + name_length] == encrypted.encode():
+                data[header + 8] |= 0x01
+            header = data.find(b"PK\x01\x02", header + 4)
+        archive_path.write_bytes(bytes(data))
+
+    @pytest.mark.parametrize("corrupted", ["encrypted", "not_zip"])
+    def test_unreadable_archive_skipped(self, tmp_path, corrupted):
+        archive_path = tmp_path / "suites.zip"
+        members = {"a.robot": b"*** test cases ***\nTest\n    Keyword\n", "b.robot": b"*** Test Cases ***\n"}
+        if corrupted == "encrypted":
+            self.create_encrypted_zip(archive_path, members, encrypted="b.robot")
+        else:
+            archive_path.write_bytes(b"PK\x03\x04not a zip file")
+        original = archive_path.read_bytes()
+        source = tmp_path / "test.robot"
+        source.write_text("*** test cases ***\nTest\n    Keyword\n")
+        result = run_tidy(["--no-cache", str(archive_path), str(source)], overwrite_input=True)
+        assert f"Reading archive '{archive_path}' failed: " in result.stderr
+        assert "Skipping archive" in result.stderr
+        assert archive_path.read_bytes() == original
+        assert source.read_text() == "*** Test Cases ***\nTest\n    Keyword\n"
+
+    def test_source_file_opened_once(self, tmp_path):
+        source = tmp_path / "test.robot"
+        source.write_bytes(b"*** test cases ***\r\nTest\r\n    Keyword\r\n")
+        with patch("builtins.open", wraps=open) as mock_open:
+            run_tidy(["--lineseparator", "auto", "--no-cache", str(source)], overwrite_input=True)
+        source_opened = [call for call in mock_open.call_args_list if str(call.args[0]) == str(source)]
+        assert len(source_opened) == 1  # formatted file is written to the temporary file and renamed
+        assert source.read_bytes() == b"*** Test Cases ***\r\nTest\r\n    Keyword\r\n"
+
+    def test_fsync_batch(self, tmp_path):
+        formatted, not_formatted = tmp_path / "formatted.robot", tmp_path / "not_formatted.robot"
+        formatted.write_text("*** Test Cases ***\nTest\n    Keyword\n")
+        not_formatted.write_text("*** test cases ***\nTest\n    Keyword\n")
+        with patch("robotidy.utils.misc.fsync_files") as mock_fsync:
+            run_tidy(["--fsync", "batch", "--no-cache", "--workers", "1", str(tmp_path)], overwrite_input=True)
+        mock_fsync.assert_called_once_with([str(not_formatted)])
+
     def test_read_only_file(self):
         source = TEST_DATA_DIR / "read_only" / "test.robot"
         # change file permission to read-only
@@ -375,19 +582,57 @@ class TestCli:
         if color_flag:
             command.append(color_flag)
         command.extend(["--transform", "NormalizeSectionHeaderName", str(source)])
-        with patch.dict("os.environ", mocked_env), patch("robotidy.utils.misc.decorate_diff_with_color") as mock_color:
+        with patch.dict("os.environ", mocked_env), patch(
+            "robotidy.utils.misc.decorate_diff_with_color"
+        ) as mock_color, patch("robotidy.utils.misc.is_terminal", return_value=True):
             run_tidy(command)
             if should_be_colored:
                 mock_color.assert_called()
             else:
                 mock_color.assert_not_called()
 
+    def test_diff_not_colored_if_not_terminal(self):
+        source = TEST_DATA_DIR / "check" / "not_golden.robot"
+        with patch("robotidy.utils.misc.decorate_diff_with_color") as mock_color:
+            result = run_tidy(["--diff", "--no-overwrite", "--transform", "NormalizeSectionHeaderName", str(source)])
+        mock_color.assert_not_called()
+        header = f"--- {source}\tbefore\n+++ {source}\tafter\n@@ -1,2 +1,2 @@\n-*** settings ***\n".expandtabs(8)
+        assert header in result.output
+
     def test_diff(self):
         source = TEST_DATA_DIR / "check" / "not_golden.robot"
         result = run_tidy(["--diff", "--no-overwrite", "--transform", "NormalizeSectionHeaderName", str(source)])
         assert "*** settings ***" in result.output
         assert "*** Settings ***" in result.output
 
+    def test_parallel_output_same_as_serial(self):
+        source = TEST_DATA_DIR / "check"
+        command = ["--check", "--diff", "--no-color", "--transform", "NormalizeSectionHeaderName", str(source)]
+        serial = run_tidy(["--workers", "1", *command], exit_code=1)
+        parallel = run_tidy(["--workers", "2", *command], exit_code=1)
+        assert f"Would reformat {source / 'not_golden.robot'}" in parallel.output
+        assert "\n1 file would be reformatted, 1 file would be left unchanged.\n" in parallel.output
+        assert serial.output == parallel.output
+
+    @pytest.mark.skipif(not misc.rf_supports_lang(), reason="Languages are supported in RF 6.0+")
+    def test_language_header_not_shared_between_files(self, tmp_path):
+        source = "*** Ustawienia ***\nDokumentacja    doc\n\n*** Przypadki Testowe ***\nTest\n    Log    1\n"
+        (tmp_path / "a.robot").write_text(f"language: pl\n\n{source}")
+        (tmp_path / "b.robot").write_text(source)
+        command = [
+            "--check",
+            "--diff",
+            "--no-color",
+            "--no-cache",
+            "--transform",
+            "Translate:language=en",
+            str(tmp_path),
+        ]
+        serial = run_tidy(["--workers", "1", *command], exit_code=1, overwrite_input=True)
+        parallel = run_tidy(["--workers", "2", *command], exit_code=1, overwrite_input=True)
+        assert serial.output == parallel.output
+        assert re.findall(r"Would reformat (.+)", serial.output) == [str(tmp_path / "a.robot")]
+
     @pytest.mark.parametrize("line_sep", ["unix", "windows", "native", None])
     def test_line_sep(self, line_sep):
         source = TEST_DATA_DIR / "line_sep" / "test.robot"
@@ -428,7 +673,140 @@ class TestCli:
             extend_exclude=misc.validate_regex(extend_exclude),
             skip_gitignore=skip_gitignore,
         )
-        assert paths == allowed_paths
+        assert set(paths) == allowed_paths
+
+    def test_get_paths_sorted_and_without_duplicates(self, tmp_path):
+        for path in ("b.robot", "a/nested.robot", "a.robot", "a/b/deep.resource", "c.txt"):
+            (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / path).touch()
+        paths = get_paths(
+            (str(tmp_path), str(tmp_path / "b.robot"), "-"),
+            exclude=misc.validate_regex(DEFAULT_EXCLUDES),
+            extend_exclude=None,
+            skip_gitignore=True,
+        )
+        first = next(paths)
+        assert first == tmp_path / "a.robot"
+        assert [first, *paths] == [
+            tmp_path / "a.robot",
+            tmp_path / "a" / "b" / "deep.resource",
+            tmp_path / "a" / "nested.robot",
+            tmp_path / "b.robot",
+            "-",
+        ]
+
+    @pytest.mark.parametrize("threads", [None, 4])
+    def test_get_paths_does_not_walk_excluded_directories(self, tmp_path, threads):
+        for path in ("test.robot", "ignored/test.robot", "excluded/test.robot", "nested/ignored/test.robot"):
+            (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / path).touch()
+        (tmp_path / ".gitignore").write_text("ignored/\n")
+        scanned = []
+        scandir = os.scandir
+        with patch("robotidy.files.os.scandir", side_effect=lambda path: scanned.append(path) or scandir(path)):
+            paths = list(
+                get_paths(
+                    (str(tmp_path),),
+                    exclude=misc.validate_regex("/excluded/"),
+                    extend_exclude=None,
+                    skip_gitignore=False,
+                    threads=threads,
+                )
+            )
+        assert paths == [tmp_path / "test.robot"]
+        assert sorted(scanned) == [str(tmp_path), str(tmp_path / "nested")]
+
+    @pytest.mark.parametrize("skip_gitignore", [True, False])
+    def test_get_paths_from_changed_files_same_as_walked(self, tmp_path, skip_gitignore):
+        files = (
+            "a.robot",
+            "a/b.robot",
+            "a/b/c.resource",
+            "a/b/d.txt",
+            "dir.robot/e.robot",
+            "excluded/f.robot",
+            "ignored/g.robot",
+            "nested/.gitignore",
+            "nested/ignored.robot",
+            "nested/ok.robot",
+            "nested/sub/ignored.robot",
+        )
+        for path in files:
+            (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / path).write_text("ignored.robot\n" if path == "nested/.gitignore" else "")
+        (tmp_path / ".gitignore").write_text("ignored/\n")
+        options = {
+            "exclude": misc.validate_regex("/excluded/"),
+            "extend_exclude": misc.validate_regex("c.resource"),
+            "skip_gitignore": skip_gitignore,
+        }
+        walked = list(get_paths((str(tmp_path / "nested" / "ok.robot"), str(tmp_path)), **options))
+        assert tmp_path / "dir.robot" / "e.robot" in walked
+        changed_files = [tmp_path / path for path in files] + [tmp_path / "removed.robot"]
+        with patch("robotidy.files.os.scandir") as mock_scandir:
+            changed = list(
+                get_paths(
+                    (str(tmp_path / "nested" / "ok.robot"), str(tmp_path)), changed_files=changed_files, **options
+                )
+            )
+        mock_scandir.assert_not_called()
+        assert changed == walked
+        changed = list(get_paths((str(tmp_path),), changed_files=[tmp_path / "a" / "b.robot"], **options))
+        assert changed == [tmp_path / "a" / "b.robot"]
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+    @pytest.mark.parametrize("skip_gitignore", [True, False])
+    def test_get_paths_from_git_same_as_walked(self, tmp_path, skip_gitignore):
+        files = (
+            "a.robot",
+            "a-b.robot",
+            "a/b.robot",
+            "a/b/c.resource",
+            "a/b/d.txt",
+            "dir.robot/e.robot",
+            "excluded/f.robot",
+            "ignored/g.robot",
+            "nested/.gitignore",
+            "nested/ignored.robot",
+            "nested/ok.robot",
+            "nested/removed.robot",
+        )
+        for path in files:
+            (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / path).write_text("ignored.robot\n" if path == "nested/.gitignore" else "")
+        (tmp_path / ".gitignore").write_text("ignored/\n")
+        init_git_repo(tmp_path)
+        (tmp_path / "nested" / "removed.robot").unlink()
+        (tmp_path / "untracked.robot").touch()
+        options = {
+            "exclude": misc.validate_regex("/excluded/"),
+            "extend_exclude": misc.validate_regex("c.resource"),
+            "skip_gitignore": skip_gitignore,
+        }
+        walked = list(get_paths((str(tmp_path),), **options))
+        with patch("robotidy.files.os.scandir") as mock_scandir:
+            from_git = list(get_paths((str(tmp_path),), discover="git", **options))
+        mock_scandir.assert_not_called()
+        assert from_git == walked
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+    def test_changed_since_and_staged(self, tmp_path):
+        source = "*** test cases ***\nTest\n    Keyword\n"
+        for path in ("not_changed.robot", "changed.robot", "staged.robot", "ignored/changed.robot"):
+            (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / path).write_text(source)
+        init_git_repo(tmp_path)
+        with switch_cwd(tmp_path):
+            (tmp_path / ".gitignore").write_text("ignored/\n")
+            for path in ("changed.robot", "staged.robot", "ignored/changed.robot", "untracked.robot"):
+                (tmp_path / path).write_text(source + "    Keyword\n")
+            subprocess.run(["git", "add", "staged.robot"], check=True)
+            changed_since = run_tidy(["--check", "--no-cache", "--changed-since", "HEAD", "."], exit_code=1)
+            staged = run_tidy(["--check", "--no-cache", "--staged", "."], exit_code=1)
+        assert re.findall(r"Would reformat (.+)", changed_since.output) == [
+            str(tmp_path / name) for name in ("changed.robot", "staged.robot", "untracked.robot")
+        ]
+        assert re.findall(r"Would reformat (.+)", staged.output) == [str(tmp_path / "staged.robot")]
 
     @pytest.mark.parametrize(
         "source, should_parse, summary",
@@ -1,6 +1,13 @@
+from __future__ import annotations
+
+import os
+
 import pytest
 
-from robotidy.config import FormattingConfig
+from robotidy.config import ConfigCache, FormattingConfig, MainConfig, RawConfig
+from robotidy.utils import misc
+
+from .utils import run_tidy
 
 
 @pytest.mark.parametrize(
@@ -30,3 +37,88 @@ def test_spacecount_and_indents(configure, expected):
     assert formatting.separator == exp_spacecount * " "
     assert formatting.indent == exp_indent * " "
     assert formatting.continuation_indent == exp_cont_indent * " "
+
+
+class TestConfigCache:
+    def test_config_reused_between_runs(self, tmp_path):
+        config_cache = ConfigCache()
+        first = MainConfig(RawConfig(src=("first.robot",)), config_cache=config_cache)
+        second = MainConfig(RawConfig(src=("second.robot",), workers=2), config_cache=config_cache)
+        assert second.default_loaded is first.default_loaded
+        other = MainConfig(RawConfig(src=("first.robot",), spacecount=2), config_cache=config_cache)
+        assert other.default_loaded is not first.default_loaded
+
+    def test_config_file_read_again_if_modified(self, tmp_path):
+        config_path = tmp_path / "robotidy.toml"
+        config_path.write_text("[tool.robotidy]\nspacecount = 2\n")
+        config_cache = ConfigCache()
+        first = MainConfig(RawConfig(config=str(config_path)), config_cache=config_cache)
+        assert first.default_loaded.formatting.space_count == 2
+        config_path.write_text("[tool.robotidy]\nspacecount = 8\n")
+        modified = config_path.stat().st_mtime_ns + 1_000_000_000
+        os.utime(config_path, ns=(modified, modified))
+        second = MainConfig(RawConfig(config=str(config_path)), config_cache=config_cache)
+        assert second.default_loaded.formatting.space_count == 8
+
+
+class TestTransformersPool:
+    @staticmethod
+    def create_project(tmp_path, configs: dict[str, str]):
+        (tmp_path / ".git").mkdir()
+        for directory, config in configs.items():
+            (tmp_path / directory).mkdir()
+            (tmp_path / directory / "robotidy.toml").write_text(f"[tool.robotidy]\n{config}")
+            (tmp_path / directory / "test.robot").write_text("*** Test Cases ***\nTest\n    Keyword\n")
+
+    def test_transformers_shared_between_identical_configs(self, tmp_path, monkeypatch):
+        self.create_project(
+            tmp_path,
+            {
+                "first": 'configure = ["NormalizeSeparators:skip_documentation=True"]\n',
+                "second": 'configure = ["NormalizeSeparators:skip_documentation=True"]\n',
+                "other": 'configure = ["NormalizeSeparators:skip_documentation=False"]\n',
+            },
+        )
+        monkeypatch.chdir(tmp_path)
+        main_config = MainConfig(RawConfig(src=(str(tmp_path),)))
+        configs = {source.parent.name: config for source, config in main_config.get_sources_with_configs()}
+        assert configs["first"] is not configs["second"]
+        assert configs["first"].config_directory != configs["second"].config_directory
+        assert configs["first"].transformers is configs["second"].transformers
+        assert configs["first"].transformers_lookup is configs["second"].transformers_lookup
+        assert configs["first"].fingerprint == configs["second"].fingerprint
+        assert configs["first"].transformers is not configs["other"].transformers
+        assert len(main_config.transformers_pool.transformers) == 3  # default configuration and two distinct ones
+
+    def test_distinct_configurations_reported_with_verbose(self, tmp_path, monkeypatch):
+        self.create_project(tmp_path, {"first": "spacecount = 2\n", "second": "spacecount = 2\n"})
+        monkeypatch.chdir(tmp_path)
+        result = run_tidy(["--check", "--verbose", str(tmp_path)], exit_code=1)
+        assert "Used 2 configurations with 1 distinct transformers setup" in result.output
+
+    @pytest.mark.skipif(not misc.rf_supports_lang(), reason="Languages are supported in RF 6.0+")
+    def test_languages_not_shared_between_files(self, tmp_path, monkeypatch):
+        self.create_project(tmp_path, {"first": 'language = "pl"\n', "second": 'language = "pl"\n'})
+        monkeypatch.chdir(tmp_path)
+        main_config = MainConfig(RawConfig(src=(str(tmp_path),)))
+        configs = {source.parent.name: config for source, config in main_config.get_sources_with_configs()}
+        assert isinstance(configs["first"].language, tuple)
+        first, second = configs["first"].get_file_languages(), configs["second"].get_file_languages()
+        first.add_language("de")
+        assert "de" not in [language.code for language in second]
+        assert "de" not in [language.code for language in configs["first"].get_file_languages()]
+
+    @pytest.mark.skipif(not misc.rf_supports_lang(), reason="Languages are supported in RF 6.0+")
+    @pytest.mark.parametrize("language", [[], ["pl"]])
+    def test_file_languages_same_as_configured(self, language):
+        from robot.api import Languages, get_model
+        from robot.parsing.model import SettingSection
+
+        main_config = MainConfig(RawConfig(language=language))
+        file_languages = main_config.default_loaded.get_file_languages()
+        expected = Languages(language)
+        assert [lang.code for lang in file_languages] == [lang.code for lang in expected]
+        assert file_languages.headers == expected.headers  # with English singular headers from RF 6.1
+        assert file_languages.settings == expected.settings
+        model = get_model("*** Setting ***\nLibrary    Collections\n", lang=file_languages)
+        assert isinstance(model.sections[0], SettingSection)
@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from robotidy import daemon
+
+from .utils import run_tidy
+
+TEST_DATA_DIR = Path(__file__).parent / "testdata"
+
+
+@pytest.fixture
+def daemon_server():
+    server = daemon.DaemonServer()
+    daemon.write_state(server.get_state())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    daemon.remove_state(server.token)
+
+
+class TestDaemon:
+    def test_no_daemon_running(self):
+        assert daemon.run_in_daemon(["--check", str(TEST_DATA_DIR / "check")]) is None
+
+    def test_daemon_not_responding(self, daemon_server):
+        daemon_server.shutdown()
+        daemon_server.server_close()
+        assert daemon.run_in_daemon(["--check", str(TEST_DATA_DIR / "check")]) is None
+
+    def test_run_in_daemon_same_as_in_cli(self, daemon_server, capsys):
+        args = ["--check", "--diff", "--no-color", "--no-cache", str(TEST_DATA_DIR / "check")]
+        expected = run_tidy(args, exit_code=1, overwrite_input=True)
+        assert daemon.run_in_daemon(args) == 1
+        assert capsys.readouterr().out == expected.stdout
+        loaded_configs = dict(daemon_server.config_cache.configs)
+        assert daemon.run_in_daemon(args) == 1
+        assert capsys.readouterr().out == expected.stdout
+        assert daemon_server.config_cache.configs == loaded_configs  # second run reuses the loaded configurations
+
+    def test_format_stdin_in_daemon(self, daemon_server, capsys, monkeypatch):
+        source = "*** test cases ***\nTest\n  Log  1\n"
+        monkeypatch.setattr("sys.stdin.read", lambda: source)
+        assert daemon.run_in_daemon(["-"]) == 0
+        assert "*** Test Cases ***\nTest\n    Log    1\n" in capsys.readouterr().out
+
+    def test_invalid_token_rejected(self, daemon_server, capsys):
+        daemon.write_state({**daemon_server.get_state(), "token": "invalid"})
+        assert daemon.run_in_daemon(["--version"]) is None
+
+    @pytest.mark.parametrize("option", [["--cache-dir", "{cache_dir}"], ["--cache-dir={cache_dir}"]])
+    def test_daemon_found_in_cache_dir_from_option(self, tmp_path, capsys, option):
+        server = daemon.DaemonServer()
+        daemon.write_state(server.get_state(), cache_dir=tmp_path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            assert daemon.run_in_daemon(["--version"]) is None
+            args = [arg.format(cache_dir=tmp_path) for arg in option] + ["--version"]
+            assert daemon.run_in_daemon(args) == 0
+            assert "robotidy" in capsys.readouterr().out
+        finally:
+            server.shutdown()
+            server.server_close()
+            daemon.remove_state(server.token, cache_dir=tmp_path)
+        assert not daemon.get_state_path(tmp_path).exists()
+
+    @pytest.mark.parametrize(
+        "args, expected",
+        [
+            ([], None),
+            (["--cache-dir", "first", "--cache-dir=second", "src"], "second"),
+            (["--check", "--cache-dir", "cache"], "cache"),
+            (["--cache-dir"], None),
+            (["--", "--cache-dir", "cache"], None),
+        ],
+    )
+    def test_get_cache_dir_option(self, args, expected):
+        assert daemon.get_cache_dir_option(args) == expected
+
+    def test_daemon_handles_requests_in_one_thread(self):
+        import socketserver
+
+        assert not issubclass(daemon.DaemonServer, socketserver.ThreadingMixIn)
+
+    def test_usage_error_in_daemon(self, daemon_server, capsys):
+        assert daemon.run_in_daemon(["--not-existing-option"]) == 2
+        assert "No such option" in capsys.readouterr().err
+
+    def test_diff_colored_if_client_in_terminal(self, daemon_server, capsys, monkeypatch):
+        pytest.importorskip("rich")
+        monkeypatch.delenv("NO_COLOR", raising=False)
+        monkeypatch.delenv("FORCE_COLOR", raising=False)
+        args = ["--check", "--diff", "--no-cache", str(TEST_DATA_DIR / "check")]
+        assert daemon.run_in_daemon(args) == 1
+        assert "\x1b[" not in capsys.readouterr().out
+        monkeypatch.setattr(sys.stdout, "isatty", lambda: True)
+        assert daemon.run_in_daemon(args) == 1
+        assert "\x1b[" in capsys.readouterr().out
+
+    def test_run_command_with_client_environment(self, daemon_server, monkeypatch):
+        pytest.importorskip("rich")
+        monkeypatch.delenv("NO_COLOR", raising=False)
+        monkeypatch.setenv("FORCE_COLOR", "1")
+        args = ["--check", "--diff", "--no-cache", str(TEST_DATA_DIR / "check")]
+        config_cache = daemon_server.config_cache
+        result = daemon.run_command(args, os.getcwd(), None, config_cache, {"FORCE_COLOR": None}, {"stdout": False})
+        assert "\x1b[" not in result["stdout"]
+        result = daemon.run_command(
+            args, os.getcwd(), None, config_cache, {"NO_COLOR": "1", "FORCE_COLOR": None}, {"stdout": True}
+        )
+        assert "\x1b[" not in result["stdout"]
+        result = daemon.run_command(args, os.getcwd(), None, config_cache, {}, {"stdout": False})
+        assert "\x1b[" in result["stdout"]
+        assert os.environ["FORCE_COLOR"] == "1" and "NO_COLOR" not in os.environ  # daemon environment is restored
@@ -1,10 +1,22 @@
+import io
 from pathlib import Path
-from unittest.mock import Mock
+from random import Random
+from unittest.mock import Mock, patch
 
 import pytest
 from robot.api import get_model
+from robot.api.parsing import EmptyLine, KeywordCall, ModelVisitor
 
-from robotidy.disablers import DisabledLines, RegisterDisablers
+from robotidy.disablers import (
+    ALL_TRANSFORMERS,
+    DisabledLines,
+    DisablersInFile,
+    LinesIndex,
+    RegisterDisablers,
+    get_end_lineno,
+    get_lineno,
+    is_block,
+)
 from robotidy.utils.misc import ROBOT_VERSION
 
 
@@ -48,6 +60,26 @@ def test_is_node_disabled(check_start, check_end, start_line, end_line, lines, f
     assert disablers.is_node_disabled(node, full_match=full_match) == expected
 
 
+@pytest.mark.parametrize(
+    "start_line, end_line, lines_ranges, expected",
+    [
+        (None, None, None, []),
+        (None, None, [(5, 6), (1, 2), (20, 30)], [(3, 4), (7, 19)]),
+        (None, None, [(3, 10), (5, 6)], [(1, 2), (11, 20)]),
+        (None, None, [], [(1, 20)]),
+        (4, 8, None, [(1, 3), (9, 20)]),
+        (4, 8, [(1, 2), (5, 6), (8, 12)], [(1, 4), (7, 7), (9, 20)]),
+        (4, None, [(1, 5)], [(1, 3), (5, 20)]),
+        (15, 18, [(1, 5)], [(1, 20)]),
+    ],
+)
+def test_lines_ranges_disablers(start_line, end_line, lines_ranges, expected):
+    disablers = DisabledLines(start_line, end_line, 20, lines_ranges)
+    disablers.parse_global_disablers()
+    disablers.sort_disablers()
+    assert disablers.lines == expected
+
+
 @pytest.mark.parametrize(
     "test_file, expected_lines, file_disabled, rf_version, check_transformer",
     [
@@ -74,3 +106,151 @@ def test_register_disablers(test_file, expected_lines, file_disabled, rf_version
     if check_transformer in register_disablers.disablers.disablers:
         assert register_disablers.disablers.disablers[check_transformer].lines == expected_lines
     assert register_disablers.is_disabled_in_file(check_transformer) == file_disabled
+
+
+class BlocksCollector(ModelVisitor):
+    def __init__(self):
+        self.blocks = []
+
+    def generic_visit(self, node):
+        if is_block(node):
+            self.blocks.append(node)
+        super().generic_visit(node)
+
+
+def get_blocks(model):
+    collector = BlocksCollector()
+    collector.visit(model)
+    return collector.blocks
+
+
+@pytest.mark.parametrize("test_file", ["test.robot", "open_disabler_in_section.robot", "file_disabled.robot"])
+def test_block_lines_same_as_in_model(test_file):
+    model = get_model(Path(__file__).parent / "testdata" / "disablers" / test_file)
+    for block in get_blocks(model):
+        assert get_lineno(block) == block.lineno
+        assert get_end_lineno(block) == block.end_lineno
+
+
+@pytest.mark.parametrize(
+    "start_line, end_line, disabled_blocks",
+    [
+        (None, None, [("Keyword", 26)]),
+        (
+            1,
+            22,
+            [
+                ("KeywordSection", 24),
+                ("Keyword", 26),
+                ("Keyword", 34),
+                ("Keyword", 39),
+                ("While", 42),
+                ("For", 43),
+                ("If", 44),
+                ("If", 49),
+                ("If", 52),
+                ("Try", 53),
+                ("Try", 55),
+                ("Try", 59),
+                ("Try", 61),
+                ("For", 67),
+            ],
+        ),
+        (
+            25,
+            40,
+            [
+                ("SettingSection", 1),
+                ("TestCaseSection", 6),
+                ("TestCase", 7),
+                ("For", 10),
+                ("If", 11),
+                ("While", 12),
+                ("If", 16),
+                ("Keyword", 26),
+                ("While", 42),
+                ("For", 43),
+                ("If", 44),
+                ("If", 49),
+                ("If", 52),
+                ("Try", 53),
+                ("Try", 55),
+                ("Try", 59),
+                ("Try", 61),
+                ("For", 67),
+            ],
+        ),
+    ],
+)
+@pytest.mark.skipif(ROBOT_VERSION.major < 5, reason="Test data uses RF 5.0+ syntax")
+def test_is_block_disabled_for_all(start_line, end_line, disabled_blocks):
+    model = get_model(Path(__file__).parent / "testdata" / "disablers" / "test.robot")
+    register_disablers = RegisterDisablers(start_line, end_line)
+    register_disablers.visit(model)
+    disablers = register_disablers.disablers
+    disabled = [
+        (type(block).__name__, block.lineno)
+        for block in get_blocks(model)
+        if disablers.is_block_disabled_for_all(block)
+    ]
+    assert disabled == disabled_blocks
+
+
+def test_added_empty_lines_do_not_shorten_disabled_block():
+    model = get_model(Path(__file__).parent / "testdata" / "disablers" / "test.robot")
+    register_disablers = RegisterDisablers(None, None)
+    register_disablers.visit(model)
+    keyword = model.sections[2].body[1]
+    assert register_disablers.disablers.is_block_disabled_for_all(keyword)
+    keyword.body.append(EmptyLine.from_params())
+    assert register_disablers.disablers.is_block_disabled_for_all(keyword)
+    keyword.body.append(KeywordCall.from_params("Added"))
+    assert not register_disablers.disablers.is_block_disabled_for_all(keyword)
+
+
+@pytest.mark.parametrize("start_line, end_line", [(None, None), (13, 20)])
+def test_prescan_skips_visiting_file_without_disablers(start_line, end_line):
+    text = (Path(__file__).parent / "testdata" / "disablers" / "test.robot").read_text()
+    text = text.replace("robotidy:", "robotidy")
+    model = get_model(io.StringIO(text))
+    expected = RegisterDisablers(start_line, end_line)
+    expected.visit(model)
+    register_disablers = RegisterDisablers(start_line, end_line)
+    register_disablers.prescan(text.encode())
+    with patch.object(RegisterDisablers, "visit_Section") as visit_section:
+        register_disablers.visit(model)
+    visit_section.assert_not_called()
+    disablers = register_disablers.disablers
+    assert {name: lines.lines for name, lines in disablers.disablers.items()} == {
+        name: lines.lines for name, lines in expected.disablers.disablers.items()
+    }
+    assert disablers.nothing_disabled == (start_line is None)
+    statement = model.sections[1].body[0].body[0]
+    assert disablers.is_node_disabled("NormalizeSeparators", statement) == (start_line is not None)
+
+
+def test_lines_index_same_as_scanning_lines():
+    random = Random(0)
+    for _ in range(200):
+        lines = []
+        for _ in range(random.randint(0, 8)):
+            start_line = random.randint(1, 40)
+            lines.append((start_line, start_line + random.randint(0, 10)))
+        index = LinesIndex(lines)
+        for lineno in range(1, 52):
+            for end_lineno in range(lineno, 52):
+                contains = any(start <= lineno and end >= end_lineno for start, end in lines)
+                overlaps = any(start <= end_lineno and end >= lineno for start, end in lines)
+                assert index.contains(lineno, end_lineno) == contains
+                assert index.overlaps(lineno, end_lineno) == overlaps
+
+
+def test_transformer_disablers_combined_with_disablers_for_all():
+    disablers = DisablersInFile(None, None, 50)
+    disablers.add_disabler(ALL_TRANSFORMERS, 10, 20)
+    disablers.add_disabler("NormalizeSeparators", 30, 40)
+    disablers.sort_disablers()
+    for lineno, normalize_separators, other in [(15, True, True), (35, True, False), (45, False, False)]:
+        node = Mock(lineno=lineno, end_lineno=lineno)
+        assert disablers.is_node_disabled("NormalizeSeparators", node) == normalize_separators
+        assert disablers.is_node_disabled("OtherTransformer", node) == other
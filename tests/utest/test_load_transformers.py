@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import importlib
 from unittest.mock import Mock, patch
 
 import pytest
 
 from robotidy.skip import SkipConfig
-from robotidy.transformers import TransformConfig, TransformConfigMap, load_transformers
+from robotidy.transformers import (
+    DEFAULT_METADATA,
+    IMPORTER,
+    TRANSFORMERS,
+    TRANSFORMERS_METADATA,
+    TransformConfig,
+    TransformConfigMap,
+    load_transformers,
+)
 from robotidy.utils.misc import ROBOT_VERSION
 
 
@@ -27,6 +36,23 @@ def get_transformer_config_from_order(order: list[str]) -> TransformConfigMap:
 
 
 class TestLoadTransformers:
+    @pytest.mark.parametrize("name", TRANSFORMERS)
+    def test_core_transformer_metadata(self, name):
+        transformer_class = getattr(importlib.import_module(f"robotidy.transformers.{name}"), name)
+        metadata = TRANSFORMERS_METADATA.get(name, DEFAULT_METADATA)
+        assert metadata.enabled == getattr(transformer_class, "ENABLED", True)
+        assert metadata.min_version == getattr(transformer_class, "MIN_VERSION", None)
+
+    def test_transformers_that_will_not_run_are_not_imported(self, skip_config):
+        with patch(
+            "robotidy.transformers.IMPORTER.import_class_or_module", wraps=IMPORTER.import_class_or_module
+        ) as import_mock:
+            load_transformers(TransformConfigMap([], [], []), skip=skip_config, target_version=4)
+        imported = {call.args[0].split(".")[-1] for call in import_mock.call_args_list}
+        assert "InlineIf" not in imported
+        assert "SmartSortKeywords" not in imported
+        assert "NormalizeSeparators" in imported
+
     def test_transformer_order(self, skip_config):
         order_1 = ["NormalizeSeparators", "OrderSettings"]
         order_2 = ["OrderSettings", "NormalizeSeparators"]
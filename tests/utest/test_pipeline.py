@@ -0,0 +1,190 @@
+from pathlib import Path
+
+import pytest
+from robot.api import get_model
+from robot.errors import DataError
+
+from robotidy import pipeline
+from robotidy.config import Config, RawConfig
+from robotidy.disablers import RegisterDisablers, skip_section_if_disabled
+from robotidy.transformers import TransformConfig, Transformer
+from robotidy.utils.misc import StatementLinesCollector
+
+TRANSFORMERS_DIR = Path(__file__).parent.parent / "atest" / "transformers"
+STATEMENT_LOCAL_SOURCES = sorted(
+    path
+    for name in (
+        "NormalizeComments",
+        "NormalizeSectionHeaderName",
+        "NormalizeSettingName",
+        "NormalizeTags",
+        "OrderTags",
+        "ReplaceEmptyValues",
+        "ReplaceRunKeywordIf",
+    )
+    for path in (TRANSFORMERS_DIR / name / "source").glob("*.robot")
+)
+
+
+def load_config(*transformers: str) -> Config:
+    transform = [
+        TransformConfig(name, force_include=True, custom_transformer=False, is_config=False) for name in transformers
+    ]
+    return Config.from_raw_config(RawConfig(transform=transform))
+
+
+def get_transformers(config, model, start_line=None, end_line=None):
+    disabler_finder = RegisterDisablers(start_line, end_line)
+    disabler_finder.visit(model)
+    transformers = []
+    for transformer in config.transformers:
+        transformer.disablers = disabler_finder.disablers
+        if not disabler_finder.disablers.is_disabled_in_file(transformer.__class__.__name__):
+            transformers.append(transformer)
+    return transformers, disabler_finder.disablers
+
+
+def run_steps(steps, model) -> int:
+    """Run the steps on the model and return the number of visited nodes."""
+    visits = 0
+    for step in steps:
+        step_visit = step.visit
+
+        def counting_visit(node):
+            nonlocal visits
+            visits += 1
+            return step_visit(node)
+
+        step.visit = counting_visit
+        try:
+            step.visit(model)
+        finally:
+            del step.visit
+    return visits
+
+
+def transform(config, source, fused: bool, start_line=None, end_line=None, pruned: bool = False):
+    model = get_model(source)
+    transformers, disablers = get_transformers(config, model, start_line, end_line)
+    if pruned:
+        steps = pipeline.fuse_transformers(transformers, disablers)
+    else:
+        steps = pipeline.fuse_transformers(transformers) if fused else transformers
+    visits = run_steps(steps, model)
+    return StatementLinesCollector(model).text, visits
+
+
+class CountingSections(Transformer):
+    STATEMENT_LOCAL = True
+
+    def __init__(self):
+        super().__init__()
+        self.visited_sections = 0
+
+    @skip_section_if_disabled
+    def visit_Section(self, node):  # noqa
+        self.visited_sections += 1
+        return self.generic_visit(node)
+
+
+class CustomKeywordVisitor(Transformer):
+    STATEMENT_LOCAL = True
+
+    def visit_Keyword(self, node):  # noqa
+        return node
+
+
+class TestPipeline:
+    def test_fuse_only_adjacent_statement_local_transformers(self):
+        config = load_config("NormalizeComments", "AlignSettingsSection", "OrderTags", "NormalizeTags")
+        steps = pipeline.fuse_transformers(config.transformers)
+        assert [step.__class__.__name__ for step in steps] == [
+            "FusedTransformers",
+            "AlignSettingsSection",
+            "NormalizeComments",
+        ]
+        assert [transformer.__class__.__name__ for transformer in steps[0].transformers] == [
+            "NormalizeTags",
+            "OrderTags",
+        ]
+
+    @pytest.mark.parametrize(
+        "source", STATEMENT_LOCAL_SOURCES, ids=lambda path: f"{path.parent.parent.name}-{path.name}"
+    )
+    def test_fused_output_same_as_sequential(self, source):
+        config = load_config(
+            "ReplaceEmptyValues",
+            "NormalizeTags",
+            "OrderTags",
+            "NormalizeSectionHeaderName",
+            "NormalizeSettingName",
+            "ReplaceRunKeywordIf",
+            "NormalizeComments",
+        )
+        try:
+            sequential, _ = transform(config, source, fused=False)
+        except DataError:
+            pytest.skip("Source is not supported in installed Robot Framework version")
+        fused, _ = transform(config, source, fused=True)
+        assert fused == sequential
+
+    def test_fused_pipeline_visits_fewer_nodes(self):
+        source = TRANSFORMERS_DIR / "NormalizeSettingName" / "source" / "tests.robot"
+        config = load_config("NormalizeSectionHeaderName", "NormalizeSettingName", "ReplaceRunKeywordIf")
+        sequential, sequential_visits = transform(config, source, fused=False)
+        fused, fused_visits = transform(config, source, fused=True)
+        assert fused == sequential
+        assert fused_visits * 3 <= sequential_visits + 3  # every statement local transformer traverses the model
+
+    def test_statement_local_with_declarative_block_visitors(self):
+        config = load_config("NormalizeSettingName", "NormalizeComments", "ReplaceEmptyValues")
+        assert all(pipeline.is_statement_local(transformer) for transformer in config.transformers)
+        assert pipeline.is_statement_local(CountingSections())
+        assert not pipeline.is_statement_local(CustomKeywordVisitor())
+
+    def test_block_visitors_not_called(self):
+        source = TRANSFORMERS_DIR / "NormalizeSettingName" / "source" / "tests.robot"
+        config = load_config("NormalizeSettingName")
+        counting = CountingSections()
+        model = get_model(source)
+        transformers, disablers = get_transformers(config, model)
+        counting.disablers = disablers
+        steps = pipeline.fuse_transformers([*transformers, counting])
+        assert len(steps) == 1
+        run_steps(steps, model)
+        assert counting.visited_sections == 0  # only the decorator decides whether the section is visited
+
+    def test_skips_disabled_nodes(self):
+        config = load_config("NormalizeSettingName", "OrderSettingsSection", "NormalizeSeparators", "RenameVariables")
+        skips = {
+            transformer.__class__.__name__: pipeline.skips_disabled_nodes(transformer)
+            for transformer in config.transformers
+        }
+        assert skips == {
+            "NormalizeSettingName": True,
+            "OrderSettingsSection": True,
+            "NormalizeSeparators": False,
+            "RenameVariables": False,
+        }
+
+    @pytest.mark.parametrize("start_line, end_line", [(5, 12), (20, 45), (40, 90)])
+    def test_pruned_output_same_as_not_pruned(self, start_line, end_line):
+        source = TRANSFORMERS_DIR / "ReplaceRunKeywordIf" / "source" / "tests.robot"
+        config = load_config(
+            "NormalizeSettingName",
+            "OrderSettingsSection",
+            "ReplaceRunKeywordIf",
+            "NormalizeSeparators",
+            "AddMissingEnd",
+        )
+        not_pruned, _ = transform(config, source, fused=True, start_line=start_line, end_line=end_line)
+        pruned, _ = transform(config, source, fused=True, start_line=start_line, end_line=end_line, pruned=True)
+        assert pruned == not_pruned
+
+    def test_pruned_pipeline_visits_fewer_nodes(self):
+        source = TRANSFORMERS_DIR / "ReplaceRunKeywordIf" / "source" / "tests.robot"
+        config = load_config("NormalizeSettingName", "ReplaceRunKeywordIf")
+        not_pruned, not_pruned_visits = transform(config, source, fused=True, start_line=20, end_line=45)
+        pruned, pruned_visits = transform(config, source, fused=True, start_line=20, end_line=45, pruned=True)
+        assert pruned == not_pruned
+        assert pruned_visits < not_pruned_visits
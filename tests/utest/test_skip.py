@@ -3,7 +3,7 @@ from unittest.mock import Mock
 
 import pytest
 
-from robotidy.skip import Skip, SkipConfig
+from robotidy.skip import Skip, SkipConfig, get_keyword_call_matcher
 
 
 class TestSkip:
@@ -83,6 +83,25 @@ class TestSkip:
         with pytest.raises(ValueError, match=msg_error):
             Skip(skip_config=skip_config)
 
+    def test_keyword_call_matcher_shared_by_equal_skip_configs(self):
+        first = Skip(SkipConfig(keyword_call=["Log"], keyword_call_pattern=["^Open", "Close$", "(?i)browser"]))
+        second = Skip(SkipConfig(keyword_call=["Log"], keyword_call_pattern=["^Open", "Close$", "(?i)browser"]))
+        other = Skip(SkipConfig(keyword_call=["Log"]))
+        assert first.keyword_call_matcher is second.keyword_call_matcher
+        assert first.keyword_call_matcher is not other.keyword_call_matcher
+        assert len(first.keyword_call_pattern) == 2  # patterns without inline flags are combined
+        names = ["log", "Open Browser", "Reopen", "Close", "Close All", "New BROWSER", "Keyword"]
+        decisions = [first.keyword_call(Mock(keyword=name)) for name in names]
+        assert decisions == [True, True, False, True, False, True, False]
+        assert first.keyword_call_matcher.memo == dict(zip(names, decisions))
+
+    def test_keyword_call_matchers_cache_bounded(self):
+        maxsize = get_keyword_call_matcher.cache_info().maxsize
+        assert maxsize is not None
+        for index in range(maxsize + 1):
+            Skip(SkipConfig(keyword_call=[f"Keyword {index}"]))
+        assert get_keyword_call_matcher.cache_info().currsize == maxsize
+
     def test_global_local_skip_documentation(self):
         # local overrides global
         skip_config = SkipConfig(documentation=False)
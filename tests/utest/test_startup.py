@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import subprocess
+import sys
+
+from robotidy.transformers import TRANSFORMERS_METADATA
+from robotidy.utils.misc import ROBOT_VERSION
+
+DEFERRED_MODULES = ("rich", "rich_click", "jinja2", "pathspec")
+# import budget counted in modules, which does not depend on the speed of the machine
+ROBOTIDY_MODULES_BUDGET = 50  # with the default transformers
+THIRD_PARTY_PACKAGES_BUDGET = 3  # click, tomli and its compiled module
+
+
+def get_import_times(
+    args, tmp_path, stdin: str | None = None, env: dict | None = None, command: tuple = ("-m", "robotidy")
+) -> dict[str, int]:
+    """Run robotidy in the new process and return self import time (in microseconds) of the imported modules."""
+    env = {**os.environ, "ROBOTIDY_NO_DAEMON": "1", "ROBOTIDY_CACHE_DIR": str(tmp_path / "cache"), **(env or {})}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *command, *args],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=tmp_path,
+    )
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, _, module = line[len("import time:") :].split("|")
+        import_times[module.strip()] = int(self_time)
+    return import_times
+
+
+def is_third_party(package: str) -> bool:
+    spec = importlib.util.find_spec(package)
+    origin = (spec.origin or "") if spec else ""
+    return "site-packages" in origin or "dist-packages" in origin
+
+
+def get_imported_in_addition_to_robot(import_times: dict[str, int], tmp_path) -> tuple[list[str], list[str]]:
+    """
+    Return robotidy modules and top level third party packages imported in addition to the modules imported by
+    Robot Framework (and the interpreter startup) in the same environment.
+    """
+    robot_modules = get_import_times([], tmp_path, command=("-c", "import robot.api"))
+    new_modules = [module for module in import_times if module not in robot_modules]
+    robotidy_modules = [module for module in new_modules if module.split(".")[0] == "robotidy"]
+    packages = {module.split(".")[0] for module in new_modules} - {"robot", "robotidy"}
+    return robotidy_modules, sorted(package for package in packages if is_third_party(package))
+
+
+def test_check_single_file_import_time(tmp_path):
+    source = tmp_path / "test.robot"
+    source.write_text("*** Test Cases ***\nTest\n    Keyword\n")
+    import_times = get_import_times(["--check", "--no-cache", str(source)], tmp_path)
+    assert "robotidy.app" in import_times
+    not_run = [
+        name
+        for name, metadata in TRANSFORMERS_METADATA.items()
+        if not metadata.enabled or ROBOT_VERSION.major < (metadata.min_version or 0)
+    ]
+    assert not [name for name in not_run if f"robotidy.transformers.{name}" in import_times]
+    assert not [name for name in DEFERRED_MODULES if name in import_times]
+    robotidy_modules, third_party = get_imported_in_addition_to_robot(import_times, tmp_path)
+    assert len(robotidy_modules) <= ROBOTIDY_MODULES_BUDGET, robotidy_modules
+    assert len(third_party) <= THIRD_PARTY_PACKAGES_BUDGET, third_party
+
+
+def test_stdin_import_time(tmp_path):
+    import_times = get_import_times(["-"], tmp_path, stdin="*** Test Cases ***\nTest\n    Keyword\n")
+    assert "robotidy.app" in import_times
+    assert not [name for name in DEFERRED_MODULES if name in import_times]
+    robotidy_modules, third_party = get_imported_in_addition_to_robot(import_times, tmp_path)
+    assert len(robotidy_modules) <= ROBOTIDY_MODULES_BUDGET, robotidy_modules
+    assert len(third_party) <= THIRD_PARTY_PACKAGES_BUDGET, third_party
+
+
+def test_rich_imported_only_for_colored_diff(tmp_path):
+    source = tmp_path / "test.robot"
+    source.write_text("*** test cases ***\nTest\n    Keyword\n")
+    args = ["--diff", "--no-overwrite", "--no-cache", str(source)]
+    import_times = get_import_times(args, tmp_path, env={"FORCE_COLOR": ""})
+    assert "rich" not in import_times
+    import_times = get_import_times(args, tmp_path, env={"FORCE_COLOR": "1"})
+    assert "rich" in import_times
@@ -1,11 +1,43 @@
+import difflib
 import os
+import random
+import stat
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
+from robot.api import get_model
+from robot.api.parsing import ModelVisitor
+from robot.errors import DataError
 
 from robotidy.app import Robotidy
 from robotidy.config import FormattingConfig, MainConfig, RawConfig
-from robotidy.utils.misc import ROBOT_VERSION, decorate_diff_with_color, split_args_from_name_or_path
+from robotidy.utils import diff, git
+from robotidy.utils.misc import (
+    ROBOT_VERSION,
+    ModelPositionsUpdater,
+    ModelWriter,
+    SourceFile,
+    StatementLinesCollector,
+    decorate_diff_with_color,
+    escape_rich_markup,
+    split_args_from_name_or_path,
+    write_atomically,
+)
+
+
+class TokenPositions(ModelVisitor):
+    def __init__(self):
+        self.positions = []
+
+    def visit_Statement(self, node):  # noqa
+        self.positions.extend((token.type, token.value, token.lineno, token.col_offset) for token in node.tokens)
+
+
+def get_token_positions(model):
+    collector = TokenPositions()
+    collector.visit(model)
+    return collector.positions
 
 
 @pytest.fixture
@@ -50,6 +82,17 @@ class TestUtils:
         output = decorate_diff_with_color(lines)
         assert output == expected_lines
 
+    def test_escape_rich_markup(self):
+        assert escape_rich_markup(["[bold]text\n", "text\n"]) == ["\\[bold]text\n", "text\n"]
+
+    def test_rich_console_compatibility(self):
+        from robotidy import rich_console
+        from robotidy.rich_console import console
+
+        assert console is rich_console.get_console()
+        with pytest.raises(AttributeError):
+            rich_console.not_existing  # noqa
+
     @pytest.mark.parametrize(
         "name_or_path, expected_name, expected_args",
         [
@@ -98,4 +141,145 @@ class TestUtils:
             end_line=None,
             line_length=120,
         )
-        assert app.get_line_ending(source) == expected
+        assert app.get_line_ending(SourceFile.read(source)) == expected
+
+    def test_statement_lines_collector(self):
+        text = "*** Settings ***\nLibrary    Collections\n\n*** Test Cases ***\nTest\n    Log    ąę\n"
+        collected = StatementLinesCollector(get_model(text))
+        assert collected.text == text
+        assert collected == StatementLinesCollector(get_model(text), keep_text=False)
+        assert collected != StatementLinesCollector(get_model(text.replace("Log", "Log Many")))
+
+    def test_statement_lines_collector_without_text(self):
+        collected = StatementLinesCollector(get_model("*** Test Cases ***\n"), keep_text=False)
+        with pytest.raises(ValueError):
+            collected.text
+
+    def test_statement_lines_collector_structure(self):
+        text = "*** Test Cases ***\nTest\n    Log    1\n"
+        structure = StatementLinesCollector(get_model(text)).structure
+        assert structure == StatementLinesCollector(get_model(text.replace("    Log", "  Log Many"))).structure
+        assert structure != StatementLinesCollector(get_model(text + "    Log    2\n")).structure
+        assert structure != StatementLinesCollector(get_model(text.replace("    1", "    1    2"))).structure
+
+    @pytest.mark.skipif(ROBOT_VERSION.major < 5, reason="Inline IF is supported in RF 5.0+")
+    def test_model_positions_updater(self):
+        text = "*** Test Cases ***\nTest\n    IF    $cond    Keyword\n    Log    1\n    ...    2\n"
+        model = get_model(text)
+        if_header = model.sections[0].body[0].body[0].header
+        if_header.tokens[0].value = "        "
+        keyword_call = model.sections[0].body[0].body[1]
+        separator = keyword_call.tokens[0]
+        keyword_call.tokens = (separator, keyword_call.tokens[1], separator, *keyword_call.tokens[3:])
+        new_model = ModelPositionsUpdater().visit(model)
+        expected = get_model(StatementLinesCollector(new_model).text)
+        assert get_token_positions(new_model) == get_token_positions(expected)
+
+    def test_source_file(self, tmp_path):
+        path = tmp_path / "test.robot"
+        path.write_bytes(b"\xef\xbb\xbf*** Test Cases ***\r\nTest\r\n")
+        source_file = SourceFile.read(path)
+        assert source_file.bom
+        assert source_file.newline == "\r\n"
+        assert source_file.text == "*** Test Cases ***\r\nTest\r\n"
+
+    def test_source_file_not_utf8(self, tmp_path):
+        path = tmp_path / "test.robot"
+        path.write_bytes(b"*** Test Cases ***\nTest\n    Log    \xff\n")
+        with pytest.raises(DataError, match="UnicodeDecodeError"):
+            SourceFile.read(path).text
+
+    def test_model_writer_does_not_write_the_same_content(self, tmp_path):
+        path = tmp_path / "test.robot"
+        content = b"*** Test Cases ***\r\nTest\r\n    Log    1\r\n"
+        path.write_bytes(content)
+        model = get_model(path)
+        assert not ModelWriter(path, newline="\r\n", original=content).write(model)
+        assert ModelWriter(path, newline="\n", original=content).write(model)
+        assert path.read_bytes() == content.replace(b"\r\n", b"\n")
+
+    def test_write_atomically_keeps_file_mode(self, tmp_path):
+        path = tmp_path / "test.robot"
+        path.write_bytes(b"old")
+        path.chmod(0o640)
+        write_atomically(path, b"new", fsync=True)
+        assert path.read_bytes() == b"new"
+        assert stat.S_IMODE(path.stat().st_mode) == 0o640
+        assert [file.name for file in tmp_path.iterdir()] == ["test.robot"]
+
+    def test_write_atomically_interrupted(self, tmp_path):
+        path = tmp_path / "test.robot"
+        path.write_bytes(b"old")
+        with patch("os.replace", side_effect=KeyboardInterrupt), pytest.raises(KeyboardInterrupt):
+            write_atomically(path, b"new")
+        assert path.read_bytes() == b"old"
+        assert [file.name for file in tmp_path.iterdir()] == ["test.robot"]
+
+    @pytest.mark.parametrize(
+        "before, after",
+        [
+            ([], []),
+            (["a\n"], ["a\n"]),
+            ([], ["a\n", "b\n"]),
+            (["a\n", "b\n", "c\n"], []),
+            (["a\n", "b\n", "c\n", "d\n"], ["a\n", "x\n", "c\n", "d\n", "e\n"]),
+            ([f"{i}\n" for i in range(20)], [f"{i}\n" for i in range(20) if i not in (3, 15)]),
+        ],
+    )
+    def test_unified_diff_same_as_difflib(self, before, after):
+        expected = list(difflib.unified_diff(before, after, fromfile="a\tbefore", tofile="a\tafter"))
+        assert list(diff.unified_diff(before, after, fromfile="a\tbefore", tofile="a\tafter")) == expected
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_diff_opcodes_reconstruct_new_lines(self, seed):
+        rnd = random.Random(seed)
+        before = [rnd.choice("abcdef") for _ in range(rnd.randint(0, 60))]
+        after = [rnd.choice("abcdefg") for _ in range(rnd.randint(0, 60))]
+        reconstructed = []
+        for tag, i1, i2, j1, j2 in diff.get_opcodes(before, after):
+            if tag == "equal":
+                assert before[i1:i2] == after[j1:j2]
+                reconstructed.extend(before[i1:i2])
+            else:
+                reconstructed.extend(after[j1:j2])
+        assert reconstructed == after
+
+    def test_parse_changed_lines(self, tmp_path):
+        git_diff = (
+            "diff --git a/changed.robot b/changed.robot\n"
+            "index 1111111..2222222 100644\n"
+            "--- a/changed.robot\n"
+            "+++ b/changed.robot\n"
+            "@@ -3 +3 @@ Test\n"
+            "-    Step  2\n"
+            "++++ b/not a header\n"
+            "@@ -10,0 +11,3 @@ Test\n"
+            "+    Step\n"
+            "+    Step\n"
+            "+    Step\n"
+            "@@ -20,2 +23,0 @@ Test\n"
+            "-    Step\n"
+            "-    Step\n"
+            "diff --git a/removed.robot b/removed.robot\n"
+            "deleted file mode 100644\n"
+            "--- a/removed.robot\n"
+            "+++ /dev/null\n"
+            "@@ -1,2 +0,0 @@\n"
+            "-*** Test Cases ***\n"
+            "-Test\n"
+            "diff --git a/only_removed.robot b/only_removed.robot\n"
+            "--- a/only_removed.robot\n"
+            "+++ b/only_removed.robot\n"
+            "@@ -5 +4,0 @@\n"
+            "-    Step\n"
+            'diff --git "a/dir/sp\\303\\244ce\\tname.robot" "b/dir/sp\\303\\244ce\\tname.robot"\n'
+            '--- "a/dir/sp\\303\\244ce\\tname.robot"\n'
+            '+++ "b/dir/sp\\303\\244ce\\tname.robot"\n'
+            "@@ -1,0 +2,2 @@\n"
+            "+a\n"
+            "+b\n"
+        )
+        assert git.parse_changed_lines(git_diff, tmp_path) == {
+            tmp_path / "changed.robot": [(3, 3), (11, 13)],
+            tmp_path / "dir" / "sp\u00e4ce\tname.robot": [(2, 3)],
+        }
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+import subprocess
 from pathlib import Path
 
 from click.testing import CliRunner
@@ -27,3 +29,17 @@ def run_tidy(
         print(result.output)
         raise AssertionError(f"robotidy exit code: {result.exit_code} does not match expected: {exit_code}")
     return result
+
+
+GIT_USER = {
+    "GIT_AUTHOR_NAME": "a",
+    "GIT_AUTHOR_EMAIL": "a@a",
+    "GIT_COMMITTER_NAME": "a",
+    "GIT_COMMITTER_EMAIL": "a@a",
+}
+
+
+def init_git_repo(path: Path):
+    """Create the git repository in the directory and commit all files in it."""
+    for command in (["init", "-q"], ["add", "."], ["commit", "-q", "-m", "init"]):
+        subprocess.run(["git", *command], cwd=path, check=True, env={**os.environ, **GIT_USER})